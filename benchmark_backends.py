@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the local embedding backends on chunks of the real corpus.
+
+Each backend is given as BACKEND[:QUANTIZE], e.g. `torch`, `onnx` or
+`onnx:avx2` (ONNX Runtime with dynamic int8 quantization). For each one it
+reports build-time throughput (chunks/sec through `encode`), single-query
+latency (p50 / p95 of `embed_query`) and, against the PyTorch output, the
+mean and minimum cosine similarity of the chunk vectors.
+
+Exits with status 1 if any backend's minimum cosine falls below
+--min-cosine; tests/test_embedding_backends.py checks the same on a fixed
+set of texts. Pass --offline to make sure nothing is fetched from the
+Hugging Face Hub.
+
+Usage:
+    python benchmark_backends.py [pdf_dir] [--model all-MiniLM-L6-v2] [--backends torch onnx onnx:avx2]
+                                 [--limit 2000] [--queries 200] [--min-cosine 0.98] [--offline]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from benchmark_embeddings import load_chunks
+from AI_Lawyer.components.local_embedding import LocalSentenceTransformerEmbeddings
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def run_backend(spec, args, texts, queries):
+    backend, _, quantize = spec.partition(":")
+    embedder = LocalSentenceTransformerEmbeddings(
+        args.model, batch_size=args.batch_size, backend=backend, quantize=quantize, offline=args.offline
+    )
+    embedder.encode(texts[:32])  # warm-up
+
+    started = time.perf_counter()
+    vectors = embedder.encode(texts)
+    seconds = time.perf_counter() - started
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        embedder.embed_query(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return vectors, len(texts) / seconds, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf_dir", nargs="?", default="artifacts/data/pdfs")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx:avx2"])
+    parser.add_argument("--limit", type=int, default=2000, help="max chunks to embed")
+    parser.add_argument("--queries", type=int, default=200, help="single-query latency samples")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args()
+
+    texts, _ = load_chunks(args.pdf_dir, args.limit)
+    if not texts:
+        logger.error(f"No chunks produced from {args.pdf_dir}")
+        return 1
+    # Short, query-like inputs: the first sentence of a sample of chunks
+    queries = [text.split(".")[0][:200] for text in texts[::max(1, len(texts) // args.queries)]][:args.queries]
+
+    backends = ["torch"] + [spec for spec in args.backends if spec != "torch"]
+    reference, failed = None, False
+
+    print(f"{len(texts)} chunks, {len(queries)} queries, model={args.model}")
+    print(f"{'backend':<18} {'chunks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'mean cos':>9} {'min cos':>9}")
+    for spec in backends:
+        try:
+            vectors, rate, p50, p95 = run_backend(spec, args, texts, queries)
+        except ImportError as e:
+            logger.warning(f"Skipping {spec}: {e}")
+            continue
+        if reference is None:
+            reference = vectors
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        cosine = np.sum(unit * reference / np.linalg.norm(reference, axis=1, keepdims=True), axis=1)
+        status = ""
+        if cosine.min() < args.min_cosine:
+            status, failed = "  FAIL", True
+        print(f"{spec:<18} {rate:>9.1f} {p50:>8.2f} {p95:>8.2f} {cosine.mean():>9.5f} {cosine.min():>9.5f}{status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
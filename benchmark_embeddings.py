@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local embedding paths on chunks of the real corpus.
+
+  legacy   model.encode(texts) with default settings, every vector turned
+           into a list of floats, then FAISS.from_embeddings
+  numpy    LocalSentenceTransformerEmbeddings.encode (length-sorted batches,
+           normalised float32 (n, d) array) handed straight to FAISS, for
+           each --batch-sizes value
+  pool     EmbeddingWorkerPool.encode for each --pools WORKERSxTHREADS
+           configuration (pool start-up and model loading not timed)
+
+Reports wall time, chunks/sec and the peak Python heap (tracemalloc) per
+path, where the boxed floats of the legacy path show up.
+
+Usage:
+    python benchmark_embeddings.py [pdf_dir] [--model all-MiniLM-L6-v2] [--limit 5000]
+                                   [--batch-sizes 32 64 128] [--pools 2x1 4x1 2x2]
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from langchain_community.vectorstores import FAISS
+from AI_Lawyer.entity.config_entity import DataConfig, ChunkingConfig
+from AI_Lawyer.components.chunking_component import Data_Loader, Chunking_text
+from AI_Lawyer.components.chunk_store import texts_and_metadatas
+from AI_Lawyer.components.local_embedding import LocalSentenceTransformerEmbeddings, EmbeddingWorkerPool
+from AI_Lawyer.components.vector_index import build_faiss_store
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def load_chunks(pdf_dir, limit):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Throwaway registry so the benchmark doesn't touch the real one
+        data_config = DataConfig(
+            root_dir=Path(tmp),
+            source_url=[],
+            pdf_directory=Path(pdf_dir),
+            registry_path=Path(tmp) / "registry.json",
+            extractor="pypdfium2",
+            stitch_pages=True,
+        )
+        documents = Data_Loader(data_config).load_pdfs()
+    chunks = Chunking_text(ChunkingConfig(chunk_size=1000, chunk_overlap=200, add_start_index=True)).main(documents)
+    return texts_and_metadatas(chunks, 0, limit)
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def legacy_path(embedder, texts, metadatas):
+    embeddings = embedder.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    vectors = [emb.tolist() for emb in embeddings]
+    faiss_db = FAISS.from_embeddings(list(zip(texts, vectors)), embedder, metadatas=metadatas)
+    return faiss_db, np.asarray(vectors, dtype=np.float32)
+
+
+def numpy_path(embedder, texts, metadatas):
+    vectors = embedder.encode(texts)
+    return build_faiss_store(texts, metadatas, vectors, embedder), vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf_dir", nargs="?", default="artifacts/data/pdfs")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--limit", type=int, default=5000, help="max chunks to embed")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--pools", nargs="*", default=[], metavar="WORKERSxTHREADS",
+                        help="worker pool configurations, e.g. 2x1 4x1 2x2")
+    args = parser.parse_args()
+
+    texts, metadatas = load_chunks(args.pdf_dir, args.limit)
+    if not texts:
+        logger.error(f"No chunks produced from {args.pdf_dir}")
+        return
+
+    embedder = LocalSentenceTransformerEmbeddings(args.model)
+    embedder.encode(texts[:32])  # warm-up
+
+    runs = [("legacy", lambda: legacy_path(embedder, texts, metadatas))]
+    for batch_size in args.batch_sizes:
+        def run(batch_size=batch_size):
+            embedder.batch_size = batch_size
+            return numpy_path(embedder, texts, metadatas)
+        runs.append((f"numpy bs={batch_size}", run))
+
+    pools = []
+    for spec in args.pools:
+        workers, threads = (int(n) for n in spec.lower().split("x"))
+        pool = EmbeddingWorkerPool(args.model, workers, threads_per_worker=threads, batch_size=args.batch_sizes[0])
+        pool.encode(texts[:workers * 32])  # wait for every worker to load its model
+        pools.append(pool)
+        def run(pool=pool):
+            vectors = pool.encode(texts)
+            return build_faiss_store(texts, metadatas, vectors, embedder), vectors
+        runs.append((f"pool {workers}x{threads}", run))
+
+    print(f"{len(texts)} chunks, model={args.model}")
+    print(f"{'path':<16} {'seconds':>9} {'chunks/s':>10} {'peak heap MB':>13} {'min cos vs legacy':>18}")
+    reference = None
+    for name, run in runs:
+        (faiss_db, vectors), seconds, peak = measure(run)
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        if reference is None:
+            reference = unit
+        agreement = float(np.min(np.sum(unit * reference, axis=1)))
+        print(f"{name:<16} {seconds:>9.1f} {len(texts) / seconds:>10.1f} {peak / 1e6:>13.1f} {agreement:>18.5f}")
+        del faiss_db
+
+    for pool in pools:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
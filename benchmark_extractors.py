@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the PDF text extractors on the corpus in artifacts/data/pdfs.
+
+For every extractor it reports pages/sec and, against pdfplumber as the
+reference, a word-level F1 score as a proxy for text fidelity, plus how
+many pages the text-layer backends handed back to pdfplumber.
+
+Usage:
+    python benchmark_extractors.py [pdf_dir] [--extractors pdfplumber pypdfium2 pypdf]
+"""
+
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from AI_Lawyer.components.chunking_component import EXTRACTORS, get_extractor
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def word_f1(reference, candidate):
+    ref, cand = Counter(reference.split()), Counter(candidate.split())
+    if not ref and not cand:
+        return 1.0
+    overlap = sum((ref & cand).values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_extractor(name, pdf_files):
+    extractor = get_extractor(name)
+    texts, pages, fallbacks = {}, 0, 0
+    started = time.perf_counter()
+
+    for pdf_file in pdf_files:
+        try:
+            extracted = extractor.extract(str(pdf_file))
+        except Exception as e:
+            logger.error(f"{name} failed on {pdf_file.name}: {e}")
+            continue
+        texts[pdf_file] = "\n".join(text for text, _ in extracted)
+        pages += len(extracted)
+        fallbacks += sum(1 for _, metadata in extracted if metadata.get("extractor") != name)
+
+    return texts, pages, fallbacks, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf_dir", nargs="?", default="artifacts/data/pdfs")
+    parser.add_argument("--extractors", nargs="+", default=list(EXTRACTORS))
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.pdf_dir).glob("*.pdf"))
+    if not pdf_files:
+        logger.error(f"No PDFs found in {args.pdf_dir}")
+        return
+
+    names = ["pdfplumber"] + [n for n in args.extractors if n != "pdfplumber"]
+    results = {}
+    for name in names:
+        try:
+            results[name] = run_extractor(name, pdf_files)
+        except ImportError as e:
+            logger.warning(f"Skipping {name}: {e}")
+
+    reference = results.get("pdfplumber", ({},))[0]
+
+    print(f"{'extractor':<12} {'pages':>7} {'seconds':>9} {'pages/s':>9} {'fallback':>9} {'word F1':>8}")
+    for name, (texts, pages, fallbacks, seconds) in results.items():
+        scores = [word_f1(reference[f], texts[f]) for f in texts if f in reference]
+        f1 = sum(scores) / len(scores) if scores else float("nan")
+        rate = pages / seconds if seconds else 0.0
+        print(f"{name:<12} {pages:>7} {seconds:>9.1f} {rate:>9.1f} {fallbacks:>9} {f1:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
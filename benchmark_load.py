@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compare vector store load modes across several worker processes.
+
+Starts --workers processes at once for each load mode ("memory": index read
+onto the heap; "mmap": read-only memory-mapped index; both with the compact
+docstore; "pickle": LangChain load_local, for stores that still have an
+index.pkl). Each worker loads the configured store, runs a few
+searches and, while all workers are still alive, reports its load time,
+RSS growth and PSS (proportional set size: shared pages are split between
+the processes mapping them, so it shows what the workers really cost
+together).
+
+Usage:
+    python benchmark_load.py [--workers 4] [--modes memory mmap pickle] [--queries 20]
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 / 1e6
+
+
+def _pss_mb():
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _worker(mode, queries, barrier, results):
+    from AI_Lawyer.config.configuration import ConfigurationManager
+    from AI_Lawyer.components.local_embedding import EmbeddingCreator
+    from AI_Lawyer.components.reranking import RerankingFAISS
+    from AI_Lawyer.components.store_io import store_dir
+
+    creator = EmbeddingCreator(config=ConfigurationManager().get_embeddings_config())
+    rss = _rss_mb()
+    started = time.perf_counter()
+    if mode == "pickle":
+        faiss_db = RerankingFAISS.load_local(str(store_dir(creator.db_path)), None, allow_dangerous_deserialization=True)
+    else:
+        faiss_db = creator.load_vector_store(mmap=(mode == "mmap"))
+    load_seconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(0)
+    for _ in range(queries):
+        vector = rng.normal(size=faiss_db.index.d).astype(np.float32)
+        faiss_db.similarity_search_with_score_by_vector((vector / np.linalg.norm(vector)).tolist(), k=5)
+
+    barrier.wait()
+    results.put((mode, load_seconds, _rss_mb() - rss, _pss_mb()))
+    barrier.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["memory", "mmap"])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':<8} {'load ms (mean)':>15} {'RSS +MB (mean)':>15} {'PSS MB (sum)':>13}")
+    for mode in args.modes:
+        barrier = context.Barrier(args.workers)
+        results = context.Queue()
+        workers = [context.Process(target=_worker, args=(mode, args.queries, barrier, results))
+                   for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        rows = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        print(f"{mode:<8} {np.mean([r[1] for r in rows]) * 1000:>15.1f} "
+              f"{np.mean([r[2] for r in rows]):>15.1f} {np.sum([r[3] for r in rows]):>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Build, rebuild or inspect the per-domain index shards (sharding.enabled).
+
+Domains are the groups of `source_url` in config.yaml; PDFs not listed there
+go to the `default_domain` shard. --domains rebuilds only the given shards:
+just their PDFs are parsed (through the text cache), chunked and embedded
+(through the embedding cache), and the other shards are not touched.
+--route shows which shards a query would be sent to and the merged hits.
+
+Usage:
+    python build_shards.py --list
+    python build_shards.py --domains criminal gst
+    python build_shards.py --all
+    python build_shards.py --route "punishment for theft" [--k 5]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from AI_Lawyer.config.configuration import ConfigurationManager
+from AI_Lawyer.components.chunking_component import Data_Loader
+from AI_Lawyer.components.sharding import ShardedVectorStore
+from AI_Lawyer.pipeline.stage02_Textsplitting import start_chunking_pipeline
+from AI_Lawyer.pipeline.stage03_embedding_creation import rebuild_shards
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--list", action="store_true", help="show domains, their PDFs and the built shards")
+    group.add_argument("--domains", nargs="+", help="rebuild only these shards")
+    group.add_argument("--all", action="store_true", help="rebuild every shard")
+    group.add_argument("--route", metavar="QUERY", help="route a query and print the merged hits")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    config_manager = ConfigurationManager()
+    data_cfg = config_manager.get_data_ingestion_config()
+    sharding_cfg = config_manager.get_sharding_config()
+    sharded = ShardedVectorStore(config_manager.get_embeddings_config(), sharding_cfg)
+    known = sorted(set(sharding_cfg.domains) | {sharding_cfg.default_domain})
+
+    if args.list:
+        table = sharded.load_table()
+        for domain in known:
+            files = sharded.files_for([domain], data_cfg.pdf_directory)
+            built = f"{table[domain]['vectors']} vectors" if domain in table else "not built"
+            print(f"{domain:<18} {len(files):>3} PDFs  {built}")
+        return 0
+
+    if args.route:
+        router = sharded.load()
+        vector = router.embedding_function.embed_query(args.route)
+        for domain, score in router.route(vector):
+            print(f"{domain:<18} {score:.3f}")
+        for document, distance in router.similarity_search_with_score_by_vector(vector, k=args.k):
+            print(f"\n[{document.metadata['shard']}] {distance:.4f} {Path(document.metadata.get('source', '')).name} "
+                  f"p.{document.metadata.get('page')}\n{document.page_content[:200]}")
+        router.close()
+        return 0
+
+    domains = known if args.all else args.domains
+    unknown = sorted(set(domains) - set(known))
+    if unknown:
+        logger.error(f"Unknown domains {unknown}; configured: {known}")
+        return 1
+
+    files = sharded.files_for(domains, data_cfg.pdf_directory)
+    logger.info(f"Rebuilding {', '.join(domains)} from {len(files)} PDFs")
+    documents = Data_Loader(config=data_cfg).load_files(files)
+    text_chunks = start_chunking_pipeline(documents, partial=not args.all) if documents else []
+    rebuild_shards(text_chunks, domains)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Run the shared embedding service.
+
+Loads the configured embedding model once and serves it to every process
+whose `embeddings.service_address` points here (Streamlit sessions, API
+workers, pipeline runs), so memory no longer grows with the number of
+workers. Concurrent `embed_query` calls are micro-batched: queries arriving
+within `service_max_wait_ms` of each other go through the model together.
+
+With --check it starts the service in-process, fires concurrent queries at
+it from --threads client threads and verifies that the vectors match the
+in-process model, reporting queries/sec and the average micro-batch size.
+
+Usage:
+    python embedding_server.py [--address unix:///tmp/ai_lawyer_embeddings.sock] [--model all-MiniLM-L6-v2]
+    python embedding_server.py --check [--threads 16] [--queries 512]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from AI_Lawyer.config.configuration import ConfigurationManager
+from AI_Lawyer.components.embedding_service import EmbeddingService
+from AI_Lawyer.components.local_embedding import LocalSentenceTransformerEmbeddings
+from AI_Lawyer.utils.logging_setup import logger
+
+
+DEFAULT_ADDRESS = "unix:///tmp/ai_lawyer_embeddings.sock"
+
+
+def make_service(args, embed_cfg, address):
+    # The service returns raw vectors; each client normalises as it is configured to
+    embedder = LocalSentenceTransformerEmbeddings(
+        args.model or embed_cfg.model,
+        batch_size=embed_cfg.batch_size,
+        normalize=False,
+        backend=embed_cfg.backend,
+        quantize=embed_cfg.quantize,
+        offline=embed_cfg.offline,
+        export_dir=embed_cfg.export_dir,
+        device=embed_cfg.device,
+    )
+    embedder.encode(["warm-up"])
+    return EmbeddingService(embedder, address, max_batch=args.max_batch or embed_cfg.service_max_batch,
+                            max_wait_ms=embed_cfg.service_max_wait_ms if args.max_wait_ms is None else args.max_wait_ms)
+
+
+def run_check(args, embed_cfg):
+    address = f"unix://{os.path.join(tempfile.mkdtemp(), 'embeddings.sock')}"
+    service = make_service(args, embed_cfg, address).start()
+    model_name = service.embedder.model_name
+
+    local = LocalSentenceTransformerEmbeddings(model_name, backend=service.embedder.backend,
+                                               quantize=service.embedder.quantize,
+                                               export_dir=embed_cfg.export_dir, device=embed_cfg.device)
+    client = LocalSentenceTransformerEmbeddings(model_name, backend=service.embedder.backend,
+                                                quantize=service.embedder.quantize, service_address=address)
+    queries = [f"What does section {i} of the Act say about tenant deposits and notice period {i % 7}?"
+               for i in range(args.queries)]
+
+    started = time.perf_counter()
+    expected = np.array([local.embed_query(query) for query in queries])
+    local_qps = len(queries) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        served = np.array(list(executor.map(client.embed_query, queries)))
+    service_qps = len(queries) / (time.perf_counter() - started)
+
+    documents = client.encode(queries[:64])
+    info = client.service.info()
+    service.shutdown()
+
+    cosine = np.sum(served * expected, axis=1)
+    ok = cosine.min() > 0.999 and np.allclose(documents, expected[:64], atol=1e-4)
+    print(f"{len(queries)} queries: in-process sequential {local_qps:.1f} q/s, "
+          f"service with {args.threads} threads {service_qps:.1f} q/s")
+    print(f"micro-batches: {info['batches']}, avg {info['queries'] / max(info['batches'], 1):.1f} queries/batch")
+    print(f"min cosine vs in-process: {cosine.min():.6f} -> {'OK' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=None, help="default: embeddings.service_address, else " + DEFAULT_ADDRESS)
+    parser.add_argument("--model", default=None, help="default: embeddings.model")
+    parser.add_argument("--max-batch", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    parser.add_argument("--check", action="store_true", help="serve in-process, compare with local vectors and exit")
+    parser.add_argument("--threads", type=int, default=16, help="client threads with --check")
+    parser.add_argument("--queries", type=int, default=512, help="queries to send with --check")
+    args = parser.parse_args()
+
+    embed_cfg = ConfigurationManager().get_embeddings_config()
+    if args.check:
+        return run_check(args, embed_cfg)
+
+    service = make_service(args, embed_cfg, args.address or embed_cfg.service_address or DEFAULT_ADDRESS)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Embedding service stopped")
+    finally:
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini embedding REST API, with fault injection.
+
+Serves `embedContent` and `batchEmbedContents` with deterministic vectors
+derived from each text, and fails a configurable share of calls with 429
+(with Retry-After), 500/503, or a dropped connection. Point
+`embeddings.api_endpoint` at it to exercise GeminiEmbedding's batching,
+rate limiting and retries without an API key or quota. The automated
+checks live in tests/test_gemini_embedding.py.
+
+Usage:
+    python gemini_stub_server.py [--port 8089] [--throttle-rate 0.1] [--fault-rate 0.05] [--drop-rate 0.02]
+"""
+
+import sys
+import json
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_vector(text, dim):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [round((digest[i % len(digest)] - 127.5) / 127.5, 6) for i in range(dim)]
+
+
+def make_handler(args, stats):
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *log_args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                stats["calls"] += 1
+                roll = rng.random()
+                if roll < args.drop_rate:
+                    outcome = "dropped"
+                elif roll < args.drop_rate + args.throttle_rate:
+                    outcome = "throttled"
+                elif roll < args.drop_rate + args.throttle_rate + args.fault_rate:
+                    outcome = "faults"
+                else:
+                    outcome = None
+                if outcome:
+                    stats[outcome] += 1
+                status = rng.choice([500, 503])
+
+            if outcome == "dropped":
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            if outcome == "throttled":
+                return self._reply(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                                   {"Retry-After": "0"})
+            if outcome == "faults":
+                return self._reply(status, {"error": {"code": status, "status": "UNAVAILABLE"}})
+
+            if self.path.endswith(":batchEmbedContents"):
+                requests = payload.get("requests", [])
+                if len(requests) > 100:
+                    return self._reply(400, {"error": {"code": 400, "message": "at most 100 requests per batch"}})
+                with lock:
+                    stats["texts"] += len(requests)
+                return self._reply(200, {"embeddings": [
+                    {"values": fake_vector(r["content"]["parts"][0]["text"], args.dim)} for r in requests
+                ]})
+            if self.path.endswith(":embedContent"):
+                with lock:
+                    stats["texts"] += 1
+                text = payload["content"]["parts"][0]["text"]
+                return self._reply(200, {"embedding": {"values": fake_vector(text, args.dim)}})
+            return self._reply(404, {"error": {"code": 404, "message": f"unknown method {self.path}"}})
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dim", type=int, default=16)
+    parser.add_argument("--throttle-rate", type=float, default=0.1, help="share of calls answered 429")
+    parser.add_argument("--fault-rate", type=float, default=0.05, help="share of calls answered 500/503")
+    parser.add_argument("--drop-rate", type=float, default=0.02, help="share of connections dropped")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stats = {"calls": 0, "texts": 0, "throttled": 0, "faults": 0, "dropped": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args, stats))
+    print(f"Gemini stub listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"stub stats: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,13 @@ Orchestrates the full AI_Lawyer pipeline:
   - Stage 02: Text Splitting / Chunking
   - Stage 03: Embedding Creation (FAISS)
   - Stage 04: Query Pipeline (RAG)
+  (Stages 02 + 03 run overlapped as one streaming pipeline when
+   `pipeline.streaming` is true in config.yaml)
 
 Notes:
 - Config path: /workspaces/AI_Lawyer/config/config.yaml
 - Vectorstore path: /workspaces/AI_Lawyer/vectorstore
-- FAISS loading uses: FAISS.load_local(path, embedding_model)
+- FAISS loading uses: EmbeddingCreator.load_vector_store (no pickle; see components/store_io.py)
 """
 
 import sys
@@ -28,8 +30,11 @@ from AI_Lawyer.pipeline.stage02_Textsplitting import (
 )
 from AI_Lawyer.pipeline.stage03_embedding_creation import (
     start_embedding_pipeline,
+    start_incremental_embedding_pipeline,
     load_existing_vector_store,
+    vector_store_exists,
 )
+from AI_Lawyer.pipeline.stage02_03_streaming import start_streaming_pipeline
 # stage04 may expose a start function; we attempt to import it.
 try:
     from AI_Lawyer.pipeline.stage04_query_pipeline import start_query_pipeline
@@ -83,11 +88,13 @@ def run_stage_02():
     """
     Run Stage 02 - Text loading + chunking.
     Uses your start_data_loader_pipeline() and start_chunking_pipeline()
+    Returns (text_chunks, loader); call loader.commit() once Stage 03 has
+    saved the index, so the document registry never runs ahead of it.
     """
     try:
         logger.info("===== Stage 02: Text Loading & Chunking (start) =====")
 
-        documents = start_data_loader_pipeline()
+        documents, loader = start_data_loader_pipeline(return_loader=True)
         if not documents:
             logger.warning("No documents loaded in Stage 02. Aborting pipeline.")
             raise RuntimeError("Stage 02 produced no documents.")
@@ -98,7 +105,7 @@ def run_stage_02():
             raise RuntimeError("Stage 02 produced no text chunks.")
 
         logger.info(f"===== Stage 02 completed: {len(text_chunks)} chunks created =====")
-        return text_chunks
+        return text_chunks, loader
 
     except Exception as e:
         logger.exception(f"Stage 02 failed: {e}")
@@ -136,6 +143,50 @@ def run_stage_03(text_chunks):
         raise e
 
 
+def run_incremental_stages():
+    """
+    Run Stages 02 + 03 on the document registry delta (pipeline.incremental: true).
+    Only added / changed PDFs are parsed, chunked and embedded; chunks of
+    changed / removed PDFs are deleted from the saved index. Returns (faiss_db, chunk_count).
+    """
+    try:
+        logger.info("===== Stage 02+03: Incremental Update (start) =====")
+
+        documents, loader = start_data_loader_pipeline(only_changed=True, return_loader=True)
+        delta = loader.delta
+        text_chunks = start_chunking_pipeline(documents, partial=True) if documents else []
+
+        faiss_db = start_incremental_embedding_pipeline(text_chunks, delta)
+        # The registry is saved only once the updated index has been saved, so a
+        # failed update is retried from the same delta next run
+        loader.commit()
+
+        logger.info(f"===== Stage 02+03 completed: {len(text_chunks)} chunks embedded ({delta.summary()}) =====")
+        return faiss_db, len(text_chunks)
+
+    except Exception as e:
+        logger.exception(f"Incremental stages failed: {e}")
+        raise e
+
+
+def run_streaming_stages(incremental=False):
+    """
+    Run Stages 02 + 03 as one streaming pipeline (pipeline.streaming: true).
+    Parsing, chunking and embedding overlap; returns (faiss_db, chunk_count).
+    """
+    try:
+        logger.info("===== Stage 02+03: Streaming Parse/Chunk/Embed (start) =====")
+
+        faiss_db, chunk_count = start_streaming_pipeline(incremental=incremental)
+
+        logger.info(f"===== Stage 02+03 completed: {chunk_count} chunks embedded =====")
+        return faiss_db, chunk_count
+
+    except Exception as e:
+        logger.exception(f"Streaming stages failed: {e}")
+        raise e
+
+
 def run_stage_04(faiss_db):
     """
     Run Stage 04 - Query pipeline.
@@ -180,11 +231,31 @@ def main():
         # Stage 1 - SKIPPED (data ingestion assumed to be already done)
         logger.info("===== Stage 01: Data Ingestion (SKIPPED - assuming PDFs already downloaded) =====")
 
-        # Stage 2
-        text_chunks = run_stage_02()
-
-        # Stage 3
-        faiss_db = run_stage_03(text_chunks)
+        config_manager = ConfigurationManager()
+        pipeline_cfg = config_manager.get_pipeline_config()
+        sharded = config_manager.get_sharding_config().enabled
+
+        # The first run (no saved index yet) is always a full build
+        incremental = pipeline_cfg.incremental and vector_store_exists()
+
+        # Streaming appends to a single store; sharded builds use the staged path
+        if pipeline_cfg.streaming and sharded:
+            logger.info("pipeline.streaming is ignored with sharding.enabled; running stages 02 and 03 in turn")
+
+        if pipeline_cfg.streaming and not sharded:
+            # Stage 2 + 3 overlapped
+            faiss_db, chunk_count = run_streaming_stages(incremental=incremental)
+        elif incremental:
+            # Stage 2 + 3 on the delta only
+            faiss_db, chunk_count = run_incremental_stages()
+        else:
+            # Stage 2
+            text_chunks, loader = run_stage_02()
+            chunk_count = len(text_chunks)
+
+            # Stage 3
+            faiss_db = run_stage_03(text_chunks)
+            loader.commit()
 
         # Stage 4
         query_obj = run_stage_04(faiss_db)
@@ -193,7 +264,7 @@ def main():
 
         # return objects for programmatic use if imported as module
         return {
-            "documents_count": len(text_chunks) if text_chunks else 0,
+            "documents_count": chunk_count,
             "faiss_db": faiss_db,
             "query_engine": query_obj,
         }
@@ -25,5 +25,9 @@ setuptools.setup(
         "Bug Tracker": f"https://github.com/{AUTHOR_USER_NAME}/{REPO_NAME}/issues",
     },
     package_dir={"": "src"},
-    packages=setuptools.find_packages(where="src")
+    packages=setuptools.find_packages(where="src"),
+    extras_require={
+        # embeddings.backend: onnx
+        "onnx": ["onnxruntime", "optimum[onnxruntime]"],
+    }
 )
@@ -0,0 +1,252 @@
+import hashlib
+from array import array
+from bisect import bisect_right
+
+from langchain_core.documents import Document
+
+
+PAGE_SEPARATOR = "\n"
+# Chunks materialised at a time by `iter_texts_and_metadatas`
+SLICE_SIZE = 8192
+
+
+def stitch_pages(pages):
+    """
+    Joins a PDF's (text, metadata) pages into one text stream.
+
+    Returns (text, metadata): metadata holds the keys every page agrees on
+    plus `page_offsets` (sorted start offset of each page in the text) and
+    `page_numbers` (the page label at each offset), which `page_range` uses
+    to map a chunk back to the pages it spans.
+    """
+    texts, offsets, numbers = [], [], []
+    position = 0
+    for text, metadata in pages:
+        texts.append(text)
+        offsets.append(position)
+        numbers.append(metadata.get("page", len(numbers)))
+        position += len(text) + len(PAGE_SEPARATOR)
+
+    common = dict(pages[0][1]) if pages else {}
+    for _, metadata in pages[1:]:
+        for key in [k for k in common if metadata.get(k) != common[k]]:
+            del common[key]
+    common.pop("page", None)
+    common["page_offsets"] = offsets
+    common["page_numbers"] = numbers
+    return PAGE_SEPARATOR.join(texts), common
+
+
+def page_range(metadata, start, end):
+    """
+    Chunk metadata for text[start:end] of a document: for stitched documents
+    `page_offsets` / `page_numbers` are replaced by the chunk's first `page`
+    and last `page_end`, found by binary search. Other metadata is returned
+    unchanged.
+    """
+    offsets = metadata.get("page_offsets")
+    if offsets is None:
+        return metadata
+    numbers = metadata["page_numbers"]
+    chunk_metadata = {k: v for k, v in metadata.items() if k not in ("page_offsets", "page_numbers")}
+    chunk_metadata["page"] = numbers[max(bisect_right(offsets, start) - 1, 0)]
+    chunk_metadata["page_end"] = numbers[max(bisect_right(offsets, max(end - 1, start)) - 1, 0)]
+    return chunk_metadata
+
+
+class ChunkRef:
+    """Lightweight (doc_id, start, end) view of one chunk."""
+
+    __slots__ = ("doc_id", "start", "end")
+
+    def __init__(self, doc_id, start, end):
+        self.doc_id = doc_id
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"ChunkRef(doc_id={self.doc_id}, start={self.start}, end={self.end})"
+
+
+class ChunkStore:
+    """
+    Compact, offset-based representation of chunked documents.
+
+    Each source document's text is held once; chunks are stored as
+    (doc_id, start, end) in parallel `array`s, with optional per-chunk
+    metadata (e.g. section labels) interned so identical dicts are shared.
+    Chunk text and LangChain `Document`s are only materialised on demand,
+    so overlapping chunks never duplicate the underlying text.
+
+    Behaves like a read-only sequence of `Document`s (`len`, indexing,
+    iteration) for code that still expects a list of chunks.
+    """
+
+    def __init__(self, add_start_index=True):
+        self.add_start_index = add_start_index
+        self.texts = []
+        self.doc_metadata = []
+        self.doc_ids = array("I")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.extra_ids = array("i")
+        self.extras = []
+        self._extra_index = {}
+
+    # --------------------------------------------------------------------
+    # BUILDING
+    # --------------------------------------------------------------------
+    def add_document(self, text, metadata):
+        self.texts.append(text)
+        self.doc_metadata.append(metadata)
+        return len(self.texts) - 1
+
+    def _intern(self, extra):
+        if not extra:
+            return -1
+        try:
+            key = tuple(sorted(extra.items(), key=lambda kv: kv[0]))
+            extra_id = self._extra_index.get(key)
+        except TypeError:
+            # Unhashable values can't be interned; store this one on its own
+            key, extra_id = None, None
+        if extra_id is None:
+            extra_id = len(self.extras)
+            self.extras.append(dict(extra))
+            if key is not None:
+                self._extra_index[key] = extra_id
+        return extra_id
+
+    def add_chunk(self, doc_id, start, end, extra=None):
+        self.doc_ids.append(doc_id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.extra_ids.append(self._intern(extra))
+
+    def extend(self, other):
+        """Appends every document and chunk of another store."""
+        offset = len(self.texts)
+        for text, metadata in zip(other.texts, other.doc_metadata):
+            self.add_document(text, metadata)
+        for i in range(len(other)):
+            extra_id = other.extra_ids[i]
+            self.add_chunk(other.doc_ids[i] + offset, other.starts[i], other.ends[i],
+                           other.extras[extra_id] if extra_id >= 0 else None)
+
+    @classmethod
+    def concat(cls, stores):
+        stores = list(stores)
+        merged = cls(add_start_index=stores[0].add_start_index if stores else True)
+        for store in stores:
+            merged.extend(store)
+        return merged
+
+    def select(self, indices, extra_updates=None):
+        """
+        Returns a store holding only the chunks at `indices` (in that order),
+        sharing this store's document text. `extra_updates` maps a position in
+        the result to metadata merged into that chunk.
+        """
+        subset = ChunkStore(add_start_index=self.add_start_index)
+        subset.texts = list(self.texts)
+        subset.doc_metadata = list(self.doc_metadata)
+        extra_updates = extra_updates or {}
+
+        for position, i in enumerate(indices):
+            extra_id = self.extra_ids[i]
+            extra = self.extras[extra_id] if extra_id >= 0 else None
+            if position in extra_updates:
+                extra = {**(extra or {}), **extra_updates[position]}
+            subset.add_chunk(self.doc_ids[i], self.starts[i], self.ends[i], extra)
+
+        return subset
+
+    # --------------------------------------------------------------------
+    # ACCESS
+    # --------------------------------------------------------------------
+    def __len__(self):
+        return len(self.starts)
+
+    def ref(self, i):
+        return ChunkRef(self.doc_ids[i], self.starts[i], self.ends[i])
+
+    def text(self, i):
+        return self.texts[self.doc_ids[i]][self.starts[i]:self.ends[i]]
+
+    def iter_texts(self):
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def metadata(self, i):
+        metadata = dict(page_range(self.doc_metadata[self.doc_ids[i]], self.starts[i], self.ends[i]))
+        extra_id = self.extra_ids[i]
+        if extra_id >= 0:
+            metadata.update(self.extras[extra_id])
+        if self.add_start_index:
+            metadata["start_index"] = self.starts[i]
+        return metadata
+
+    def document(self, i):
+        return Document(page_content=self.text(i), metadata=self.metadata(i))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.document(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        return self.document(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.document(i)
+
+    def nbytes(self):
+        """Approximate size of the chunk index itself (excluding document text)."""
+        return sum(a.itemsize * len(a) for a in (self.doc_ids, self.starts, self.ends, self.extra_ids))
+
+
+def chunk_id(text, metadata):
+    """
+    Stable docstore id of a chunk: "<content_hash>:<page>:<start>:<end>".
+
+    It only changes when the source PDF's bytes (or the chunking) change, so
+    an index can be updated per document: every id starts with the content
+    hash it came from. Chunks without a content hash / start offset fall
+    back to a hash of their source and text.
+    """
+    content_hash = metadata.get("content_hash")
+    start = metadata.get("start_index")
+    if content_hash is None or start is None:
+        digest = hashlib.blake2b(f"{metadata.get('source', '')}\0{text}".encode("utf-8"), digest_size=16)
+        return f"text-{digest.hexdigest()}"
+    return f"{content_hash}:{metadata.get('page', '')}:{start}:{start + len(text)}"
+
+
+def chunk_content_hash(doc_id):
+    """The content hash a `chunk_id` was derived from ('text-…' for fallback ids)."""
+    return doc_id.partition(":")[0]
+
+
+def texts_and_metadatas(chunks, start=0, stop=None):
+    """
+    Returns parallel lists of the texts and metadata dicts of chunks[start:stop]
+    from either a ChunkStore or a list of Documents, without building
+    Documents for a store.
+    """
+    stop = len(chunks) if stop is None else min(stop, len(chunks))
+    if isinstance(chunks, ChunkStore):
+        return [chunks.text(i) for i in range(start, stop)], [chunks.metadata(i) for i in range(start, stop)]
+    return [doc.page_content for doc in chunks[start:stop]], [doc.metadata for doc in chunks[start:stop]]
+
+
+def iter_texts_and_metadatas(chunks, slice_size=None):
+    """
+    Yields (texts, metadatas) for consecutive slices of at most `slice_size`
+    (default SLICE_SIZE) chunks, so callers embedding a whole corpus hold one
+    slice of chunk text and metadata at a time.
+    """
+    slice_size = slice_size or SLICE_SIZE
+    for start in range(0, len(chunks), slice_size):
+        yield texts_and_metadatas(chunks, start, start + slice_size)
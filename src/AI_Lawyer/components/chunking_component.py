@@ -1,54 +1,584 @@
+import time
+import multiprocessing
+from collections import deque
 from pathlib import Path
+import pdfplumber
+from langchain_core.documents import Document
 from AI_Lawyer.entity.config_entity import ChunkingConfig
 from AI_Lawyer.entity.config_entity import DataConfig
+from AI_Lawyer.components.document_registry import DocumentRegistry
+from AI_Lawyer.components.text_cache import ExtractedTextCache
+from AI_Lawyer.components.legal_chunker import LegalChunker
+from AI_Lawyer.components.chunk_store import ChunkStore, stitch_pages
+from AI_Lawyer.components.token_length import TokenCounter
 from AI_Lawyer.utils.logging_setup import logger
-from langchain_community.document_loaders import PDFPlumberLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
 
+# Optional fast text-layer backends
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except Exception:
+    pdfium = None
+
+try:
+    from pypdf import PdfReader
+except Exception:
+    PdfReader = None
+
+
+# ===========================================================
+# PDF Text Extractors
+# ===========================================================
+
+class PDFExtractor:
+    """
+    Turns a page range of one PDF into (text, metadata) pairs.
+
+    `name` and `version` form the parser version recorded in the document
+    registry and the text-cache key; bump `version` whenever a backend's
+    output changes so every PDF is re-extracted.
+    """
+
+    name = "base"
+    version = "1"
+
+    @property
+    def parser_version(self):
+        return f"{self.name}-{self.version}"
+
+    def page_count(self, pdf_path):
+        raise NotImplementedError
+
+    def extract(self, pdf_path, start=0, stop=None):
+        raise NotImplementedError
+
+    @staticmethod
+    def _page_metadata(pdf_path, page_index, total_pages, info, extractor):
+        # Mirrors the per-page metadata of langchain's PDFPlumberLoader
+        return {
+            "source": pdf_path,
+            "file_path": pdf_path,
+            "page": page_index,
+            "total_pages": total_pages,
+            **info,
+            "extractor": extractor,
+        }
+
+
+class PdfPlumberExtractor(PDFExtractor):
+    """Full layout analysis via pdfplumber; slow but robust on tables."""
+
+    name = "pdfplumber"
+
+    def page_count(self, pdf_path):
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def extract(self, pdf_path, start=0, stop=None):
+        pages = []
+        with pdfplumber.open(pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+            info = {k: v for k, v in pdf.metadata.items() if type(v) in (str, int)}
+
+            for page in pdf.pages[start:stop]:
+                metadata = self._page_metadata(pdf_path, page.page_number - 1, total_pages, info, self.name)
+                pages.append((page.extract_text() or "", metadata))
+                page.close()  # drop cached layout objects as we go
+
+        return pages
+
+    def extract_page(self, pdf, page_index):
+        """Extracts one page from an already opened pdfplumber document."""
+        page = pdf.pages[page_index]
+        text = page.extract_text() or ""
+        page.close()
+        return text
+
+
+def looks_broken(text):
+    """
+    Heuristic for text-layer output that needs a layout-aware pass:
+    replacement/control characters from bad font maps, or letter-spaced
+    words ("S e c t i o n") that come out as runs of single characters.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return False
+
+    bad = sum(1 for ch in stripped if ch == "\ufffd" or (ord(ch) < 32 and ch not in "\n\t"))
+    if bad / len(stripped) > 0.02:
+        return True
+
+    words = stripped.split()
+    if len(words) >= 20:
+        singles = sum(1 for w in words if len(w) == 1)
+        if singles / len(words) > 0.5:
+            return True
+
+    return False
+
+
+class TextLayerExtractor(PDFExtractor):
+    """
+    Base for fast backends that read the PDF text layer directly. Pages the
+    heuristic flags as tabular or broken, and pages that come out empty
+    (no text layer the backend can read), are re-extracted with pdfplumber,
+    which is opened lazily and only for ranges that need it.
+    """
+
+    def _extract_fast(self, pdf_path, start, stop):
+        """Returns (total_pages, info, [(page_index, text, needs_fallback), ...])."""
+        raise NotImplementedError
+
+    def extract(self, pdf_path, start=0, stop=None):
+        total_pages, info, raw_pages = self._extract_fast(pdf_path, start, stop)
+        fallback = PdfPlumberExtractor()
+        plumber = None
+        pages = []
+
+        try:
+            for page_index, text, needs_fallback in raw_pages:
+                extractor = self.name
+                if needs_fallback or not text.strip() or looks_broken(text):
+                    if plumber is None:
+                        plumber = pdfplumber.open(pdf_path)
+                    text = fallback.extract_page(plumber, page_index)
+                    extractor = fallback.name
+                metadata = self._page_metadata(pdf_path, page_index, total_pages, info, extractor)
+                pages.append((text, metadata))
+        finally:
+            if plumber is not None:
+                plumber.close()
+
+        return pages
+
+
+class PdfiumExtractor(TextLayerExtractor):
+    """pypdfium2 text layer; pages with many ruling paths (tables) fall back."""
+
+    name = "pypdfium2"
+    # Vector path objects on a page beyond which we assume ruled tables
+    table_path_threshold = 40
+
+    def __init__(self):
+        if pdfium is None:
+            raise ImportError("pypdfium2 is not installed. Install it with `pip install pypdfium2`")
+
+    def page_count(self, pdf_path):
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def _extract_fast(self, pdf_path, start, stop):
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            total_pages = len(pdf)
+            info = {k: v for k, v in pdf.get_metadata_dict().items() if v}
+            raw_pages = []
+
+            for page_index in range(start, total_pages if stop is None else min(stop, total_pages)):
+                page = pdf[page_index]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+                paths = 0
+                for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,), max_depth=1):
+                    paths += 1
+                    if paths > self.table_path_threshold:
+                        break
+                textpage.close()
+                page.close()
+                raw_pages.append((page_index, text, paths > self.table_path_threshold))
+
+            return total_pages, info, raw_pages
+        finally:
+            pdf.close()
+
+
+class PypdfExtractor(TextLayerExtractor):
+    """Pure-Python pypdf text layer; only the broken-text heuristic triggers fallback."""
+
+    name = "pypdf"
+
+    def __init__(self):
+        if PdfReader is None:
+            raise ImportError("pypdf is not installed. Install it with `pip install pypdf`")
+
+    def page_count(self, pdf_path):
+        return len(PdfReader(pdf_path).pages)
+
+    def _extract_fast(self, pdf_path, start, stop):
+        reader = PdfReader(pdf_path)
+        total_pages = len(reader.pages)
+        info = {k.lstrip("/"): v for k, v in (reader.metadata or {}).items() if isinstance(v, str) and v}
+        raw_pages = [
+            (page_index, reader.pages[page_index].extract_text() or "", False)
+            for page_index in range(start, total_pages if stop is None else min(stop, total_pages))
+        ]
+        return total_pages, info, raw_pages
+
+
+EXTRACTORS = {
+    PdfPlumberExtractor.name: PdfPlumberExtractor,
+    PdfiumExtractor.name: PdfiumExtractor,
+    PypdfExtractor.name: PypdfExtractor,
+}
+
+
+def get_extractor(name):
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown PDF extractor '{name}'. Choose one of: {', '.join(EXTRACTORS)}")
+
+
+def _parse_page_range(pdf_path, start=0, stop=None, extractor="pdfplumber"):
+    """
+    Extracts pages [start, stop) of one PDF as (text, metadata) pairs.
+    Module-level so it can run inside a worker process.
+    """
+    return get_extractor(extractor).extract(pdf_path, start, stop)
+
+
 class Data_Loader:
     def __init__(self, config: DataConfig):
         self.config = config
         self.pdf_dir = Path(self.config.pdf_directory)
+        registry_path = self.config.registry_path or self.pdf_dir.parent / "document_registry.json"
+        self.extractor = get_extractor(self.config.extractor)
+        self.registry = DocumentRegistry(self.pdf_dir, registry_path, self.extractor.parser_version)
+        self.text_cache = None
+        if self.config.text_cache_dir:
+            self.text_cache = ExtractedTextCache(
+                self.config.text_cache_dir,
+                self.extractor.parser_version,
+                max_bytes=self.config.text_cache_max_mb * 1024 * 1024
+            )
+        self.delta = None
 
-    def load_pdfs(self):
-        documents = []
+    def _to_documents(self, pages, content_hash):
+        """
+        Page Documents, or with `stitch_pages` a single Document for the whole
+        PDF whose `page_offsets` let chunkers split across page boundaries
+        and still report the pages each chunk came from.
+        """
+        if self.config.stitch_pages:
+            if not pages:
+                return []
+            text, metadata = stitch_pages(pages)
+            metadata["content_hash"] = content_hash
+            return [Document(page_content=text, metadata=metadata)]
+
+        docs = []
+        for text, metadata in pages:
+            metadata["content_hash"] = content_hash
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
+
+    def parse_pdf(self, pdf_file, content_hash):
+        return self._to_documents(self.extractor.extract(str(pdf_file)), content_hash)
+
+    def _load_or_parse(self, targets):
+        """
+        Yields (pdf_file, pages) for every target in order, serving pages from
+        the extracted-text cache when possible and parsing only the misses.
+        `pages` is None for a file that failed to parse.
+        """
+        hits = set()
+        if self.text_cache is not None:
+            hits = {f for f in targets if self.text_cache.has(self.delta.hashes[str(f)])}
+            logger.info(f"Text cache: {len(hits)} hits, {len(targets) - len(hits)} misses")
+
+        misses = [f for f in targets if f not in hits]
+        if self.config.parse_workers > 1 and len(misses) > 0:
+            parsed = self._parse_parallel(misses)
+        else:
+            parsed = self._parse_serial(misses)
+
+        try:
+            for pdf_file in targets:
+                content_hash = self.delta.hashes[str(pdf_file)]
+                if pdf_file in hits:
+                    pages = self.text_cache.get(content_hash, str(pdf_file))
+                    if pages is not None:
+                        yield pdf_file, pages
+                        continue
+                    # Entry vanished or was corrupt: parse it here instead
+                    try:
+                        pages = self.extractor.extract(str(pdf_file))
+                    except Exception as e:
+                        logger.error(f"Error loading file: {pdf_file} | Error: {e}")
+                        pages = None
+                else:
+                    _, pages = next(parsed)
+
+                if pages is not None and self.text_cache is not None:
+                    self.text_cache.put(content_hash, pages)
+                yield pdf_file, pages
+
+            if self.text_cache is not None:
+                self.text_cache.evict()
+        finally:
+            # Terminates the parse pool when the consumer stops early
+            parsed.close()
 
-        # Iterate through all PDF files in directory
-        for pdf_file in self.pdf_dir.glob("*.pdf"):
+    def _page_count(self, pdf_file, content_hash):
+        entry = self.registry.entries.get(str(pdf_file), {})
+        if entry.get("sha256") == content_hash and entry.get("pages"):
+            return entry["pages"]
+        return self.extractor.page_count(str(pdf_file))
+
+    def _parse_serial(self, targets):
+        """Parses files one after another in this process, yielding (pdf_file, pages)."""
+        for pdf_file in targets:
             try:
-                loader = PDFPlumberLoader(str(pdf_file))
-                docs = loader.load()
-                documents.extend(docs)
+                yield pdf_file, self.extractor.extract(str(pdf_file))
+            except Exception as e:
+                logger.error(f"Error loading file: {pdf_file} | Error: {e}")
+                yield pdf_file, None
 
-                logger.info(f"Successfully loaded: {pdf_file}")
+    def _parse_parallel(self, targets):
+        """
+        Spreads page ranges of every file over a process pool, yielding
+        (pdf_file, pages) in `targets` order as soon as each file is complete.
 
+        Files longer than `pages_per_task` are split so a single large act
+        doesn't become the tail of the run, and ranges are submitted largest
+        first, no more at a time than there are workers. Each file has
+        `parse_timeout` seconds from the submission of its first range; a
+        file over budget is abandoned, the pool is restarted to reclaim the
+        stuck workers and the interrupted ranges of other files are
+        resubmitted with a fresh budget. A file whose ranges fail or time out
+        is yielded with pages=None (and stays dirty in the registry) without
+        affecting the others.
+        """
+        by_file = {}
+        for pdf_file in targets:
+            content_hash = self.delta.hashes[str(pdf_file)]
+            try:
+                page_count = self._page_count(pdf_file, content_hash)
             except Exception as e:
                 logger.error(f"Error loading file: {pdf_file} | Error: {e}")
+                continue
+            step = max(1, self.config.pages_per_task)
+            by_file[pdf_file] = [
+                (pdf_file, start, min(start + step, page_count)) for start in range(0, max(page_count, 1), step)
+            ]
+
+        queue = deque(sorted((task for ranges in by_file.values() for task in ranges),
+                             key=lambda t: t[2] - t[1], reverse=True))
+        workers = self.config.parse_workers
+        running = {}   # task -> AsyncResult
+        done = {}      # task -> pages
+        started = {}   # pdf_file -> when its first range was submitted
+        failed = {}    # pdf_file -> exception
+
+        pool = multiprocessing.Pool(processes=workers)
+        try:
+            for pdf_file in targets:
+                if pdf_file not in by_file:
+                    yield pdf_file, None
+                    continue
+
+                while pdf_file not in failed and not all(task in done for task in by_file[pdf_file]):
+                    while queue and len(running) < workers:
+                        task = queue.popleft()
+                        if task[0] in failed:
+                            continue
+                        running[task] = pool.apply_async(_parse_page_range,
+                                                         (str(task[0]), task[1], task[2], self.extractor.name))
+                        started.setdefault(task[0], time.monotonic())
+
+                    for task, result in list(running.items()):
+                        if result.ready():
+                            del running[task]
+                            try:
+                                done[task] = result.get()
+                            except Exception as e:
+                                failed.setdefault(task[0], e)
 
+                    now = time.monotonic()
+                    overdue = {task[0] for task in running if now - started[task[0]] > self.config.parse_timeout}
+                    if overdue:
+                        for stuck in overdue:
+                            failed[stuck] = multiprocessing.TimeoutError(
+                                f"no result within {self.config.parse_timeout}s"
+                            )
+                        # A worker stuck on a range can't be reclaimed on its own
+                        pool.terminate()
+                        pool.join()
+                        pool = multiprocessing.Pool(processes=workers)
+                        queue.extendleft(reversed([task for task in running if task[0] not in failed]))
+                        running.clear()
+                        # Time spent waiting behind the stuck file doesn't count against the others
+                        started.clear()
+                    elif running:
+                        next(iter(running.values())).wait(0.5)
+
+                tasks = by_file.pop(pdf_file)
+                pages = [page for task in tasks for page in done.pop(task, [])]
+                error = failed.get(pdf_file)
+                if isinstance(error, multiprocessing.TimeoutError):
+                    logger.error(f"Timed out parsing {pdf_file}: {error}")
+                    pages = None
+                elif error is not None:
+                    logger.error(f"Error loading file: {pdf_file} | Error: {error}")
+                    pages = None
+
+                yield pdf_file, pages
+        finally:
+            # terminate() also reaps any worker still stuck on a timed-out task
+            pool.terminate()
+            pool.join()
+
+    def scan(self):
+        """Scans `pdf_directory` against the registry and returns the delta (also kept as `self.delta`)."""
+        self.delta = self.registry.scan()
+        return self.delta
+
+    def iter_documents(self, only_changed=False, delta=None):
+        """
+        Streams parsed PDFs as one list of page Documents per file, in the
+        same order as `load_pdfs`. The parsed files are recorded in the
+        registry but not saved: call `commit()` once the index built from
+        them has been saved, so a failed run is redone next time.
+
+        The registry scan is exposed as `self.delta` (see DocumentDelta). With
+        `only_changed=True` only its dirty files are parsed, so downstream
+        stages can work on the delta instead of the full corpus. Pass the
+        result of `scan()` as `delta` to act on it before parsing starts.
+        Duplicate files are never parsed: the index keeps one copy of them.
+        """
+        self.delta = delta if delta is not None else self.registry.scan()
+        targets = sorted(self.delta.dirty if only_changed else self.delta.dirty + self.delta.unchanged)
+        if not only_changed:
+            # Copies recorded as duplicates earlier are "unchanged" too; parse their content once
+            first = {}
+            for pdf_file in targets:
+                first.setdefault(self.delta.hashes[str(pdf_file)], pdf_file)
+            targets = sorted(first.values())
+
+        for pdf_file, pages in self._load_or_parse(targets):
+            if pages is None:
+                continue
+            content_hash = self.delta.hashes[str(pdf_file)]
+            self.registry.record_parsed(pdf_file, len(pages))
+            logger.info(f"Successfully loaded: {pdf_file}")
+            yield self._to_documents(pages, content_hash)
+
+    def commit(self):
+        """Saves the last scan (and the files parsed since) to the registry."""
+        self.registry.commit(self.delta)
+
+    def load_files(self, pdf_files):
+        """
+        Parses only `pdf_files` (e.g. the PDFs of one index shard) into page
+        Documents. The registry is scanned for content hashes but not
+        updated, so a later incremental run still sees its usual delta.
+        """
+        self.delta = self.registry.scan()
+        targets = sorted(Path(f) for f in pdf_files if str(f) in self.delta.hashes)
+        documents = []
+        for pdf_file, pages in self._load_or_parse(targets):
+            if pages is None:
+                continue
+            logger.info(f"Successfully loaded: {pdf_file}")
+            documents.extend(self._to_documents(pages, self.delta.hashes[str(pdf_file)]))
+        return documents
+
+    def load_pdfs(self, only_changed=False):
+        """
+        Parses the PDFs in `pdf_directory` into a single list of page
+        Documents. See `iter_documents` for the delta / `only_changed`
+        behaviour; with `parse_workers > 1` parsing runs on a process pool and
+        output order is the same as the serial path.
+        """
+        documents = []
+        for docs in self.iter_documents(only_changed=only_changed):
+            documents.extend(docs)
         return documents
 
-    def main(self):
-        return self.load_pdfs()
+    def main(self, only_changed=False):
+        return self.load_pdfs(only_changed=only_changed)
     
 
 class Chunking_text:
     def __init__(self, config: ChunkingConfig):
         self.config = config
+        self.token_counter = None
 
+        if config.length_unit == "tokens":
+            # chunk_size / chunk_overlap are counted in the embedding model's tokens
+            self.token_counter = TokenCounter(config.tokenizer, offline=config.tokenizer_offline)
+            if config.chunk_size > self.token_counter.max_tokens:
+                message = (f"chunk_size={config.chunk_size} tokens exceeds what {config.tokenizer} "
+                           f"reads ({self.token_counter.max_tokens} tokens); the rest of each chunk "
+                           f"would be truncated at embedding time")
+                if config.strict_window:
+                    logger.error(message)
+                    raise ValueError(message)
+                logger.warning(message)
+        elif config.length_unit != "chars":
+            raise ValueError(f"Unknown chunking length_unit: {config.length_unit!r}")
 
-    def create_chunks(self,documents):
+    def _recursive_spans(self, splitter, text):
+        """(start, end) of each RecursiveCharacterTextSplitter chunk within `text`."""
+        spans = []
+        index, previous_len = 0, 0
+        for chunk in splitter.split_text(text):
+            # Same offset search as langchain's add_start_index
+            offset = index + previous_len - self.config.chunk_overlap
+            index = text.find(chunk, max(0, offset))
+            previous_len = len(chunk)
+            spans.append((index, index + len(chunk), None))
+        return spans
 
+    def create_chunks(self,documents):
+        """
+        Splits page Documents into a ChunkStore: each page's text is kept once
+        and chunks are (doc_id, start, end) offsets into it. The store can be
+        used like a list of chunk Documents, which are built on demand.
+        In token mode every page is tokenized once, in batches, up front.
+        """
         try:
-            tex_spillter = RecursiveCharacterTextSplitter(
-            chunk_size = self.config.chunk_size,
-            chunk_overlap = self.config.chunk_overlap,
-            add_start_index = self.config.add_start_index)
+            store = ChunkStore(add_start_index=self.config.add_start_index)
+            documents = list(documents)
+
+            if self.token_counter is not None:
+                measured = self.token_counter.measure([document.page_content for document in documents])
+            else:
+                measured = [None] * len(documents)
+
+            if self.config.strategy == "legal":
+                legal_chunker = LegalChunker(chunk_size=self.config.chunk_size,
+                                             chunk_overlap=self.config.chunk_overlap)
+                states = {}
+            else:
+                tex_spillter = RecursiveCharacterTextSplitter(
+                chunk_size = self.config.chunk_size,
+                chunk_overlap = self.config.chunk_overlap)
+
+            for document, tokens in zip(documents, measured):
+                text = document.page_content
+                doc_id = store.add_document(text, document.metadata)
+
+                if self.config.strategy == "legal":
+                    state = states.setdefault(document.metadata.get("source"), legal_chunker.new_state())
+                    spans = legal_chunker.split_spans(text, document.metadata, state, tokens=tokens)
+                elif tokens is not None:
+                    spans = [(start, end, None) for start, end in
+                             tokens.windows(0, len(text), self.config.chunk_size, self.config.chunk_overlap)]
+                else:
+                    spans = self._recursive_spans(tex_spillter, text)
 
-            text_chunks = tex_spillter.split_documents(documents)
+                for start, end, labels in spans:
+                    store.add_chunk(doc_id, start, end, labels)
 
-            return text_chunks
+            return store
         
         except Exception as e:
             logger.error(f"Error while chunking documents: {e}")
@@ -59,9 +589,3 @@ class Chunking_text:
       Main method for pipeline compatibility.
      """
      return self.create_chunks(documents)
-    
-
-        
-
-
-        
@@ -1,40 +1,287 @@
+import os
+import json
+import hashlib
 import requests
 from pathlib import Path
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 from AI_Lawyer.entity.config_entity import DataConfig
 from AI_Lawyer.utils.logging_setup import logger
 
+
+PDF_MAGIC = b"%PDF-"
+# The PDF spec allows a little junk before the header, so sniff this many bytes
+MAGIC_SNIFF_BYTES = 1024
+
+
+class NotAPDFError(ValueError):
+    """Raised when a source URL serves something other than a PDF (e.g. an HTML viewer page)."""
+
+
+class IncompleteDownloadError(IOError):
+    """Raised when a body ends before its advertised length; the `.part` file is kept for a resume."""
+
+
 class DataIngestion:
-    def __init__(self, config: DataConfig):
+    def __init__(self, config: DataConfig, session: requests.Session = None):
+        """
+        config  : DataConfig instance
+        session : Optional requests.Session (e.g. one pointed at a local test server).
+                  A pooled session sized to `max_workers` is created when omitted.
+        """
         self.config = config
         self.pdf_dir = Path(self.config.pdf_directory)
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
+        self.session = session or self._build_session()
+
+    def _build_session(self):
+        """Create a session whose connection pool can serve every worker at once."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config.max_workers,
+            pool_maxsize=self.config.max_workers
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @staticmethod
+    def file_name_for(url):
+        file_name = url.split("/")[-1]
+        if "?" in file_name:
+            file_name = file_name.split("?")[0]  # Clean filename if there are query params
+        return file_name
+
+    # --------------------------------------------------------------------
+    # SIDECAR MANIFEST
+    # --------------------------------------------------------------------
+    @staticmethod
+    def manifest_path_for(save_path):
+        return save_path.with_name(save_path.name + ".manifest.json")
+
+    @staticmethod
+    def part_path_for(save_path):
+        return save_path.with_name(save_path.name + ".part")
+
+    def load_manifest(self, save_path):
+        manifest_path = self.manifest_path_for(save_path)
+        if not manifest_path.exists():
+            return {}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return {}
+
+    def save_manifest(self, save_path, manifest):
+        manifest_path = self.manifest_path_for(save_path)
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, manifest_path)
+
+    def discard_pending(self, save_path):
+        """Drops a rejected refresh from the manifest, keeping the committed entry."""
+        manifest = self.load_manifest(save_path)
+        if manifest.pop("pending", None) is not None:
+            self.save_manifest(save_path, manifest)
+
+    @staticmethod
+    def _file_sha256(path, hasher=None):
+        hasher = hasher or hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                hasher.update(block)
+        return hasher
+
+    # --------------------------------------------------------------------
+    # REQUEST HEADERS
+    # --------------------------------------------------------------------
+    def _conditional_headers(self, save_path, manifest):
+        """If-None-Match / If-Modified-Since for a file we already hold in full."""
+        headers = {}
+        if manifest.get("complete"):
+            if manifest.get("etag"):
+                headers["If-None-Match"] = manifest["etag"]
+            if manifest.get("last_modified"):
+                headers["If-Modified-Since"] = manifest["last_modified"]
+        if not headers:
+            # Legacy file downloaded before manifests existed: fall back to its mtime
+            headers["If-Modified-Since"] = formatdate(save_path.stat().st_mtime, usegmt=True)
+        return headers
+
+    @staticmethod
+    def _pending(manifest):
+        """Validators of the download in progress (older manifests kept them at the top level)."""
+        return manifest.get("pending") or ({} if manifest.get("complete") else manifest)
+
+    def _resume_headers(self, part_path, manifest):
+        """Range / If-Range for an interrupted download, if the server gave us a validator."""
+        pending = self._pending(manifest)
+        validator = pending.get("etag") or pending.get("last_modified")
+        if not validator or not part_path.exists():
+            return {}
+        offset = part_path.stat().st_size
+        if offset == 0:
+            return {}
+        return {"Range": f"bytes={offset}-", "If-Range": validator}
+
+    # --------------------------------------------------------------------
+    # CONTENT SNIFFING
+    # --------------------------------------------------------------------
+    @staticmethod
+    def _check_content_type(url, response):
+        content_type = response.headers.get("Content-Type", "").lower()
+        if "html" in content_type or content_type.startswith("text/"):
+            raise NotAPDFError(f"{url} served '{content_type}', not a PDF")
+
+    @staticmethod
+    def _check_magic(url, head):
+        if PDF_MAGIC not in head[:MAGIC_SNIFF_BYTES]:
+            raise NotAPDFError(f"{url} does not start with a PDF header (got {head[:16]!r})")
+
+    # --------------------------------------------------------------------
+    # DOWNLOAD
+    # --------------------------------------------------------------------
+    def download_file(self, url):
+        """
+        Brings a single URL up to date in `pdf_directory`.
+
+        - A file with a complete manifest is revalidated with a conditional
+          request; a 304 costs one header-only round trip.
+        - An interrupted `.part` download is resumed with a Range request.
+        - Bodies are streamed to the `.part` file, sniffed for a PDF header and
+          only renamed into place once the full length has been received.
+        """
+        save_path = self.pdf_dir / self.file_name_for(url)
+        part_path = self.part_path_for(save_path)
+        manifest = self.load_manifest(save_path)
+
+        if manifest.get("url") not in (None, url):
+            manifest = {}
+
+        headers = {}
+        if save_path.exists():
+            headers.update(self._conditional_headers(save_path, manifest))
+        else:
+            headers.update(self._resume_headers(part_path, manifest))
+
+        timeout = (self.config.connect_timeout, self.config.read_timeout)
+
+        with self.session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304:
+                logger.info(f"Not modified. Skipping: {save_path}")
+                return save_path
+
+            if response.status_code == 416:
+                # Our partial is no longer a valid prefix; start over next time
+                part_path.unlink(missing_ok=True)
+            response.raise_for_status()  # Raises HTTPError for bad responses
+            self._check_content_type(url, response)
+
+            resuming = response.status_code == 206 and "Range" in headers
+            hasher = hashlib.sha256()
+
+            if resuming:
+                offset = part_path.stat().st_size
+                with open(part_path, "rb") as f:
+                    self._check_magic(url, f.read(MAGIC_SNIFF_BYTES))
+                self._file_sha256(part_path, hasher)
+                total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                expected = int(total) if total.isdigit() else None
+                logger.info(f"Resuming {url} at byte {offset}")
+            else:
+                offset = 0
+                length = response.headers.get("Content-Length")
+                expected = int(length) if length and length.isdigit() else None
+
+            if response.headers.get("Content-Encoding", "identity") != "identity":
+                # iter_content yields decoded bytes, so the wire length can't be checked
+                expected = None
+
+            # The committed entry (and its sha256 / validators) stays in place
+            # until the new body has replaced the file; the download in
+            # progress is recorded under "pending" for a later resume.
+            previous = self._pending(manifest) if resuming else {}
+            pending = {
+                "etag": response.headers.get("ETag") or previous.get("etag"),
+                "last_modified": response.headers.get("Last-Modified") or previous.get("last_modified"),
+                "content_type": response.headers.get("Content-Type"),
+                "content_length": expected,
+            }
+            committed = {k: v for k, v in manifest.items() if k != "pending"} if manifest.get("complete") else {}
+            self.save_manifest(save_path, {**committed, "url": url, "pending": pending})
+
+            received = offset
+            sniffed = resuming
+            head = b""
+
+            with open(part_path, "ab" if resuming else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.config.download_chunk_size):
+                    if not chunk:
+                        continue
+                    if not sniffed:
+                        head += chunk
+                        if len(head) >= MAGIC_SNIFF_BYTES:
+                            self._check_magic(url, head)
+                            sniffed = True
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    received += len(chunk)
+
+            if not sniffed:
+                self._check_magic(url, head)
+
+        if expected is not None and received != expected:
+            # Leave the partial and its validators behind so the next run can resume
+            raise IncompleteDownloadError(f"Incomplete download for {url}: {received} of {expected} bytes")
+
+        os.replace(part_path, save_path)
+
+        manifest = {
+            "url": url, **pending,
+            "content_length": received, "sha256": hasher.hexdigest(), "complete": True,
+        }
+        self.save_manifest(save_path, manifest)
+
+        logger.info(f"Successfully downloaded: {url} -> {save_path}")
+        return save_path
 
     def download_pdfs(self):
-        for url in self.config.source_url:
-            try:
-                file_name = url.split("/")[-1]
-                if "?" in file_name:
-                    file_name = file_name.split("?")[0]  # Clean filename if there are query params
+        """
+        Downloads every configured URL concurrently.
 
-                save_path = self.pdf_dir / file_name
+        Returns:
+            dict: url -> saved Path (or None if the download failed)
+        """
+        results = {}
 
-                # Check if already downloaded
-                if save_path.exists():
-                    logger.info(f"Already downloaded. Skipping: {save_path}")
-                    continue
+        with ThreadPoolExecutor(max_workers=self.config.max_workers) as pool:
+            futures = {pool.submit(self.download_file, url): url for url in self.config.source_url}
 
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()  # Raises HTTPError for bad responses
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    results[url] = future.result()
 
-                with open(save_path, 'wb') as f:
-                    f.write(response.content)
+                except NotAPDFError as e:
+                    save_path = self.pdf_dir / self.file_name_for(url)
+                    self.part_path_for(save_path).unlink(missing_ok=True)
+                    if save_path.exists():
+                        self.discard_pending(save_path)
+                    else:
+                        self.manifest_path_for(save_path).unlink(missing_ok=True)
+                    logger.error(f"REJECTED {url}: {e}")
+                    results[url] = None
 
-                logger.info(f"Successfully downloaded: {url} -> {save_path}")
+                except (requests.exceptions.RequestException, OSError) as e:
+                    logger.error(f"FAILED to download {url}. Error: {e}")
+                    results[url] = None
 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"FAILED to download {url}. Error: {e}")
+        return results
 
     def main(self):
         self.download_pdfs()
-
@@ -0,0 +1,200 @@
+import re
+import json
+import zlib
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+from AI_Lawyer.entity.config_entity import DedupConfig
+from AI_Lawyer.components.chunk_store import ChunkStore
+from AI_Lawyer.utils.logging_setup import logger
+
+
+# Mersenne prime for the universal hash family; shingle hashes are 32-bit
+# so (a * x + b) stays inside int64
+_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class DedupReport:
+    total: int = 0
+    kept: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    embedding_dim: int = 0
+
+    @property
+    def removed(self):
+        return self.exact_duplicates + self.near_duplicates
+
+    @property
+    def index_bytes_saved(self):
+        # float32 vectors in a flat index
+        return self.removed * self.embedding_dim * 4
+
+    def summary(self):
+        share = 100.0 * self.removed / self.total if self.total else 0.0
+        return (f"chunks={self.total} kept={self.kept} removed={self.removed} ({share:.1f}%) "
+                f"[exact={self.exact_duplicates} near={self.near_duplicates}] "
+                f"embeddings saved={self.removed} index bytes saved~{self.index_bytes_saved / 1e6:.2f} MB")
+
+
+class NearDuplicateFilter:
+    """
+    Drops exact and near-duplicate chunks before they are embedded.
+
+    Chunks are normalised to lower-case word sequences, reduced to a MinHash
+    signature over word shingles and bucketed with banded LSH. A candidate
+    whose estimated Jaccard similarity to an earlier kept chunk reaches
+    `threshold` is removed; the kept (canonical) chunk lists the removed
+    chunk's location in its `duplicate_sources` metadata, and every removal is
+    also recorded in `self.duplicates` with a back-reference to its canonical
+    chunk. State persists across calls, so the filter can be applied batch by
+    batch in the streaming pipeline. It is not saved between runs, so the
+    pipelines use the filter on full builds only.
+    """
+
+    def __init__(self, config: DedupConfig):
+        self.config = config
+        if config.num_perm % config.bands:
+            raise ValueError("dedup num_perm must be divisible by bands")
+        self.rows = config.num_perm // config.bands
+
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, size=config.num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _PRIME, size=config.num_perm, dtype=np.int64)
+
+        self._exact = {}          # text digest -> canonical location
+        self._buckets = {}        # (band, band bytes) -> [canonical ids]
+        self._signatures = []     # canonical id -> signature
+        self._locations = []      # canonical id -> location dict
+        self.duplicates = []
+        self.report = DedupReport(embedding_dim=config.embedding_dim)
+
+    # --------------------------------------------------------------------
+    # SIGNATURES
+    # --------------------------------------------------------------------
+    def _signature(self, words):
+        k = self.config.shingle_size
+        if len(words) <= k:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.int64, count=len(shingles))
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        for band in range(self.config.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    @staticmethod
+    def _location(metadata):
+        return {
+            "source": metadata.get("source"),
+            "page": metadata.get("page"),
+            "start_index": metadata.get("start_index"),
+        }
+
+    def _match(self, signature):
+        seen = set()
+        for key in self._band_keys(signature):
+            for canonical_id in self._buckets.get(key, ()):
+                if canonical_id in seen:
+                    continue
+                seen.add(canonical_id)
+                similarity = float(np.mean(self._signatures[canonical_id] == signature))
+                if similarity >= self.config.threshold:
+                    return canonical_id, similarity
+        return None, 0.0
+
+    # --------------------------------------------------------------------
+    # FILTERING
+    # --------------------------------------------------------------------
+    def _classify(self, text, metadata):
+        """
+        Returns (canonical location, kind, similarity). For a new chunk kind is
+        None and the location is its own, now registered as canonical.
+        """
+        words = _WORD_RE.findall(text.lower())
+        digest = hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+
+        if digest in self._exact:
+            return self._exact[digest], "exact", 1.0
+
+        signature = self._signature(words) if words else None
+        if signature is not None:
+            canonical_id, similarity = self._match(signature)
+            if canonical_id is not None:
+                return self._locations[canonical_id], "near", similarity
+
+        location = self._location(metadata)
+        self._exact[digest] = location
+        if signature is not None:
+            canonical_id = len(self._signatures)
+            self._signatures.append(signature)
+            self._locations.append(location)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(canonical_id)
+        return location, None, 1.0
+
+    def filter(self, chunks):
+        """
+        Returns the chunks with duplicates removed, as the same type that was
+        passed in (ChunkStore or list of Documents).
+        """
+        is_store = isinstance(chunks, ChunkStore)
+        count = len(chunks)
+        keep = []
+        duplicate_sources = {}  # kept index -> locations of removed copies
+        kept_at = {}            # id(location) of canonical chunk in this batch -> kept index
+
+        for i in range(count):
+            if is_store:
+                text, metadata = chunks.text(i), chunks.metadata(i)
+            else:
+                text, metadata = chunks[i].page_content, chunks[i].metadata
+
+            canonical, kind, similarity = self._classify(text, metadata)
+            self.report.total += 1
+
+            if kind is None:
+                kept_at[id(canonical)] = len(keep)
+                keep.append(i)
+                continue
+
+            location = self._location(metadata)
+            self.duplicates.append({**location, "kind": kind, "similarity": round(similarity, 3),
+                                    "canonical": canonical})
+            if kind == "exact":
+                self.report.exact_duplicates += 1
+            else:
+                self.report.near_duplicates += 1
+
+            # Back-reference on the canonical chunk too, when it is part of this batch
+            position = kept_at.get(id(canonical))
+            if position is not None:
+                duplicate_sources.setdefault(position, []).append(
+                    f"{location['source']}#page={location['page']}"
+                )
+
+        self.report.kept += len(keep)
+
+        if is_store:
+            return chunks.select(keep, {pos: {"duplicate_sources": srcs} for pos, srcs in duplicate_sources.items()})
+
+        result = [chunks[i] for i in keep]
+        for position, sources in duplicate_sources.items():
+            result[position].metadata["duplicate_sources"] = sources
+        return result
+
+    def save_duplicates(self, path=None):
+        """Writes the removed-chunk back-references and the savings report as JSON."""
+        path = Path(path or self.config.duplicates_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"report": asdict(self.report), "duplicates": self.duplicates}, f, indent=2)
+        logger.info(f"Duplicate back-references saved at: {path}")
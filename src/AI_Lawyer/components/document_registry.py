@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+REGISTRY_VERSION = 2
+
+
+def file_sha256(path):
+    """Streams a file through SHA-256 and returns the hex digest."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+@dataclass
+class DocumentDelta:
+    """
+    Result of comparing `pdf_directory` against the registry.
+
+    Files are classified by path, but the index holds one copy of each
+    content hash, so a file whose content is already indexed is never
+    re-embedded: a renamed file (or the surviving copy of a deleted
+    duplicate) is listed in `moved` and only re-labels the chunks it takes
+    over, and a further copy of indexed content is listed in `duplicates`.
+    """
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    # path -> the (removed or changed) path whose indexed chunks it takes over
+    moved: Dict[str, str] = field(default_factory=dict)
+    duplicates: List[Path] = field(default_factory=list)
+    # path -> content hash for every file currently on disk
+    hashes: Dict[str, str] = field(default_factory=dict)
+    # path -> content hash it had in the registry, for changed/removed documents
+    previous: Dict[str, str] = field(default_factory=dict)
+    # content hashes whose indexed chunks must go: content no file holds any
+    # more, and content re-parsed by a new parser version
+    stale_hashes: Set[str] = field(default_factory=set)
+
+    @property
+    def dirty(self):
+        """Files to parse: new or changed content, and moved files whose chunks get the new path."""
+        return self.added + self.changed + [Path(path) for path in self.moved]
+
+    def summary(self):
+        return (f"added={len(self.added)} changed={len(self.changed)} "
+                f"removed={len(self.removed)} unchanged={len(self.unchanged)} "
+                f"moved={len(self.moved)} duplicates={len(self.duplicates)}")
+
+
+class DocumentRegistry:
+    """
+    Record of the PDFs in `pdf_directory` and the content they hold.
+
+    Entries are keyed by path and store the SHA-256 of the file bytes, size,
+    mtime, page count and the parser version that produced the pages. Files
+    whose size and mtime are unchanged reuse their recorded hash, so a scan
+    of an untouched corpus only costs a `stat` per file. Identical files
+    under different names each keep their own entry.
+    """
+
+    def __init__(self, pdf_dir, registry_path, parser_version):
+        self.pdf_dir = Path(pdf_dir)
+        self.registry_path = Path(registry_path)
+        self.parser_version = parser_version
+        self.entries = self._load()
+        self._pending = {}
+        self._recorded = {}
+
+    def _load(self):
+        if not self.registry_path.exists():
+            return {}
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("version") == 1:
+                # Version 1 was keyed by content hash, one path per hash
+                return {entry.pop("path"): dict(entry, sha256=digest)
+                        for digest, entry in content.get("documents", {}).items()}
+            if content.get("version") != REGISTRY_VERSION:
+                logger.warning(f"Registry version mismatch in {self.registry_path}; starting fresh")
+                return {}
+            return content.get("documents", {})
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable document registry {self.registry_path}: {e}")
+            return {}
+
+    def save(self):
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.registry_path.with_name(self.registry_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": REGISTRY_VERSION, "documents": self.entries}, f, indent=4)
+        os.replace(tmp_path, self.registry_path)
+        logger.info(f"Document registry saved at: {self.registry_path}")
+
+    def scan(self, pattern="*.pdf"):
+        """
+        Hashes the current contents of `pdf_directory` and classifies every
+        file relative to the registry (see DocumentDelta). Nothing is
+        persisted until `record_parsed` / `commit` are called.
+        """
+        delta = DocumentDelta()
+        self._pending, self._recorded = {}, {}
+        on_disk = []
+
+        for pdf_file in sorted(self.pdf_dir.glob(pattern)):
+            stat = pdf_file.stat()
+            path = str(pdf_file)
+            old_entry = self.entries.get(path)
+            if old_entry and old_entry["size"] == stat.st_size and old_entry["mtime"] == stat.st_mtime:
+                digest = old_entry["sha256"]
+            else:
+                digest = file_sha256(pdf_file)
+            delta.hashes[path] = digest
+            self._pending[path] = {"sha256": digest, "size": stat.st_size, "mtime": stat.st_mtime}
+            on_disk.append(pdf_file)
+
+        # Content the index holds chunks of, as parsed by the current parser
+        indexed = {entry["sha256"] for entry in self.entries.values()
+                   if entry.get("parser_version") == self.parser_version}
+        # content hash -> the paths that held it and no longer do
+        lost = {}
+        for path, entry in self.entries.items():
+            if delta.hashes.get(path) != entry["sha256"] or entry.get("parser_version") != self.parser_version:
+                delta.previous[path] = entry["sha256"]
+                lost.setdefault(entry["sha256"], []).append(path)
+        delta.removed = sorted(path for path in self.entries if path not in delta.hashes)
+
+        # Unchanged files first, so copies elsewhere are recognised as duplicates
+        held = {}
+        new_or_changed = []
+        for pdf_file in on_disk:
+            path = str(pdf_file)
+            if path in self.entries and path not in delta.previous:
+                delta.unchanged.append(pdf_file)
+                held.setdefault(delta.hashes[path], path)
+            else:
+                new_or_changed.append(pdf_file)
+
+        for pdf_file in new_or_changed:
+            path = str(pdf_file)
+            digest = delta.hashes[path]
+            if digest in held:
+                delta.duplicates.append(pdf_file)
+            elif digest in indexed and lost.get(digest):
+                delta.moved[path] = lost[digest][0]
+            elif path in self.entries:
+                delta.changed.append(pdf_file)
+            else:
+                delta.added.append(pdf_file)
+            held.setdefault(digest, path)
+
+        # Indexed chunks may cite a path that is gone while a copy of the
+        # content survives: the first surviving copy takes them over
+        moved_hashes = {delta.hashes[path] for path in delta.moved}
+        for pdf_file in list(delta.unchanged):
+            path = str(pdf_file)
+            digest = delta.hashes[path]
+            if digest in indexed and lost.get(digest) and digest not in moved_hashes:
+                delta.unchanged.remove(pdf_file)
+                delta.moved[path] = lost[digest][0]
+                moved_hashes.add(digest)
+
+        reparsed = {delta.hashes[str(pdf_file)] for pdf_file in delta.added + delta.changed}
+        delta.stale_hashes = {digest for digest in lost
+                              if digest not in held or (digest in reparsed and digest not in indexed)}
+
+        logger.info(f"Document registry scan: {delta.summary()}")
+        return delta
+
+    def record_parsed(self, path, pages):
+        """Marks a scanned document as parsed by the current parser version."""
+        path = str(path)
+        self._recorded[path] = dict(self._pending[path], pages=pages, parser_version=self.parser_version)
+
+    def commit(self, delta):
+        """
+        Applies a scan to the registry and saves it. Parsed files get the
+        entry `record_parsed` gave them; files whose content was already
+        indexed (unchanged, duplicates, moved) keep its page count. Added
+        and changed files that were not parsed are left out, so the next
+        scan offers them again.
+        """
+        pages = {entry["sha256"]: entry.get("pages")
+                 for entry in list(self.entries.values()) + list(self._recorded.values())
+                 if entry.get("parser_version") == self.parser_version}
+        unparsed = {str(pdf_file) for pdf_file in delta.added + delta.changed}
+
+        entries = {}
+        for path, digest in delta.hashes.items():
+            if path in self._recorded:
+                entries[path] = self._recorded[path]
+            elif path not in unparsed and digest in pages:
+                entries[path] = dict(self._pending[path], pages=pages[digest], parser_version=self.parser_version)
+        self.entries = entries
+        self.save()
@@ -1,20 +1,58 @@
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
 from AI_Lawyer.entity.config_entity import EmbeddingConfig
 from AI_Lawyer.utils.logging_setup import logger
 from AI_Lawyer.utils.secret_loader import resolve_secret
+from AI_Lawyer.utils.rate_limit import TokenBucket, backoff_delay
+from AI_Lawyer.components.chunk_store import iter_texts_and_metadatas
+from AI_Lawyer.components.vector_index import add_vectors, build_faiss_store, convert_index, needs_training
+from AI_Lawyer.components.store_io import write_vector_store
 
-import google.generativeai as genai
-from langchain_community.vectorstores import FAISS
 from langchain.embeddings.base import Embeddings
 
 
+GEMINI_ENDPOINT = "https://generativelanguage.googleapis.com"
+# Most texts the API accepts in one batchEmbedContents call
+GEMINI_MAX_BATCH = 100
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class GeminiAPIError(RuntimeError):
+    def __init__(self, status, message):
+        super().__init__(f"Gemini API error {status}: {message}")
+        self.status = status
+
+
 # ===========================================================
 # Gemini Embedding Wrapper Class
 # ===========================================================
 
 class GeminiEmbedding(Embeddings):
-
-    def __init__(self, model_name: str, api_key: str):
+    """
+    Gemini embeddings over the REST API, for LangChain.
+
+    `embed_documents` splits the texts into batches of at most `batch_size`
+    (the API allows 100 per call) and runs up to `max_concurrency` batches
+    at once. Every batch first takes its size from a token bucket refilled
+    at `requests_per_minute`, so the quota is respected across threads.
+    429 / 5xx responses and connection errors are retried with full-jitter
+    exponential backoff, honouring Retry-After. Vectors come back in input
+    order. `endpoint` can point at a local stub server for testing.
+
+    Requests go straight to the REST `batchEmbedContents` method rather
+    than through the google-generativeai SDK, whose `embed_content` gives
+    no control over batching, concurrency or retries.
+    """
+
+    def __init__(self, model_name: str, api_key: str, batch_size: int = GEMINI_MAX_BATCH,
+                 max_concurrency: int = 4, requests_per_minute: int = 1500, max_retries: int = 6,
+                 endpoint: str = None, timeout: float = 60, session=None):
         """
         Wrapper to use Gemini embeddings with LangChain.
         """
@@ -24,26 +62,79 @@ class GeminiEmbedding(Embeddings):
         
         if not api_key.startswith("AIza"):
             logger.warning(f"⚠️  API key format may be invalid. Expected to start with 'AIza', got: {api_key[:4]}...")
-        
-        try:
-            genai.configure(api_key=api_key)
-            logger.info("✅ Gemini API configured successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to configure Gemini API: {e}")
-            raise ValueError(f"API configuration failed: {e}")
 
-        self.model_name = model_name
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        self.api_key = api_key
+        self.batch_size = max(1, min(batch_size, GEMINI_MAX_BATCH))
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.endpoint = (endpoint or GEMINI_ENDPOINT).rstrip("/")
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(
+            rate=requests_per_minute / 60.0,
+            capacity=max(self.batch_size, requests_per_minute / 60.0)
+        )
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+        logger.info(f"✅ Gemini embeddings configured ({self.model_name} via {self.endpoint})")
+
+    def _post(self, method, payload, cost):
+        """POSTs to `<model>:<method>`, retrying throttling, server errors and dropped connections."""
+        url = f"{self.endpoint}/v1beta/{self.model_name}:{method}"
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(cost)
+            try:
+                # Key in a header rather than the URL, so it never ends up in proxy / error logs
+                response = self.session.post(url, headers={"x-goog-api-key": self.api_key},
+                                             json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, retry_after = e, None
+            else:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS:
+                    raise GeminiAPIError(response.status_code, response.text[:500])
+                error = GeminiAPIError(response.status_code, response.text[:200])
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt == self.max_retries:
+                raise error
+            delay = backoff_delay(attempt)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            logger.warning(f"Gemini {method} failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _embed_batch(self, texts):
+        payload = {"requests": [
+            {"model": self.model_name, "content": {"parts": [{"text": text}]}} for text in texts
+        ]}
+        embeddings = self._post("batchEmbedContents", payload, cost=len(texts))["embeddings"]
+        if len(embeddings) != len(texts):
+            raise GeminiAPIError(200, f"expected {len(texts)} embeddings, got {len(embeddings)}")
+        return [embedding["values"] for embedding in embeddings]
 
     def embed_documents(self, texts):
         """
         Embeds a list of documents using Gemini.
         """
         try:
-            response = genai.embed_content(
-                model=self.model_name,
-                content=texts
-            )
-            return response["embedding"]
+            texts = list(texts)
+            batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+            vectors = []
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                # map() yields in submission order, so vectors line up with texts
+                for batch_vectors in executor.map(self._embed_batch, batches):
+                    vectors.extend(batch_vectors)
+            return vectors
         except Exception as e:
             logger.error(f"❌ Error in embed_documents: {e}")
             if "API_KEY_INVALID" in str(e):
@@ -55,11 +146,8 @@ class GeminiEmbedding(Embeddings):
         Embeds a single query string.
         """
         try:
-            response = genai.embed_content(
-                model=self.model_name,
-                content=text
-            )
-            return response["embedding"]
+            payload = {"model": self.model_name, "content": {"parts": [{"text": text}]}}
+            return self._post("embedContent", payload, cost=1)["embedding"]["values"]
         except Exception as e:
             logger.error(f"❌ Error in embed_query: {e}")
             if "API_KEY_INVALID" in str(e):
@@ -98,7 +186,14 @@ class EmbeddingCreator:
         """
         try:
             logger.info(f"Initializing Gemini embedding model: {self.model_name}")
-            return GeminiEmbedding(self.model_name, self.api_key)
+            return GeminiEmbedding(
+                self.model_name,
+                self.api_key,
+                max_concurrency=self.config.max_concurrency,
+                requests_per_minute=self.config.requests_per_minute,
+                max_retries=self.config.max_retries,
+                endpoint=self.config.api_endpoint or None
+            )
         except Exception as e:
             logger.error(f"Failed to initialize embedding model: {e}")
             raise e
@@ -112,16 +207,29 @@ class EmbeddingCreator:
 
             embedding_model = self.get_embedding_model()
 
-            faiss_db = FAISS.from_documents(
-                text_chunks,
-                embedding_model
-            )
-
-            # Ensure directory exists
-            self.db_path.mkdir(parents=True, exist_ok=True)
-
-            faiss_db.save_local(str(self.db_path))
-
+            # One slice of chunks at a time; an index that needs training is
+            # built as Flat and converted once every slice is in
+            faiss_db = None
+            for texts, metadatas in iter_texts_and_metadatas(text_chunks):
+                vectors = np.asarray(embedding_model.embed_documents(texts), dtype=np.float32)
+                if faiss_db is None:
+                    trained = needs_training(self.config.index_spec, vectors.shape[1])
+                    faiss_db = build_faiss_store(
+                        texts,
+                        metadatas,
+                        vectors,
+                        embedding_model,
+                        index_spec="Flat" if trained else self.config.index_spec,
+                        rerank_factor=self.config.rerank_factor
+                    )
+                else:
+                    add_vectors(faiss_db, texts, metadatas, vectors)
+            if faiss_db is None:
+                raise ValueError("No chunks to embed")
+            if trained:
+                convert_index(faiss_db, self.config.index_spec, train_size=self.config.index_train_size,
+                              rerank_factor=self.config.rerank_factor)
+            write_vector_store(faiss_db, self.db_path, self.config.index_spec, self.config.search_params)
             logger.info(f"FAISS database saved successfully at: {self.db_path}")
 
             return faiss_db
@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+KEY_BYTES = 16
+
+
+def text_key(text):
+    """Digest of the whitespace-normalised text, so re-wrapped copies share a key."""
+    return hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of chunk embeddings for one model, keyed by chunk text hash.
+
+    Vectors live in one raw float32 matrix (`vectors.f32`) read through a
+    memory map, so lookups touch only the rows they need. The key index
+    (`keys.npy`, 16-byte text digests in row order) and per-row last-use
+    stamps (`stamps.npy`) are loaded into a dict on open. Every model /
+    normalisation setting gets its own directory, making the effective key
+    (model, text hash).
+
+    New vectors are buffered by `put()` and written by `save()`, which holds
+    an exclusive lock on the directory, first merges rows another process
+    saved meanwhile, and commits by atomically replacing `meta.json`. Once
+    the matrix grows past `max_bytes` the most recently used rows are
+    compacted into a new generation of files (`vectors.<n>.f32`, ...) and the
+    old generation is only removed after the commit, so a crash or a
+    concurrent reader never sees keys that don't match the vectors.
+    """
+
+    def __init__(self, cache_dir, model_name, normalize=True, max_bytes=1024 * 1024 * 1024):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(model_name)).strip("_")
+        self.cache_dir = Path(cache_dir) / f"{slug}-{'norm' if normalize else 'raw'}"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+
+        self.meta_path = self.cache_dir / "meta.json"
+        self.lock_path = self.cache_dir / ".lock"
+
+        with self._locked(shared=True):
+            self._load()
+
+    # --------------------------------------------------------------------
+    # PERSISTENCE
+    # --------------------------------------------------------------------
+    def _paths(self, generation):
+        """(vectors, keys, stamps) files of one generation; generation 0 keeps the original names."""
+        suffix = f".{generation}" if generation else ""
+        return (self.cache_dir / f"vectors{suffix}.f32", self.cache_dir / f"keys{suffix}.npy",
+                self.cache_dir / f"stamps{suffix}.npy")
+
+    @contextmanager
+    def _locked(self, shared=False):
+        """Advisory lock on the cache directory (a no-op where fcntl is unavailable)."""
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_meta(self):
+        if not self.meta_path.exists():
+            return None
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load(self):
+        """Reads the committed state; called with the lock held."""
+        self._reset_state()
+        try:
+            meta = self._read_meta()
+            if meta is None:
+                return
+            generation = meta.get("generation", 0)
+            vectors_path, keys_path, stamps_path = self._paths(generation)
+            dimension = meta["dimension"]
+            keys = np.load(keys_path)
+            stamps = np.load(stamps_path)
+            stored_rows = vectors_path.stat().st_size // (4 * dimension) if vectors_path.exists() else 0
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable embedding cache {self.cache_dir}: {e}")
+            self._reset_state()
+            return
+
+        # A crash between appending vectors and saving the index leaves extra rows
+        count = min(len(keys), len(stamps), stored_rows)
+        self.generation = generation
+        self.dimension = dimension
+        self._keys = [row.tobytes() for row in keys[:count]]
+        self._stamps = [int(s) for s in stamps[:count]]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._clock = max(self._stamps, default=0)
+        self._stored = count
+        # Mapped now, so a compaction by another process can't remove the file from under us
+        self._view()
+
+    def _reset_state(self):
+        self.generation = 0
+        self.dimension = None
+        self._keys, self._stamps, self._rows, self._clock = [], [], {}, 0
+        self._stored = 0
+        self._pending = []
+        self._matrix = None
+
+    def _save_array(self, path, array):
+        tmp_path = path.with_name(path.name + ".tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+    def _merge_saved(self):
+        """
+        Reloads rows another process committed since we loaded, keeping our
+        unsaved vectors and the newer of both use stamps for shared keys.
+        """
+        keys, stamps, clock = self._keys, self._stamps, self._clock
+        pending = dict(zip(keys[self._stored:], zip(self._pending_vectors(), stamps[self._stored:])))
+        self._load()
+        self._clock = max(self._clock, clock)
+        for key, stamp in zip(keys, stamps):
+            row = self._rows.get(key)
+            if row is not None:
+                self._stamps[row] = max(self._stamps[row], stamp)
+        fresh = [key for key in pending if key not in self._rows]
+        if fresh:
+            self._append(fresh, np.stack([pending[key][0] for key in fresh]), [pending[key][1] for key in fresh])
+
+    def save(self):
+        """Writes buffered vectors and the key index, evicting least recently used rows beyond `max_bytes`."""
+        if self.dimension is None:
+            return
+        with self._locked():
+            meta = self._read_meta() or {}
+            if (meta.get("generation", 0), meta.get("rows", 0)) != (self.generation, self._stored):
+                self._merge_saved()
+
+            vectors_path, keys_path, stamps_path = self._paths(self.generation)
+            if len(self._keys) > self._stored:
+                with open(vectors_path, "ab") as f:
+                    # Drop rows left behind by a crashed save before appending
+                    f.truncate(self._stored * 4 * self.dimension)
+                    f.write(self._pending_vectors().tobytes())
+                self._stored, self._pending, self._matrix = len(self._keys), [], None
+
+            stale = self._evict()
+            vectors_path, keys_path, stamps_path = self._paths(self.generation)
+            # uint8 rows rather than an "S16" array, which would drop trailing NUL bytes
+            self._save_array(keys_path, np.frombuffer(b"".join(self._keys), dtype=np.uint8).reshape(-1, KEY_BYTES))
+            self._save_array(stamps_path, np.array(self._stamps, dtype=np.int64))
+            tmp_path = self.meta_path.with_name(self.meta_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": str(self.model_name), "dimension": self.dimension,
+                           "generation": self.generation, "rows": self._stored}, f)
+            os.replace(tmp_path, self.meta_path)
+
+            for path in stale:
+                path.unlink(missing_ok=True)
+            self._view()
+
+    # --------------------------------------------------------------------
+    # ACCESS
+    # --------------------------------------------------------------------
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        return len(self._keys) * 4 * (self.dimension or 0)
+
+    def _view(self):
+        """Memory map of the saved rows."""
+        if self._matrix is None or self._matrix.shape[0] != self._stored:
+            self._matrix = None
+            if self._stored:
+                self._matrix = np.memmap(self._paths(self.generation)[0], dtype=np.float32, mode="r",
+                                         shape=(self._stored, self.dimension))
+        return self._matrix
+
+    def _pending_vectors(self):
+        """Vectors put since the last save, in row order."""
+        if len(self._pending) != 1:
+            self._pending = [np.concatenate(self._pending) if self._pending else
+                             np.empty((0, self.dimension or 0), dtype=np.float32)]
+        return self._pending[0]
+
+    def lookup(self, keys):
+        """Row of each key in the cache, -1 for a miss. Hits count as a use."""
+        self._clock += 1
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self._rows.get(key)
+            if row is not None:
+                rows[i] = row
+                self._stamps[row] = self._clock
+        return rows
+
+    def get(self, rows):
+        """Copies the vectors at `rows` out of the memory map (or the unsaved buffer) as an (n, d) array."""
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.empty((len(rows), self.dimension or 0), dtype=np.float32)
+        saved = rows < self._stored
+        if saved.any():
+            vectors[saved] = self._view()[rows[saved]]
+        if not saved.all():
+            vectors[~saved] = self._pending_vectors()[rows[~saved] - self._stored]
+        return vectors
+
+    def put(self, keys, vectors):
+        """Buffers vectors for keys not cached yet, until the next `save()`."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"expected {self.dimension}-d vectors for {self.model_name}, got {vectors.shape[1]}")
+
+        self._clock += 1
+        fresh, seen = [], set()
+        for i, key in enumerate(keys):
+            if key not in self._rows and key not in seen:
+                seen.add(key)
+                fresh.append(i)
+        if fresh:
+            self._append([keys[i] for i in fresh], vectors[fresh], [self._clock] * len(fresh))
+
+    def _append(self, keys, vectors, stamps):
+        for key, stamp in zip(keys, stamps):
+            self._rows[key] = len(self._keys)
+            self._keys.append(key)
+            self._stamps.append(stamp)
+        self._pending.append(vectors)
+
+    def _evict(self):
+        """
+        Compacts the most recently used rows that fit in `max_bytes` into the
+        next generation's vectors file. Returns the files of the generation it
+        replaces, to be removed once the new one is committed.
+        """
+        row_bytes = 4 * (self.dimension or 0)
+        if not row_bytes or self.nbytes <= self.max_bytes:
+            return []
+        budget = self.max_bytes // row_bytes
+        keep = np.sort(np.argsort(-np.array(self._stamps, dtype=np.int64), kind="stable")[:budget])
+
+        stale = self._paths(self.generation)
+        view = self._view()
+        with open(self._paths(self.generation + 1)[0], "wb") as f:
+            for start in range(0, len(keep), 4096):
+                f.write(np.ascontiguousarray(view[keep[start:start + 4096]]).tobytes())
+        self.generation += 1
+        self._matrix = None
+
+        removed = len(self._keys) - len(keep)
+        self._keys = [self._keys[row] for row in keep]
+        self._stamps = [self._stamps[row] for row in keep]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._stored = len(self._keys)
+        logger.info(f"Embedding cache: evicted {removed} vectors, {len(self._keys)} kept")
+        return list(stale)
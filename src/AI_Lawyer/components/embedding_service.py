@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import queue
+import socket
+import threading
+import http.client
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingUnixStreamServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+# Addresses are "unix:///path/to.sock" or "http://host:port"
+UNIX_SCHEME = "unix://"
+
+
+def parse_address(address):
+    """Returns ("unix", path) or ("http", (host, port))."""
+    if address.startswith(UNIX_SCHEME):
+        return "unix", address[len(UNIX_SCHEME):]
+    parsed = urlparse(address if "://" in address else f"http://{address}")
+    if parsed.scheme != "http" or not parsed.hostname:
+        raise ValueError(f"Unsupported embedding service address: {address!r} "
+                         f"(expected unix:///path.sock or http://host:port)")
+    return "http", (parsed.hostname, parsed.port or 80)
+
+
+def _pack(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return vectors.tobytes(), {"X-Shape": f"{vectors.shape[0]},{vectors.shape[1] if vectors.ndim > 1 else 0}"}
+
+
+def _unpack(body, shape):
+    rows, dim = (int(n) for n in shape.split(","))
+    return np.frombuffer(body, dtype=np.float32).reshape(rows, dim).copy()
+
+
+# ===========================================================
+# Micro-batching
+# ===========================================================
+
+class MicroBatcher:
+    """
+    Collects single texts submitted from many threads and encodes them
+    together: the first pending text opens a window of `max_wait_ms`, and
+    everything that arrives before it closes (up to `max_batch` texts) goes
+    through the model in one call. Each caller gets a Future for its row.
+    """
+
+    def __init__(self, encode, max_batch=64, max_wait_ms=5.0):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.texts = 0
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-microbatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        future = Future()
+        self._pending.put((text, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self.encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(batch)
+            for row, (_, future) in enumerate(batch):
+                future.set_result(vectors[row])
+
+
+# ===========================================================
+# Server
+# ===========================================================
+
+class _EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/info":
+            return self._reply(200, self.server.service.info())
+        return self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/embed_query":
+                vectors = service.batcher.submit(payload["text"]).result()[None, :]
+            elif self.path == "/encode":
+                vectors = service.encode(list(payload["texts"]))
+            else:
+                return self._reply(404, {"error": f"unknown path {self.path}"})
+        except (KeyError, ValueError) as e:
+            return self._reply(400, {"error": str(e)})
+        except Exception as e:
+            logger.error(f"Embedding service error on {self.path}: {e}")
+            return self._reply(500, {"error": str(e)})
+
+        body, headers = _pack(vectors)
+        return self._reply(200, body, headers, content_type="application/octet-stream")
+
+
+class _UnixHTTPServer(ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects an (host, port)-style client address
+        return request, ("unix", 0)
+
+
+class EmbeddingService:
+    """
+    One shared model serving embeddings to other processes.
+
+    Listens on `address` (a Unix socket or a local HTTP port) with three
+    endpoints: `GET /info` (model name, backend, dimension), `POST /encode`
+    for document batches and `POST /embed_query` for single queries, which
+    concurrent callers share through a MicroBatcher. Vectors are returned
+    raw (not normalised) as float32 bytes; clients normalise as configured.
+
+    Requests are handled on their own threads but share one model, which is
+    not safe to run from several threads at once (HF tokenizers fail with
+    "Already borrowed"), so every model call goes through `encode`, which
+    holds one lock.
+    """
+
+    def __init__(self, embedder, address, max_batch=64, max_wait_ms=5.0):
+        self.embedder = embedder
+        self.address = address
+        self._encode_lock = threading.Lock()
+        self.batcher = MicroBatcher(self.encode, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = _UnixHTTPServer(target, _EmbeddingRequestHandler)
+        else:
+            self._server = ThreadingHTTPServer(target, _EmbeddingRequestHandler)
+            self._server.daemon_threads = True
+            # Port 0 picks a free port; report the real one
+            self.address = f"http://{target[0]}:{self._server.server_address[1]}"
+        self._server.service = self
+        self._thread = None
+
+    def encode(self, texts):
+        with self._encode_lock:
+            return self.embedder.encode(texts)
+
+    def info(self):
+        return {
+            "model": str(self.embedder.model_name),
+            "backend": self.embedder.backend,
+            "quantize": self.embedder.quantize,
+            "dimension": self.embedder.dimension,
+            "batches": self.batcher.batches,
+            "queries": self.batcher.texts,
+        }
+
+    def start(self):
+        """Serves in a background thread and returns self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="embedding-service", daemon=True)
+        self._thread.start()
+        logger.info(f"Embedding service for {self.embedder.model_name} listening on {self.address}")
+        return self
+
+    def serve_forever(self):
+        logger.info(f"Embedding service for {self.embedder.model_name} listening on {self.address}")
+        self._server.serve_forever()
+
+    def shutdown(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+        kind, target = parse_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+
+# ===========================================================
+# Client
+# ===========================================================
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class EmbeddingServiceClient:
+    """Talks to an EmbeddingService; keeps one keep-alive connection per thread."""
+
+    def __init__(self, address, timeout=60):
+        self.address = address
+        self.timeout = timeout
+        self._kind, self._target = parse_address(address)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._kind == "unix":
+                connection = _UnixHTTPConnection(self._target, self.timeout)
+            else:
+                connection = http.client.HTTPConnection(*self._target, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        # One retry on a fresh connection covers keep-alive sockets the server closed
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException, OSError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"Embedding service {self.address}{path} returned {response.status}: {data[:200]!r}")
+        if response.getheader("Content-Type") == "application/octet-stream":
+            return _unpack(data, response.getheader("X-Shape"))
+        return json.loads(data)
+
+    def info(self):
+        return self._request("GET", "/info")
+
+    def encode(self, texts):
+        return self._request("POST", "/encode", {"texts": list(texts)})
+
+    def embed_query(self, text):
+        return self._request("POST", "/embed_query", {"text": text})[0]
@@ -0,0 +1,191 @@
+import re
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from AI_Lawyer.components.chunk_store import page_range
+
+
+# Structural headings of Indian acts, matched at the start of a line.
+# Upper-case only, so prose such as "the Schedule" does not split.
+PART_RE = re.compile(r"^[ \t]*PART[ \t]+([IVXLC]+[A-Z]?)\b", re.MULTILINE)
+CHAPTER_RE = re.compile(r"^[ \t]*CHAPTER[ \t]+([IVXLC]+[A-Z]?)\b", re.MULTILINE)
+SCHEDULE_RE = re.compile(r"^[ \t]*((?:THE[ \t]+)?(?:[A-Z]+[ \t]+)?SCHEDULE)\b", re.MULTILINE)
+# "302. Punishment for murder.—", "103. (1) Whoever ...", "21A. [Right to education"
+SECTION_RE = re.compile(r"^[ \t]*(\d{1,3}[A-Z]{0,2})\.[ \t]*(?=[A-Z\[(“\"])", re.MULTILINE)
+
+LEVELS = ("part", "chapter", "schedule", "section")
+
+
+class LegalChunker:
+    """
+    Splits statute text on Part / Chapter / Schedule / Section (or Article)
+    headings instead of at arbitrary character counts.
+
+    Consecutive short units of the same Part and Chapter are packed together
+    up to `chunk_size`, without overlap since each chunk already starts on a
+    heading; a unit longer than `chunk_size` is split on paragraph and
+    sentence boundaries into pieces that share `chunk_overlap`, so a
+    provision cut mid-section keeps its context. The heading state carries over
+    from one page of a document to the next, so a page that opens mid-section
+    is still labelled with that section. Every chunk gets `act`, `section`
+    and `article` metadata (numbered units of the Constitution are articles,
+    everywhere else they are sections) plus `part`, `chapter`, `schedule`
+    and `start_index`.
+
+    Sizes are in characters, or in embedding-model tokens when `split_spans`
+    is given the page's `TokenSpans`.
+    """
+
+    def __init__(self, chunk_size=1000, chunk_overlap=0):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._long_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True
+        )
+
+    @staticmethod
+    def act_name(metadata):
+        title = str(metadata.get("Title") or "").strip()
+        if len(title) > 3 and not title.lower().endswith((".doc", ".docx", ".pdf")):
+            return title
+        return Path(metadata.get("source", "")).stem
+
+    @staticmethod
+    def _boundaries(text):
+        found = []
+        for level, pattern in (("part", PART_RE), ("chapter", CHAPTER_RE),
+                               ("schedule", SCHEDULE_RE), ("section", SECTION_RE)):
+            for match in pattern.finditer(text):
+                found.append((match.start(), level, match.group(1)))
+        found.sort()
+        return found
+
+    def _units(self, text, state):
+        """Yields (start, end, labels) segments of `text`, updating `state` in place."""
+        position = 0
+        for start, level, label in self._boundaries(text):
+            if start > position:
+                yield position, start, dict(state)
+                position = start
+            state[level] = label
+            # A new heading closes everything nested below it; schedules sit
+            # outside the Part/Chapter structure of the main text
+            closed = LEVELS[LEVELS.index(level) + 1:]
+            if level == "schedule":
+                closed += ("part", "chapter")
+            for lower in closed:
+                state[lower] = None
+        if position < len(text):
+            yield position, len(text), dict(state)
+
+    @staticmethod
+    def _range(first, last):
+        if first == last or last is None:
+            return first
+        if first is None:
+            return last
+        return f"{first}-{last}"
+
+    def _make_span(self, text, start, end, first, last, act, numbered_as):
+        """Trims whitespace off [start, end) and labels it; None if nothing is left."""
+        piece = text[start:end]
+        stripped = piece.lstrip()
+        start += len(piece) - len(stripped)
+        end = start + len(stripped.rstrip())
+        if end <= start:
+            return None
+
+        number = self._range(first.get("section"), last.get("section"))
+        return start, end, {
+            "act": act,
+            "part": last.get("part"),
+            "chapter": last.get("chapter"),
+            "schedule": last.get("schedule"),
+            "section": number if numbered_as == "section" else None,
+            "article": number if numbered_as == "article" else None,
+        }
+
+    def _long_spans(self, text, start, end, tokens):
+        """Splits an over-long unit on paragraph / sentence boundaries, overlapping by `chunk_overlap`."""
+        if tokens is not None:
+            return tokens.windows(start, end, self.chunk_size, self.chunk_overlap)
+        spans = []
+        for piece in self._long_splitter.create_documents([text[start:end]]):
+            offset = start + piece.metadata["start_index"]
+            spans.append((offset, offset + len(piece.page_content)))
+        return spans
+
+    def split_spans(self, text, metadata, state, tokens=None):
+        """
+        Returns (start, end, labels) spans of `text`. `state` holds the
+        Part/Chapter/Schedule/Section in force and is updated in place, so
+        passing the same dict for consecutive pages carries headings over.
+        With `tokens` (the TokenSpans of `text`) sizes are counted in tokens.
+        """
+        if tokens is not None:
+            length = tokens.count
+        else:
+            length = lambda start, end: end - start
+        act = self.act_name(metadata)
+        numbered_as = "article" if "constitution" in act.lower() else "section"
+        spans = []
+        group = None  # [start, end, first_labels, last_labels]
+
+        def flush():
+            if group is not None:
+                span = self._make_span(text, group[0], group[1], group[2], group[3], act, numbered_as)
+                if span is not None:
+                    spans.append(span)
+
+        for start, end, labels in self._units(text, state):
+            if not text[start:end].strip():
+                continue
+
+            same_division = group is not None and all(
+                group[3].get(level) == labels.get(level) for level in ("part", "chapter", "schedule")
+            )
+
+            if length(start, end) > self.chunk_size:
+                if same_division and group[3].get("section") is None:
+                    # Keep a bare Part/Chapter heading with the section that follows it
+                    start = group[0]
+                else:
+                    flush()
+                group = None
+                # Long section: pack its paragraphs, overlapping only within the section
+                for piece_start, piece_end in self._long_spans(text, start, end, tokens):
+                    span = self._make_span(text, piece_start, piece_end, labels, labels, act, numbered_as)
+                    if span is not None:
+                        spans.append(span)
+                continue
+
+            if same_division and length(group[0], end) <= self.chunk_size:
+                if group[2].get("section") is None:
+                    group[2] = labels
+                group[1], group[3] = end, labels
+            else:
+                flush()
+                group = [start, end, labels, labels]
+
+        flush()
+        return spans
+
+    def split_documents(self, documents):
+        chunks = []
+        states = {}
+        for document in documents:
+            state = states.setdefault(document.metadata.get("source"), self.new_state())
+            for start, end, labels in self.split_spans(document.page_content, document.metadata, state):
+                chunks.append(Document(
+                    page_content=document.page_content[start:end],
+                    metadata={**page_range(document.metadata, start, end), **labels, "start_index": start},
+                ))
+        return chunks
+
+    @staticmethod
+    def new_state():
+        return dict.fromkeys(LEVELS)
@@ -1,49 +1,239 @@
 
+import os
+import re
+import time
+import queue
+import multiprocessing
 from pathlib import Path
+import numpy as np
 from AI_Lawyer.entity.config_entity import EmbeddingConfig
 from AI_Lawyer.utils.logging_setup import logger
-from langchain_community.vectorstores import FAISS
+from AI_Lawyer.components.chunk_store import iter_texts_and_metadatas, chunk_content_hash
+from AI_Lawyer.components.vector_index import (
+    build_faiss_store, add_vectors, refresh_chunks, remove_chunks, is_id_mapped, needs_training, convert_index,
+    apply_search_params, load_index_params
+)
+from AI_Lawyer.components.reranking import (
+    RerankingFAISS, RawVectors, is_compressed,
+    sample_query_texts, compression_report, log_compression_report
+)
+from AI_Lawyer.components.store_io import (
+    INDEX_FILE, store_dir, read_index, write_vector_store, has_docstore, load_docstore
+)
+from AI_Lawyer.components.embedding_cache import EmbeddingCache, text_key
+from AI_Lawyer.components.model_registry import model_registry
+from AI_Lawyer.components.embedding_service import EmbeddingServiceClient
 from langchain.embeddings.base import Embeddings
 
 # Local Sentence-Transformer based embeddings (all-MiniLM-L6-v2)
 try:
     from sentence_transformers import SentenceTransformer
-    import numpy as np
 except Exception:
     SentenceTransformer = None
 
 
+def load_sentence_transformer(model_name, backend="torch", quantize="", offline=False,
+                              export_dir="artifacts/models", device=""):
+    """
+    Loads `model_name` on the PyTorch or ONNX Runtime backend.
+
+    For "onnx" the model is exported once to `export_dir/<model>-onnx` (via
+    optimum) and, with `quantize` set to an onnxruntime target ("avx2",
+    "avx512", "avx512_vnni" or "arm64"), dynamically quantized to int8 next
+    to it. Later loads read only that directory. With `offline` nothing is
+    fetched from the Hugging Face Hub, so the model must already be in the
+    local cache (or `model_name` be a local path). An empty `device` lets
+    sentence-transformers pick one.
+    """
+    device = device or None
+    if backend == "torch":
+        return SentenceTransformer(model_name, device=device, local_files_only=offline)
+    if backend != "onnx":
+        raise ValueError(f"Unknown embedding backend: {backend!r} (expected 'torch' or 'onnx')")
+
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(model_name)).strip("_")
+    target = Path(export_dir) / f"{slug}-onnx"
+    file_name = "onnx/model.onnx"
+
+    if not (target / file_name).exists():
+        logger.info(f"Exporting {model_name} to ONNX at {target}")
+        SentenceTransformer(model_name, backend="onnx", local_files_only=offline).save(str(target))
+
+    if quantize:
+        pattern = f"model_q*int8_{quantize}.onnx"
+        if not any((target / "onnx").glob(pattern)):
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            logger.info(f"Quantizing {target} to int8 ({quantize})")
+            fp32 = SentenceTransformer(str(target), backend="onnx", local_files_only=True,
+                                       model_kwargs={"file_name": file_name})
+            export_dynamic_quantized_onnx_model(fp32, quantize, str(target))
+        file_name = f"onnx/{sorted((target / 'onnx').glob(pattern))[0].name}"
+
+    return SentenceTransformer(str(target), backend="onnx", device=device, local_files_only=True,
+                               model_kwargs={"file_name": file_name})
+
+
+def shared_sentence_transformer(model_name, backend="torch", quantize="", offline=False,
+                                export_dir="artifacts/models", device=""):
+    """
+    The process-wide instance of a model, loaded through `model_registry` on
+    first use. Every caller asking for the same (model, backend, quantize,
+    device) gets the same object; run it only inside
+    `using_sentence_transformer`.
+    """
+    return model_registry.get(*_registry_entry(model_name, backend, quantize, offline, export_dir, device))
+
+
+def using_sentence_transformer(model_name, backend="torch", quantize="", offline=False,
+                               export_dir="artifacts/models", device=""):
+    """
+    Context manager around the shared model that keeps other threads from
+    running it at the same time (see `ModelRegistry.using`).
+    """
+    return model_registry.using(*_registry_entry(model_name, backend, quantize, offline, export_dir, device))
+
+
+def _registry_entry(model_name, backend, quantize, offline, export_dir, device):
+    if SentenceTransformer is None:
+        raise ImportError(
+            "sentence-transformers is not installed. Install it with `pip install sentence-transformers`"
+        )
+    key = (str(model_name), backend, quantize or "", device or "")
+    return key, lambda: load_sentence_transformer(model_name, backend, quantize, offline, export_dir, device)
+
+
 class LocalSentenceTransformerEmbeddings(Embeddings):
     """Embeddings wrapper using sentence-transformers for local inference.
 
     Implements LangChain's Embeddings interface with `embed_documents`
-    and `embed_query` using SentenceTransformer.encode.
+    and `embed_query` using SentenceTransformer.encode. `encode` is the
+    NumPy-native path used for indexing: texts are sorted by length and
+    encoded `batch_size` at a time (so each batch pads to similar lengths)
+    into one contiguous float32 (n, d) array, unit-normalised when
+    `normalize` is set, which goes to FAISS without list conversion.
+
+    `backend="onnx"` (optionally with int8 `quantize`) runs the same model on
+    ONNX Runtime instead of PyTorch; see `load_sentence_transformer`.
+
+    The model itself is not held here: it is loaded on first use and shared
+    through `model_registry`, so any number of these wrappers cost one copy.
+    Each model call holds the registry's use lock for that model, so
+    wrappers on different threads take turns instead of racing.
+    With `service_address` set, `encode` and `embed_query` are sent to an
+    EmbeddingService instead (one model for many processes, with concurrent
+    queries micro-batched); if the service cannot be reached the local
+    model is used.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64, normalize: bool = True,
+                 backend: str = "torch", quantize: str = "", offline: bool = False,
+                 export_dir: str = "artifacts/models", device: str = "", service_address: str = ""):
         if SentenceTransformer is None:
             raise ImportError(
                 "sentence-transformers is not installed. Install it with `pip install sentence-transformers`"
             )
         self.model_name = model_name
-        logger.info(f"Initializing local SentenceTransformer model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.normalize = normalize
+        self.backend = backend
+        self.quantize = quantize
+        self.offline = offline
+        self.export_dir = export_dir
+        self.device = device
+        self._dimension = None
+        self.service = EmbeddingServiceClient(service_address) if service_address else None
+        self._service_checked = False
+        logger.info(f"Using local SentenceTransformer model: {model_name} (backend={backend}"
+                    f"{', int8 ' + quantize if quantize else ''}{', device=' + device if device else ''}"
+                    f"{', via ' + service_address if service_address else ''})")
+
+    @property
+    def model(self):
+        return shared_sentence_transformer(self.model_name, self.backend, self.quantize, self.offline,
+                                           self.export_dir, self.device)
+
+    def _using_model(self):
+        return using_sentence_transformer(self.model_name, self.backend, self.quantize, self.offline,
+                                          self.export_dir, self.device)
+
+    def _use_service(self):
+        """True while the embedding service is configured and reachable, checking its model once."""
+        if self.service is None:
+            return False
+        if not self._service_checked:
+            try:
+                info = self.service.info()
+            except OSError as e:
+                logger.warning(f"Embedding service {self.service.address} unreachable ({e}); using the local model")
+                self.service = None
+                return False
+            if info["model"] != str(self.model_name):
+                raise ValueError(f"Embedding service {self.service.address} serves {info['model']!r}, "
+                                 f"not {self.model_name!r}")
+            if (info["backend"], info["quantize"]) != (self.backend, self.quantize):
+                logger.warning(f"Embedding service runs backend={info['backend']} quantize={info['quantize']!r}; "
+                               f"vectors may differ slightly from backend={self.backend} quantize={self.quantize!r}")
+            self._dimension = info["dimension"]
+            self._service_checked = True
+        return True
+
+    def _normalized(self, vectors):
+        if self.normalize and len(vectors):
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+        return vectors
+
+    @property
+    def dimension(self):
+        if self._dimension is None and self._use_service():
+            return self._dimension
+        if self._dimension is None:
+            model = self.model
+            # Renamed in newer sentence-transformers releases
+            get_dimension = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+            self._dimension = get_dimension()
+        return self._dimension
+
+    def encode(self, texts):
+        """Returns a C-contiguous float32 array of shape (len(texts), dimension)."""
+        try:
+            if self._use_service():
+                return self._normalized(self.service.encode(texts))
+            vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+            # Longest first, like sentence-transformers does within one call
+            order = np.argsort([-len(text) for text in texts], kind="stable")
+
+            for start in range(0, len(texts), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                # Locked per batch so queries on other threads can slip in between
+                with self._using_model() as model:
+                    vectors[batch] = model.encode(
+                        [texts[i] for i in batch],
+                        batch_size=len(batch),
+                        convert_to_numpy=True,
+                        normalize_embeddings=self.normalize,
+                        show_progress_bar=False,
+                    )
+            return vectors
+        except Exception as e:
+            logger.error(f"Error in encode: {e}")
+            raise
 
     def embed_documents(self, texts):
-        # sentence-transformers returns ndarray; convert to list[list[float]]
+        # LangChain expects list[list[float]]; indexing uses `encode` instead
         try:
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
-            # Ensure 2D
-            if embeddings.ndim == 1:
-                embeddings = np.expand_dims(embeddings, 0)
-            return [emb.tolist() for emb in embeddings]
+            return self.encode(list(texts)).tolist()
         except Exception as e:
             logger.error(f"Error in embed_documents: {e}")
             raise
 
     def embed_query(self, text):
         try:
-            emb = self.model.encode(text, convert_to_numpy=True)
+            if self._use_service():
+                return self._normalized(self.service.embed_query(text)).tolist()
+            # Normalised the same way as the indexed vectors
+            with self._using_model() as model:
+                emb = model.encode(text, convert_to_numpy=True, normalize_embeddings=self.normalize,
+                                   show_progress_bar=False)
             return emb.tolist()
         except Exception as e:
             logger.error(f"Error in embed_query: {e}")
@@ -51,42 +241,402 @@ class LocalSentenceTransformerEmbeddings(Embeddings):
 
 
 
+# ===========================================================
+# Multi-process embedding pool
+# ===========================================================
+
+# Each pool worker holds its own model copy here
+_worker_embedder = None
+
+
+def _init_embedding_worker(model_name, model_options, threads, core_sets):
+    """Pins the worker to its share of the cores, caps torch threads and loads the model."""
+    global _worker_embedder
+    try:
+        cores = core_sets.get_nowait()
+    except queue.Empty:
+        # A worker started to replace one that died: its core set went with it
+        cores = None
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+    _worker_embedder = LocalSentenceTransformerEmbeddings(model_name, **model_options)
+
+
+def _embed_shard(texts):
+    return _worker_embedder.encode(texts)
+
+
+def _worker_dimension():
+    return _worker_embedder.dimension
+
+
+class EmbeddingWorkerPool:
+    """
+    Shards `encode` calls across `num_workers` processes, each pinned to
+    `threads_per_worker` cores with its own model copy; for a small model
+    like MiniLM this scales better on CPU than one process with many torch
+    intra-op threads.
+
+    Texts are length-sorted before being cut into shards of `batch_size *
+    shard_batches`, so shards cost about the same and pad little; results
+    are scattered back into input order. `model_options` are passed on to
+    each worker's LocalSentenceTransformerEmbeddings.
+    """
+
+    def __init__(self, model_name, num_workers, threads_per_worker=1, shard_batches=4, **model_options):
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.shard_size = model_options.get("batch_size", 64) * shard_batches
+        self._dimension = None
+
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        step = max(threads_per_worker, 1)
+        # spawn, not fork: forking a process that already runs torch threads can deadlock
+        context = multiprocessing.get_context("spawn")
+        core_sets = context.Queue()
+        for worker in range(num_workers):
+            core_sets.put({available[(worker * step + k) % len(available)] for k in range(step)}
+                          if available else None)
+
+        logger.info(f"Starting embedding pool: {num_workers} workers x {threads_per_worker} threads")
+        self._pool = context.Pool(
+            processes=num_workers,
+            initializer=_init_embedding_worker,
+            initargs=(model_name, model_options, threads_per_worker, core_sets),
+        )
+
+    @property
+    def dimension(self):
+        if self._dimension is None:
+            self._dimension = self._pool.apply(_worker_dimension)
+        return self._dimension
+
+    def encode(self, texts):
+        """Same contract as LocalSentenceTransformerEmbeddings.encode."""
+        if not len(texts):
+            return np.empty((0, self.dimension), dtype=np.float32)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        shards = [order[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        vectors = None
+        for shard, shard_vectors in zip(shards, self._pool.imap(_embed_shard, [[texts[i] for i in shard] for shard in shards])):
+            if vectors is None:
+                self._dimension = shard_vectors.shape[1]
+                vectors = np.empty((len(texts), self._dimension), dtype=np.float32)
+            vectors[shard] = shard_vectors
+        return vectors
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+
 class EmbeddingCreator:
 
     def __init__(self, config: EmbeddingConfig):
         self.config = config
         self.model_name = config.model or "all-MiniLM-L6-v2"
         self.db_path = Path(config.vector_store_path)
+        self.worker_pool = None
+        self.cache = None
+        if config.cache_dir:
+            # Quantized backends give slightly different vectors, so they get their own cache
+            cache_model = self.model_name if config.backend == "torch" else \
+                f"{self.model_name}-{config.backend}{'-' + config.quantize if config.quantize else ''}"
+            self.cache = EmbeddingCache(
+                config.cache_dir,
+                cache_model,
+                normalize=config.normalize,
+                max_bytes=config.cache_max_mb * 1024 * 1024
+            )
 
     def get_embedding_model(self):
         """Return a local sentence-transformers based embeddings instance."""
         try:
             logger.info(f"Initializing local embedding model: {self.model_name}")
-            return LocalSentenceTransformerEmbeddings(self.model_name)
+            return LocalSentenceTransformerEmbeddings(self.model_name, **self._model_options())
         except Exception as e:
             logger.error(f"Failed to initialize local embedding model: {e}")
             raise
 
+    def has_vector_store(self):
+        return (store_dir(self.db_path) / INDEX_FILE).exists()
+
+    def saved_index_spec(self):
+        return load_index_params(store_dir(self.db_path)).get("index_spec", "Flat")
+
+    def load_vector_store(self, embedding_model=None, mmap=None):
+        """
+        Loads the saved store and applies its search-time parameters (from
+        the index_params.json sidecar, overridden by `search_params` in config).
+
+        Chunks come from the compact docstore, read lazily per search hit,
+        so no pickle is loaded. With `mmap` (default: `load_mode: mmap` in
+        config) the index is also memory-mapped read-only; such a store is
+        for querying only. Stores saved before the compact docstore existed
+        fall back to LangChain's pickle. Every file is read from the version
+        that was current when loading started.
+        """
+        mmap = self.config.load_mode == "mmap" if mmap is None else mmap
+        directory = store_dir(self.db_path)
+        if has_docstore(directory):
+            docstore, index_to_docstore_id = load_docstore(directory)
+            faiss_db = RerankingFAISS(embedding_model, read_index(directory, mmap=mmap),
+                                      docstore, index_to_docstore_id)
+        else:
+            faiss_db = RerankingFAISS.load_local(str(directory), embedding_model,
+                                                 allow_dangerous_deserialization=True)
+        if self.config.rerank_factor > 0 and RawVectors.exists(directory):
+            # Memory-mapped: only the candidates a query re-ranks are read
+            faiss_db.raw_vectors = RawVectors.load(directory, faiss_db.index.d)
+            faiss_db.rerank_factor = self.config.rerank_factor
+        saved = load_index_params(directory)
+        search_params = {**saved.get("search_params", {}), **self.config.search_params}
+        apply_search_params(faiss_db.index, search_params)
+        if search_params:
+            logger.info(f"Applied search params {search_params} to '{saved.get('index_spec', 'Flat')}' index")
+        return faiss_db
+
+    def save_vector_store(self, faiss_db, index_spec=None):
+        """
+        Saves the store plus its index spec and search parameters. Parameters
+        tuned for the previous save (tune_index.py) are kept while the spec
+        is unchanged; `search_params` in config override them.
+        """
+        write_vector_store(faiss_db, self.db_path, index_spec or self.config.index_spec, self.config.search_params)
+        logger.info(f"FAISS database saved successfully at: {self.db_path}")
+
+    def report_index(self, faiss_db, index_spec):
+        """Logs bytes/vector, size on disk and recall against flat for a saved compressed index."""
+        if is_compressed(index_spec):
+            queries = sample_query_texts(faiss_db)
+            query_vectors = faiss_db.embedding_function.embed_documents(queries) if queries else None
+            log_compression_report(compression_report(faiss_db, store_dir(self.db_path), index_spec, query_vectors))
+
+    def _model_options(self):
+        return dict(
+            batch_size=self.config.batch_size,
+            normalize=self.config.normalize,
+            backend=self.config.backend,
+            quantize=self.config.quantize,
+            offline=self.config.offline,
+            export_dir=self.config.export_dir,
+            device=self.config.device,
+            service_address=self.config.service_address
+        )
+
+    def _encode(self, texts, embedding_model):
+        """Runs the model over `texts`, on the worker pool when `num_workers > 1`, and logs throughput."""
+        # With an embedding service the model runs there, not in a local pool
+        if self.config.num_workers > 1 and self.worker_pool is None and not self.config.service_address:
+            self.worker_pool = EmbeddingWorkerPool(
+                self.model_name,
+                num_workers=self.config.num_workers,
+                threads_per_worker=self.config.threads_per_worker,
+                **self._model_options()
+            )
+
+        started = time.perf_counter()
+        if self.worker_pool is not None:
+            vectors = self.worker_pool.encode(texts)
+        else:
+            vectors = embedding_model.encode(texts)
+
+        seconds = time.perf_counter() - started
+        logger.info(
+            f"Encoded {len(texts)} chunks in {seconds:.1f}s ({len(texts) / max(seconds, 1e-9):.1f} chunks/s; "
+            f"workers={max(self.config.num_workers, 1)} threads/worker={self.config.threads_per_worker} "
+            f"batch_size={self.config.batch_size})"
+        )
+        return vectors
+
+    def close(self):
+        """Shuts down the embedding worker pool, if one was started."""
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
+        logger.info(f"Model registry:\n{model_registry.summary()}")
+
+    def embed_texts(self, texts, embedding_model):
+        """
+        (n, d) float32 vectors for `texts`, taken from the embedding cache
+        where possible; only cache misses go through the model.
+        """
+        if self.cache is None:
+            return self._encode(texts, embedding_model)
+
+        keys = [text_key(text) for text in texts]
+        rows = self.cache.lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+        logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+
+        if len(missing) == 0:
+            return self.cache.get(rows)
+
+        vectors = np.empty((len(texts), embedding_model.dimension), dtype=np.float32)
+        found = np.flatnonzero(rows >= 0)
+        if len(found):
+            vectors[found] = self.cache.get(rows[found])
+        vectors[missing] = self._encode([texts[i] for i in missing], embedding_model)
+        self.cache.put([keys[i] for i in missing], vectors[missing])
+        self.cache.save()
+        return vectors
+
+    def add_to_vector_store(self, faiss_db, text_chunks, embedding_model=None):
+        """
+        Embeds one batch of chunks (a ChunkStore or list of Documents) into
+        `faiss_db`, creating the store on the first batch. Used by the
+        streaming pipeline to build the index incrementally; call
+        `finish_streamed_store` and `save_vector_store` once the stream is done.
+        """
+        try:
+            embedding_model = embedding_model or self.get_embedding_model()
+            for texts, metadatas in iter_texts_and_metadatas(text_chunks):
+                faiss_db = self._add_texts(faiss_db, texts, metadatas, embedding_model)
+            return faiss_db
+
+        except Exception as e:
+            logger.error(f"Error while adding chunks to FAISS vector store: {e}")
+            raise
+
+    def _add_texts(self, faiss_db, texts, metadatas, embedding_model):
+        """Embeds one slice of chunks into `faiss_db`, or into a new store if it is None."""
+        if faiss_db is not None:
+            texts, metadatas = self._unembedded(faiss_db, texts, metadatas)
+            if not texts:
+                return faiss_db
+        vectors = self.embed_texts(texts, embedding_model)
+        if faiss_db is None:
+            index_spec = self.config.index_spec
+            if needs_training(index_spec, vectors.shape[1]):
+                # One batch is too small to train on; collect into Flat and convert at the end
+                index_spec = "Flat"
+            return build_faiss_store(texts, metadatas, vectors, embedding_model, index_spec=index_spec,
+                                     rerank_factor=self.config.rerank_factor)
+        add_vectors(faiss_db, texts, metadatas, vectors)
+        return faiss_db
+
+    def finish_streamed_store(self, faiss_db):
+        """Converts a streamed build to `index_spec` if it had to start as Flat for training."""
+        if needs_training(self.config.index_spec, faiss_db.index.d):
+            convert_index(faiss_db, self.config.index_spec, train_size=self.config.index_train_size,
+                          rerank_factor=self.config.rerank_factor)
+            logger.info(f"Converted streamed index to '{self.config.index_spec}'")
+        return faiss_db
+
     def create_vector_store(self, text_chunks):
         try:
             logger.info("Creating FAISS vector store using local embeddings...")
             embedding_model = self.get_embedding_model()
 
-            faiss_db = FAISS.from_documents(
-                text_chunks,
-                embedding_model
-            )
+            # Chunk texts come straight from the ChunkStore offsets, one slice at a time;
+            # an index that needs training is built as Flat and converted once every slice is in
+            faiss_db = self.add_to_vector_store(None, text_chunks, embedding_model)
+            if faiss_db is None:
+                raise ValueError("No chunks to embed")
+            faiss_db = self.finish_streamed_store(faiss_db)
+            logger.info(f"Embedded {faiss_db.index.ntotal} chunks -> "
+                        f"{faiss_db.index.ntotal * faiss_db.index.d * 4 / 1e6:.1f} MB of vectors")
+
+            self.save_vector_store(faiss_db)
+            self.report_index(faiss_db, self.config.index_spec)
+            return faiss_db
+
+        except Exception as e:
+            logger.error(f"Error during FAISS vector store creation: {e}")
+            raise
+        finally:
+            self.close()
+
+    @staticmethod
+    def _unembedded(faiss_db, texts, metadatas):
+        """The chunks not yet in `faiss_db`; those already there (moved documents) only get their new metadata."""
+        missing = refresh_chunks(faiss_db, texts, metadatas)
+        if len(missing) == len(texts):
+            return texts, metadatas
+        return [texts[i] for i in missing], [metadatas[i] for i in missing]
+
+    def remove_documents(self, faiss_db, content_hashes):
+        """Deletes every chunk of the given source documents (by content hash) from `faiss_db`."""
+        content_hashes = set(content_hashes)
+        stale = [doc_id for doc_id in faiss_db.index_to_docstore_id.values()
+                 if chunk_content_hash(doc_id) in content_hashes]
+        return remove_chunks(faiss_db, stale)
+
+    def update_vector_store(self, text_chunks, delta, embedding_model=None, stale_hashes=None):
+        """
+        Applies a document registry delta to the saved vector store instead
+        of rebuilding it: chunks of removed and changed documents (or of
+        `stale_hashes`, if given) are deleted by their stable ids, then
+        `text_chunks` (the chunks of the delta's dirty documents) are
+        embedded and added. Chunks already in the store, i.e. those of moved
+        documents, are re-labelled instead of re-embedded. Cost scales with
+        the delta, not the corpus.
+        """
+        try:
+            embedding_model = embedding_model or self.get_embedding_model()
+            faiss_db = self.load_vector_store(embedding_model, mmap=False)
+            if not is_id_mapped(faiss_db.index):
+                raise RuntimeError(f"The vector store at {self.db_path} has no stable chunk ids; "
+                                   f"run a full (non-incremental) build once")
 
-            # Ensure directory exists
-            self.db_path.mkdir(parents=True, exist_ok=True)
+            removed = self.remove_documents(faiss_db, delta.stale_hashes if stale_hashes is None else stale_hashes)
 
-            faiss_db.save_local(str(self.db_path))
+            added = 0
+            for texts, metadatas in iter_texts_and_metadatas(text_chunks):
+                texts, metadatas = self._unembedded(faiss_db, texts, metadatas)
+                if texts:
+                    vectors = self.embed_texts(texts, embedding_model)
+                    added += len(add_vectors(faiss_db, texts, metadatas, vectors))
 
-            logger.info(f"FAISS database saved successfully at: {self.db_path}")
+            self.save_vector_store(faiss_db, self.saved_index_spec())
+            logger.info(f"Incremental update ({delta.summary()}): removed {removed} chunks, added {added}; "
+                        f"index now holds {faiss_db.index.ntotal}")
             return faiss_db
 
         except Exception as e:
-            logger.error(f"Error during FAISS vector store creation: {e}")
+            logger.error(f"Error during incremental FAISS update: {e}")
+            raise
+        finally:
+            self.close()
+
+    def rebuild_vector_store(self, index_spec="Flat", embedding_model=None):
+        """
+        Rebuilds the saved vector store with a different FAISS index type
+        (`faiss.index_factory` spec) from cached vectors, without running the
+        model. Chunks and docstore ids are read from the saved store; every
+        chunk must already be in the embedding cache. Pass `embedding_model`
+        if the returned store will be queried directly.
+        """
+        try:
+            if self.cache is None:
+                raise RuntimeError("embeddings.cache_dir is not set; nothing to rebuild from")
+
+            saved = self.load_vector_store(embedding_model)
+            ids = list(saved.index_to_docstore_id.values())
+            documents = [saved.docstore.search(doc_id) for doc_id in ids]
+            texts = [doc.page_content for doc in documents]
+
+            rows = self.cache.lookup([text_key(text) for text in texts])
+            missing = int(np.sum(rows < 0))
+            if missing:
+                raise RuntimeError(f"{missing} of {len(texts)} chunks have no cached vector; re-run stage 03 first")
+
+            faiss_db = build_faiss_store(
+                texts, [doc.metadata for doc in documents], self.cache.get(rows),
+                embedding_model, ids=ids, index_spec=index_spec, train_size=self.config.index_train_size,
+                rerank_factor=self.config.rerank_factor
+            )
+            self.cache.save()
+            self.save_vector_store(faiss_db, index_spec)
+            self.report_index(faiss_db, index_spec)
+            logger.info(f"Rebuilt vector store as '{index_spec}' from {len(texts)} cached vectors")
+            return faiss_db
+
+        except Exception as e:
+            logger.error(f"Error while rebuilding FAISS vector store: {e}")
             raise
 
     def main(self, text_chunks):
@@ -0,0 +1,146 @@
+import gc
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def _rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _param_bytes(model):
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+class _Entry:
+    __slots__ = ("key", "model", "lock", "use_lock", "load_seconds", "rss_delta", "param_bytes", "last_used", "uses")
+
+    def __init__(self, key):
+        self.key = key
+        self.model = None
+        self.lock = threading.Lock()
+        self.use_lock = threading.RLock()
+        self.load_seconds = None
+        self.rss_delta = None
+        self.param_bytes = None
+        self.last_used = None
+        self.uses = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    `get(key, loader)` returns the model for `key` (e.g. model name, backend,
+    quantization, device), calling `loader()` only the first time. Loading is
+    lazy and thread-safe: concurrent callers for the same key wait for a
+    single load, while different keys load independently. Idle models can
+    be dropped with `unload_idle`, and `stats()` reports load time and the
+    memory each load took.
+
+    Models are shared, not copied, and most are not safe to run from two
+    threads at once (a HF fast tokenizer raises "Already borrowed"). Code
+    that runs a model wraps the call in `using(key, loader)`, which holds
+    that model's use lock; `get` alone is for reading attributes.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """
+        The shared model for `key`, loaded on first call. Not locked for use:
+        run it (encode, tokenize) only inside `using`.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry(key))
+
+        with entry.lock:
+            if entry.model is None:
+                rss_before = _rss_bytes()
+                started = time.perf_counter()
+                entry.model = loader()
+                entry.load_seconds = time.perf_counter() - started
+                rss_after = _rss_bytes()
+                entry.rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+                entry.param_bytes = _param_bytes(entry.model)
+                logger.info(f"Model registry: loaded {key} in {entry.load_seconds:.2f}s"
+                            + (f", +{entry.rss_delta / 1e6:.0f} MB RSS" if entry.rss_delta is not None else ""))
+            entry.last_used = time.monotonic()
+            entry.uses += 1
+            return entry.model
+
+    @contextmanager
+    def using(self, key, loader):
+        """Yields the model for `key` while no other thread is running it."""
+        model = self.get(key, loader)
+        with self._entries[key].use_lock:
+            yield model
+
+    def is_loaded(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry.model is not None
+
+    def unload(self, key):
+        """Drops the registry's reference to a model. Returns True if it was loaded."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        with entry.lock:
+            if entry.model is None:
+                return False
+            entry.model = None
+        gc.collect()
+        logger.info(f"Model registry: unloaded {key}")
+        return True
+
+    def unload_idle(self, max_idle_seconds=0):
+        """Unloads every model not used for `max_idle_seconds`. Returns the unloaded keys."""
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._entries.items()
+                    if entry.model is not None and now - entry.last_used >= max_idle_seconds]
+        return [key for key in idle if self.unload(key)]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._entries.values())
+        return [
+            {
+                "key": entry.key,
+                "loaded": entry.model is not None,
+                "load_seconds": entry.load_seconds,
+                "rss_delta_mb": entry.rss_delta / 1e6 if entry.rss_delta is not None else None,
+                "param_mb": entry.param_bytes / 1e6 if entry.param_bytes is not None else None,
+                "uses": entry.uses,
+                "idle_seconds": now - entry.last_used if entry.last_used is not None else None,
+            }
+            for entry in entries
+        ]
+
+    def summary(self):
+        lines = []
+        for stat in self.stats():
+            memory = "n/a" if stat["rss_delta_mb"] is None else f"{stat['rss_delta_mb']:.0f} MB RSS"
+            params = "" if stat["param_mb"] is None else f", {stat['param_mb']:.0f} MB params"
+            load = "n/a" if stat["load_seconds"] is None else f"{stat['load_seconds']:.2f}s"
+            lines.append(f"{stat['key']}: {'loaded' if stat['loaded'] else 'unloaded'}, "
+                         f"load {load}, {memory}{params}, uses={stat['uses']}")
+        return "\n".join(lines) or "no models loaded"
+
+
+# Shared by every EmbeddingCreator and the query path
+model_registry = ModelRegistry()
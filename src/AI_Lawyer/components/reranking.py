@@ -0,0 +1,246 @@
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+RAW_VECTORS_FILE = "raw_vectors.f32"
+RAW_LABELS_FILE = "raw_labels.npy"
+
+# Index types whose stored codes are lossy, so their distances are approximate
+_COMPRESSED = re.compile(r"(SQ|PQ|LSH|RQ|LSQ|RaBitQ)")
+
+
+def is_compressed(index_spec):
+    """True for index_factory specs that store quantized vectors (SQ8, SQfp16, PQ16, IVF1024,PQ32...)."""
+    return bool(_COMPRESSED.search(index_spec or ""))
+
+
+class RawVectors:
+    """
+    Full-precision vectors addressed by chunk label, kept next to a
+    compressed index for exact re-ranking.
+
+    On disk: `raw_vectors.f32` (float32 rows, sorted by label) and
+    `raw_labels.npy`. `load` memory-maps the vectors, so only the rows a
+    query re-ranks are paged in. Adds are buffered and merged on the next
+    lookup, remove or save.
+    """
+
+    def __init__(self, labels=None, vectors=None, dimension=None):
+        labels = np.asarray(labels if labels is not None else [], dtype=np.int64)
+        if vectors is None:
+            vectors = np.empty((0, dimension or 0), dtype=np.float32)
+        labels, first = np.unique(labels, return_index=True)
+        self.labels = labels
+        self.vectors = np.asarray(vectors, dtype=np.float32)[first] if len(first) else np.asarray(vectors, dtype=np.float32)
+        self._pending = []
+
+    def __len__(self):
+        self._merge()
+        return len(self.labels)
+
+    def add(self, labels, vectors):
+        self._pending.append((np.asarray(labels, dtype=np.int64), np.asarray(vectors, dtype=np.float32)))
+
+    def remove(self, labels):
+        self._merge()
+        keep = ~np.isin(self.labels, np.asarray(list(labels), dtype=np.int64))
+        self.labels, self.vectors = self.labels[keep], np.asarray(self.vectors[keep])
+
+    def _merge(self):
+        if not self._pending:
+            return
+        labels = np.concatenate([self.labels] + [labels for labels, _ in self._pending])
+        vectors = np.concatenate([np.asarray(self.vectors)] + [vectors for _, vectors in self._pending])
+        self._pending = []
+        # np.unique keeps the first occurrence, i.e. the already-stored vector
+        labels, first = np.unique(labels, return_index=True)
+        self.labels, self.vectors = labels, vectors[first]
+
+    def get(self, labels):
+        """Rows for `labels` (all must be present), in the order given."""
+        self._merge()
+        labels = np.asarray(labels, dtype=np.int64)
+        rows = np.searchsorted(self.labels, labels)
+        if len(rows) and (rows.max() >= len(self.labels) or np.any(self.labels[rows] != labels)):
+            raise KeyError("label without a raw vector; rebuild the vector store")
+        return np.asarray(self.vectors[rows])
+
+    def save(self, directory):
+        self._merge()
+        directory = Path(directory)
+        for name, write in ((RAW_VECTORS_FILE, lambda f: f.write(np.ascontiguousarray(self.vectors).tobytes())),
+                            (RAW_LABELS_FILE, lambda f: np.save(f, self.labels))):
+            # Replace rather than overwrite: a running process may have the old file mapped
+            tmp_path = directory / f"{name}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, directory / name)
+
+    @classmethod
+    def exists(cls, directory):
+        return (Path(directory) / RAW_LABELS_FILE).exists()
+
+    @classmethod
+    def load(cls, directory, dimension):
+        directory = Path(directory)
+        raw = cls(dimension=dimension)
+        raw.labels = np.load(directory / RAW_LABELS_FILE)
+        if len(raw.labels):
+            raw.vectors = np.memmap(directory / RAW_VECTORS_FILE, dtype=np.float32, mode="r",
+                                    shape=(len(raw.labels), dimension))
+        return raw
+
+    def nbytes(self):
+        self._merge()
+        return self.labels.nbytes + self.vectors.size * 4
+
+
+class RerankingFAISS(FAISS):
+    """
+    LangChain FAISS store that, when `raw_vectors` is set, over-fetches
+    `rerank_factor * k` candidates from its (compressed) index and orders
+    them by exact L2 distance to the full-precision vectors. Without raw
+    vectors it behaves exactly like FAISS.
+    """
+
+    raw_vectors = None
+    rerank_factor = 4
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        if self.raw_vectors is None:
+            return super().similarity_search_with_score_by_vector(embedding, k, filter, fetch_k, **kwargs)
+
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        fetch = max(k * self.rerank_factor, fetch_k if filter is not None else 0)
+        _, labels = self.index.search(vector, fetch)
+        labels = labels[0][labels[0] != -1]
+        if not len(labels):
+            return []
+
+        distances = np.sum((self.raw_vectors.get(labels) - vector) ** 2, axis=1)
+        order = np.argsort(distances, kind="stable")
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        score_threshold = kwargs.get("score_threshold")
+
+        docs = []
+        for row in order:
+            doc = self.docstore.search(self.index_to_docstore_id[int(labels[row])])
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for label {labels[row]}, got {doc}")
+            if filter_func is not None and not filter_func(doc.metadata):
+                continue
+            if score_threshold is not None and distances[row] > score_threshold:
+                continue
+            docs.append((doc, float(distances[row])))
+            if len(docs) == k:
+                break
+        return docs
+
+
+# -----------------------------------------------------------
+# Build report
+# -----------------------------------------------------------
+
+def _recall(found, truth):
+    return sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / truth.size
+
+
+def sample_query_texts(faiss_db, count=200, seed=0, max_chars=200):
+    """
+    Query-like texts for recall checks: the opening sentence of a sample of
+    stored chunks. Unlike the stored vectors themselves, their embeddings
+    are not in the index, so an index is not credited with finding the very
+    entries it was queried with.
+    """
+    doc_ids = list(faiss_db.index_to_docstore_id.values())
+    rng = np.random.default_rng(seed)
+    texts = []
+    for row in np.sort(rng.choice(len(doc_ids), min(count, len(doc_ids)), replace=False)):
+        doc = faiss_db.docstore.search(doc_ids[row])
+        if isinstance(doc, Document):
+            text = doc.page_content.split(".")[0].strip()[:max_chars]
+            if text:
+                texts.append(text)
+    return texts
+
+
+def compression_report(faiss_db, db_path, index_spec, query_vectors=None, k=10):
+    """
+    Size and accuracy of a saved compressed store: bytes per vector and size
+    on disk of the index (and raw side file), and, given `query_vectors`,
+    recall@k against exact search, without and with re-ranking. Needs
+    `faiss_db.raw_vectors`. Query with held-out embeddings (e.g. of
+    `sample_query_texts`): stored vectors find themselves and overstate
+    recall.
+    """
+    raw = faiss_db.raw_vectors
+    db_path = Path(db_path)
+    ntotal = max(faiss_db.index.ntotal, 1)
+    index_bytes = (db_path / "index.faiss").stat().st_size
+    raw_bytes = sum((db_path / name).stat().st_size for name in (RAW_VECTORS_FILE, RAW_LABELS_FILE)
+                    if (db_path / name).exists())
+    report = {
+        "index_spec": index_spec,
+        "vectors": faiss_db.index.ntotal,
+        "index_mb": index_bytes / 1e6,
+        "index_bytes_per_vector": index_bytes / ntotal,
+        "flat_bytes_per_vector": faiss_db.index.d * 4,
+        "raw_mb": raw_bytes / 1e6,
+    }
+    if raw is None or not len(raw) or query_vectors is None or not len(query_vectors):
+        return report
+
+    labels, vectors = raw.labels, np.asarray(raw.vectors)
+    sample = np.array(query_vectors, dtype=np.float32)
+    if faiss_db._normalize_L2:
+        faiss.normalize_L2(sample)
+    k = min(k, len(vectors))
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(sample, k)
+    truth = labels[truth]
+
+    started = time.perf_counter()
+    _, approx = faiss_db.index.search(sample, k)
+    approx_ms = (time.perf_counter() - started) * 1000 / len(sample)
+
+    fetch = k * faiss_db.rerank_factor
+    started = time.perf_counter()
+    _, candidates = faiss_db.index.search(sample, fetch)
+    reranked = []
+    for query, row in zip(sample, candidates):
+        row = row[row != -1]
+        distances = np.sum((raw.get(row) - query) ** 2, axis=1)
+        reranked.append(row[np.argsort(distances, kind="stable")[:k]])
+    rerank_ms = (time.perf_counter() - started) * 1000 / len(sample)
+
+    report.update({
+        f"recall@{k}": _recall(approx, truth),
+        f"recall@{k}_reranked": _recall(reranked, truth),
+        "ms_per_query": approx_ms,
+        "ms_per_query_reranked": rerank_ms,
+    })
+    return report
+
+
+def log_compression_report(report):
+    line = (f"Index '{report['index_spec']}': {report['vectors']} vectors, {report['index_mb']:.1f} MB on disk, "
+            f"{report['index_bytes_per_vector']:.0f} bytes/vector (flat: {report['flat_bytes_per_vector']}), "
+            f"raw side file {report['raw_mb']:.1f} MB")
+    recall = [key for key in report if key.startswith("recall@") and not key.endswith("_reranked")]
+    if recall:
+        key = recall[0]
+        line += (f"; {key} vs flat {report[key]:.4f} (loss {1 - report[key]:.4f}), "
+                 f"re-ranked {report[key + '_reranked']:.4f} (loss {1 - report[key + '_reranked']:.4f})")
+    logger.info(line)
@@ -0,0 +1,285 @@
+import os
+import json
+import shutil
+import dataclasses
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import faiss
+
+from AI_Lawyer.entity.config_entity import EmbeddingConfig, ShardingConfig
+from AI_Lawyer.components.data_ingestion import DataIngestion
+from AI_Lawyer.components.local_embedding import EmbeddingCreator
+from AI_Lawyer.components.chunk_store import ChunkStore, chunk_content_hash
+from AI_Lawyer.components.vector_index import stored_vectors
+from AI_Lawyer.utils.logging_setup import logger
+
+
+SHARDS_DIR = "shards"
+ROUTER_FILE = "router.json"
+ROUTER_VERSION = 1
+
+
+def domain_files(domains):
+    """PDF file name -> domain, from the domain -> source URLs mapping in config."""
+    return {DataIngestion.file_name_for(url): domain for domain, urls in domains.items() for url in urls}
+
+
+def split_by_domain(text_chunks, file_domains, default_domain="other"):
+    """
+    Groups chunks by the domain of their source PDF: {domain: chunks}. A
+    ChunkStore is split on its rows into per-domain ChunkStores sharing its
+    text, looking up each source document once; no Documents are built.
+    """
+    def domain(metadata):
+        return file_domains.get(Path(metadata.get("source", "")).name, default_domain)
+
+    if isinstance(text_chunks, ChunkStore):
+        doc_domains = [domain(metadata) for metadata in text_chunks.doc_metadata]
+        rows = {}
+        for i, doc_id in enumerate(text_chunks.doc_ids):
+            rows.setdefault(doc_domains[doc_id], []).append(i)
+        return {name: text_chunks.select(indices) for name, indices in rows.items()}
+
+    groups = {}
+    for document in text_chunks:
+        groups.setdefault(domain(document.metadata), []).append(document)
+    return groups
+
+
+def summarize_vectors(vectors, count=8, seed=0):
+    """
+    Up to `count` unit-length k-means centroids of a shard's vectors. A
+    query is routed by its best match among them, so a shard covering
+    several topics (e.g. the criminal codes and the Evidence Act) is not
+    reduced to one blurred mean.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    # k-means needs a few dozen points per centroid to be meaningful
+    count = max(1, min(count, len(vectors) // 39))
+    if count == 1:
+        centroids = vectors.mean(axis=0, keepdims=True)
+    else:
+        kmeans = faiss.Kmeans(vectors.shape[1], count, niter=20, seed=seed)
+        kmeans.train(vectors)
+        centroids = kmeans.centroids
+    centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+    faiss.normalize_L2(centroids)
+    return centroids
+
+
+def shard_vectors(faiss_db):
+    """All vectors of a shard: the full-precision side file when there is one, else read back from the index."""
+    raw = getattr(faiss_db, "raw_vectors", None)
+    if raw is not None and len(raw):
+        return np.asarray(raw.vectors)
+    return stored_vectors(faiss_db.index)[1]
+
+
+class ShardRouter:
+    """
+    Query side of a sharded store. Scores every shard by the best inner
+    product between the query vector and the shard's centroids, searches
+    the `top_shards` best shards in parallel and merges their hits by
+    distance. Provides the FAISS search methods QueryComponent uses, so it
+    can stand in for a single store.
+    """
+
+    def __init__(self, shards, centroids, embedding_model, top_shards=3, workers=4):
+        self.shards = shards
+        self.domains = sorted(shards)
+        self.embedding_function = embedding_model
+        self.top_shards = top_shards
+        self.centroids = np.vstack([centroids[domain] for domain in self.domains]).astype(np.float32)
+        # Row i of `centroids` belongs to shard `owners[i]`
+        self.owners = np.repeat(np.arange(len(self.domains)), [len(centroids[domain]) for domain in self.domains])
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="shard-search")
+
+    def route(self, vector):
+        """[(domain, score)] of the shards to search for `vector`, best first."""
+        scores = self.centroids @ np.asarray(vector, dtype=np.float32)
+        best = np.full(len(self.domains), -np.inf, dtype=np.float32)
+        np.maximum.at(best, self.owners, scores)
+        order = np.argsort(-best, kind="stable")
+        if self.top_shards > 0:
+            order = order[:self.top_shards]
+        return [(self.domains[i], float(best[i])) for i in order]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, domains=None, **kwargs):
+        """Top `k` (Document, distance) over the routed shards (or the given `domains`)."""
+        if domains is None:
+            routed = self.route(embedding)
+            logger.info("Routed query to shards: " + ", ".join(f"{d} ({s:.3f})" for d, s in routed))
+            domains = [domain for domain, _ in routed]
+
+        futures = [
+            (domain, self.pool.submit(self.shards[domain].similarity_search_with_score_by_vector,
+                                      embedding, k, **kwargs))
+            for domain in domains
+        ]
+        hits = []
+        for domain, future in futures:
+            for document, score in future.result():
+                document.metadata["shard"] = domain
+                hits.append((document, score))
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [document for document, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+class ShardedVectorStore:
+    """
+    One vector store per legal domain under <vector_store_path>/shards/<domain>
+    and a router.json with each shard's centroids and content hashes.
+
+    Every shard is an ordinary store handled by its own EmbeddingCreator
+    (same index spec, cache and save format), so a shard can be built,
+    updated or rebuilt without reading or rewriting the others.
+    """
+
+    def __init__(self, embed_config: EmbeddingConfig, shard_config: ShardingConfig):
+        self.embed_config = embed_config
+        self.config = shard_config
+        self.root = Path(embed_config.vector_store_path) / SHARDS_DIR
+        self.router_path = self.root / ROUTER_FILE
+        self.file_domains = domain_files(shard_config.domains)
+
+    def domain_of(self, pdf_file):
+        return self.file_domains.get(Path(pdf_file).name, self.config.default_domain)
+
+    def files_for(self, domains, pdf_dir):
+        """The PDFs in `pdf_dir` that belong to `domains`."""
+        domains = set(domains)
+        return [path for path in sorted(Path(pdf_dir).glob("*.pdf")) if self.domain_of(path) in domains]
+
+    def creator(self, domain, cache=True):
+        """An EmbeddingCreator for one shard; query-only callers skip the embedding cache."""
+        config = dataclasses.replace(self.embed_config, vector_store_path=str(self.root / domain))
+        if not cache:
+            config = dataclasses.replace(config, cache_dir=None)
+        return EmbeddingCreator(config=config)
+
+    # --------------------------------------------------------------------
+    # ROUTER TABLE
+    # --------------------------------------------------------------------
+    def exists(self):
+        return self.router_path.exists()
+
+    def load_table(self):
+        if not self.router_path.exists():
+            return {}
+        with open(self.router_path, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        if content.get("version") != ROUTER_VERSION:
+            raise ValueError(f"Unsupported router version {content.get('version')} in {self.router_path}")
+        return content["shards"]
+
+    def save_table(self, table):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.router_path.with_name(self.router_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": ROUTER_VERSION, "shards": table}, f)
+        os.replace(tmp_path, self.router_path)
+
+    def describe(self, faiss_db):
+        """Router entry of a saved shard: centroids, vector count and the documents it holds."""
+        return {
+            "vectors": int(faiss_db.index.ntotal),
+            "centroids": summarize_vectors(shard_vectors(faiss_db), self.config.centroids_per_shard).tolist(),
+            "content_hashes": sorted({chunk_content_hash(doc_id) for doc_id in faiss_db.index_to_docstore_id.values()}),
+        }
+
+    def drop(self, domain, table):
+        shutil.rmtree(self.root / domain, ignore_errors=True)
+        if table.pop(domain, None) is not None:
+            logger.info(f"Removed shard '{domain}'")
+
+    # --------------------------------------------------------------------
+    # BUILD / UPDATE
+    # --------------------------------------------------------------------
+    def build(self, text_chunks, domains=None):
+        """
+        Builds one shard per domain present in `text_chunks`. With `domains`
+        only those shards are (re)built, from the chunks given, and every
+        other shard is left untouched; otherwise shards whose domain has no
+        chunks any more are removed.
+        """
+        groups = split_by_domain(text_chunks, self.file_domains, self.config.default_domain)
+        table = self.load_table()
+        targets = set(domains) if domains else set(groups) | set(table)
+
+        for domain in sorted(targets):
+            chunks = groups.get(domain)
+            if not chunks:
+                self.drop(domain, table)
+                continue
+            logger.info(f"Building shard '{domain}' from {len(chunks)} chunks")
+            faiss_db = self.creator(domain).create_vector_store(chunks)
+            table[domain] = self.describe(faiss_db)
+
+        self.save_table(table)
+        logger.info(f"Sharded store: {len(table)} shards, "
+                    f"{sum(entry['vectors'] for entry in table.values())} vectors at {self.root}")
+        return table
+
+    def update(self, text_chunks, delta):
+        """
+        Applies a document registry delta shard by shard: only shards that
+        receive chunks or hold a stale document (per router.json) are
+        loaded, updated and saved. Besides the delta's stale content, a
+        shard drops content no file of its domain holds any more, e.g. a
+        PDF renamed into another domain.
+        """
+        groups = split_by_domain(text_chunks, self.file_domains, self.config.default_domain)
+        live = {}
+        for path, digest in delta.hashes.items():
+            live.setdefault(self.domain_of(path), set()).add(digest)
+        table = self.load_table()
+
+        for domain in sorted(set(groups) | set(table)):
+            chunks = groups.get(domain, [])
+            held = set(table.get(domain, {}).get("content_hashes", []))
+            stale = (delta.stale_hashes | (held - live.get(domain, set()))) & held
+            if not chunks and not stale:
+                continue
+            creator = self.creator(domain)
+            if creator.has_vector_store():
+                faiss_db = creator.update_vector_store(chunks, delta, stale_hashes=stale)
+            else:
+                faiss_db = creator.create_vector_store(chunks)
+            if faiss_db.index.ntotal == 0:
+                self.drop(domain, table)
+            else:
+                table[domain] = self.describe(faiss_db)
+
+        self.save_table(table)
+        return table
+
+    # --------------------------------------------------------------------
+    # QUERY
+    # --------------------------------------------------------------------
+    def load(self, embedding_model=None):
+        """Loads every shard in router.json (memory-mapped with `load_mode: mmap`) behind a ShardRouter."""
+        table = self.load_table()
+        if not table:
+            raise FileNotFoundError(f"No shards at {self.root}; build them first")
+        embedding_model = embedding_model or self.creator(self.config.default_domain, cache=False).get_embedding_model()
+        shards, centroids = {}, {}
+        for domain, entry in table.items():
+            shards[domain] = self.creator(domain, cache=False).load_vector_store(embedding_model)
+            centroids[domain] = np.asarray(entry["centroids"], dtype=np.float32)
+        logger.info(f"Loaded {len(shards)} shards: " + ", ".join(f"{d} ({table[d]['vectors']})" for d in sorted(table)))
+        return ShardRouter(shards, centroids, embedding_model,
+                           top_shards=self.config.top_shards, workers=self.config.search_workers)
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+from collections.abc import MutableMapping
+
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+
+from AI_Lawyer.components.vector_index import (
+    INDEX_PARAMS_FILE, chunk_label, apply_search_params, save_index_params, load_index_params
+)
+from AI_Lawyer.components.reranking import RAW_VECTORS_FILE, RAW_LABELS_FILE
+from AI_Lawyer.utils.logging_setup import logger
+
+
+INDEX_FILE = "index.faiss"
+
+# Every save writes a new directory under VERSIONS_DIR; CURRENT_FILE names the live one
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+
+# Compact docstore, written by `save_docstore`
+CHUNKS_FILE = "chunks.bin"            # docstore id + text of every chunk, back to back (UTF-8)
+ROWS_FILE = "docstore_rows.npy"       # one fixed-width row per chunk, in FAISS label order
+LABELS_FILE = "docstore_labels.npy"   # sorted FAISS labels (int64), row i <-> labels[i]
+KEYS_FILE = "docstore_keys.npy"       # (2, n) int64: sorted chunk_label(docstore id), and its row
+META_FILE = "docstore_meta.json"      # interned metadata table
+DOCSTORE_VERSION = 2
+
+# Earlier formats, superseded by the files above; removed with the unversioned layout
+LEGACY_FILES = ("index.pkl", "docstore.json")
+
+_ROW = np.dtype([
+    ("offset", "<i8"), ("id_length", "<i4"), ("text_length", "<i4"),
+    ("meta", "<i4"), ("start_index", "<i4"), ("page", "<i4"), ("page_end", "<i4"),
+])
+
+# Per-chunk integer metadata kept in row columns (-1: absent); the rest is interned
+_COLUMNS = ("start_index", "page", "page_end")
+
+# Flat codes are used in place from the mapped file (older faiss: IVF lists only)
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def store_dir(db_path):
+    """
+    The directory holding the live files of the store at `db_path`: the
+    version CURRENT points to, or `db_path` itself for stores saved before
+    saves were versioned. Readers resolve it once and read every file of
+    the store from it, so they never mix files of two saves.
+    """
+    db_path = Path(db_path)
+    try:
+        version = (db_path / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return db_path
+    return db_path / VERSIONS_DIR / version
+
+
+def read_index(db_path, mmap=False):
+    """
+    Reads `index.faiss`. With `mmap` the file is mapped read-only instead of
+    copied onto the heap: load is near-instant and processes reading the
+    same file share its pages through the OS page cache. A mapped index
+    must not be modified (add / remove).
+    """
+    return faiss.read_index(str(Path(db_path) / INDEX_FILE), MMAP_FLAGS if mmap else 0)
+
+
+def _is_column_value(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2 ** 31
+
+
+def save_docstore(faiss_db, db_path):
+    """
+    Writes the chunks of `faiss_db` as a compact docstore: texts in one
+    contiguous file addressed by offsets, fixed-width rows in FAISS label
+    order, and a table of the distinct metadata dicts (without the
+    per-chunk page / start_index numbers, which go into row columns).
+    """
+    db_path = Path(db_path)
+    labels = sorted(faiss_db.index_to_docstore_id)
+    rows = np.zeros(len(labels), dtype=_ROW)
+    meta_table, meta_index = [], {}
+    offset = 0
+    with open(db_path / CHUNKS_FILE, "wb") as f:
+        for row, label in enumerate(labels):
+            doc_id = faiss_db.index_to_docstore_id[label]
+            document = faiss_db.docstore.search(doc_id)
+            if not isinstance(document, Document):
+                raise ValueError(f"Could not find document for label {label}, got {document}")
+            id_bytes = doc_id.encode("utf-8")
+            text_bytes = document.page_content.encode("utf-8")
+            f.write(id_bytes)
+            f.write(text_bytes)
+
+            metadata = dict(document.metadata)
+            columns = {name: metadata.pop(name) for name in _COLUMNS if _is_column_value(metadata.get(name))}
+            key = json.dumps(metadata, sort_keys=True, ensure_ascii=False, default=str)
+            if key not in meta_index:
+                meta_index[key] = len(meta_table)
+                meta_table.append(json.loads(key))
+
+            rows[row] = (offset, len(id_bytes), len(text_bytes), meta_index[key],
+                         *(columns.get(name, -1) for name in _COLUMNS))
+            offset += len(id_bytes) + len(text_bytes)
+
+    # Searched with np.searchsorted, so kept as plain contiguous int64 arrays
+    keys = np.array([chunk_label(faiss_db.index_to_docstore_id[label]) for label in labels], dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    keys = np.stack([keys[order], order.astype(np.int64)]) if len(labels) else np.zeros((2, 0), dtype=np.int64)
+
+    np.save(db_path / ROWS_FILE, rows)
+    np.save(db_path / LABELS_FILE, np.asarray(labels, dtype=np.int64))
+    np.save(db_path / KEYS_FILE, keys)
+    with open(db_path / META_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": DOCSTORE_VERSION, "metadata": meta_table}, f, ensure_ascii=False)
+
+
+def has_docstore(db_path):
+    return (Path(db_path) / ROWS_FILE).exists()
+
+
+class CompactDocstore(Docstore):
+    """
+    Docstore over the files written by `save_docstore`. Rows, keys and
+    texts are memory-mapped and a `Document` is built only for the chunk a
+    search hit asks for, so load time and resident memory hardly depend on
+    the number of chunks. Adds and deletes are held in memory on top of the
+    saved files until the store is saved again.
+    """
+
+    def __init__(self, db_path):
+        db_path = Path(db_path)
+        with open(db_path / META_FILE, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        if content.get("version") != DOCSTORE_VERSION:
+            raise ValueError(f"Unsupported docstore version {content.get('version')} in {db_path}")
+        self.metadata_table = content["metadata"]
+        self.rows = np.load(db_path / ROWS_FILE, mmap_mode="r")
+        self.labels = np.load(db_path / LABELS_FILE, mmap_mode="r")
+        self.keys, self.key_rows = np.load(db_path / KEYS_FILE, mmap_mode="r")
+        # np.memmap refuses empty files
+        chunks_path = db_path / CHUNKS_FILE
+        self.chunks = (np.memmap(chunks_path, dtype=np.uint8, mode="r") if chunks_path.stat().st_size
+                       else np.empty(0, dtype=np.uint8))
+        self._added = {}
+        self._deleted = set()
+
+    def doc_id(self, row):
+        entry = self.rows[row]
+        start = int(entry["offset"])
+        return bytes(self.chunks[start:start + int(entry["id_length"])]).decode("utf-8")
+
+    def document(self, row):
+        entry = self.rows[row]
+        start = int(entry["offset"]) + int(entry["id_length"])
+        text = bytes(self.chunks[start:start + int(entry["text_length"])]).decode("utf-8")
+        metadata = dict(self.metadata_table[int(entry["meta"])])
+        for name in _COLUMNS:
+            if entry[name] >= 0:
+                metadata[name] = int(entry[name])
+        return Document(page_content=text, metadata=metadata)
+
+    def row_of(self, doc_id):
+        """Row of a saved chunk by docstore id, or None."""
+        key = chunk_label(doc_id)
+        position = int(np.searchsorted(self.keys, key))
+        while position < len(self.keys) and self.keys[position] == key:
+            row = int(self.key_rows[position])
+            if self.doc_id(row) == doc_id:
+                return row
+            position += 1
+        return None
+
+    def search(self, search):
+        if search in self._added:
+            return self._added[search]
+        row = None if search in self._deleted else self.row_of(search)
+        if row is None:
+            return f"ID {search} not found."
+        return self.document(row)
+
+    def add(self, texts):
+        self._added.update(texts)
+        self._deleted.difference_update(texts)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            if self._added.pop(doc_id, None) is None:
+                self._deleted.add(doc_id)
+
+
+class LabelMap(MutableMapping):
+    """
+    `index_to_docstore_id` over the rows of a `CompactDocstore`: FAISS
+    label -> docstore id by binary search on the mapped label column.
+    Changes are kept in memory like the docstore's.
+    """
+
+    def __init__(self, docstore):
+        self.docstore = docstore
+        self.labels = docstore.labels
+        self._added = {}
+        self._removed = set()
+
+    def _row(self, label):
+        position = int(np.searchsorted(self.labels, label))
+        if position < len(self.labels) and self.labels[position] == label and label not in self._removed:
+            return position
+        return None
+
+    def __contains__(self, label):
+        return label in self._added or self._row(label) is not None
+
+    def __getitem__(self, label):
+        if label in self._added:
+            return self._added[label]
+        row = self._row(label)
+        if row is None:
+            raise KeyError(label)
+        return self.docstore.doc_id(row)
+
+    def __setitem__(self, label, doc_id):
+        if self._row(label) is not None:
+            self._removed.add(label)
+        self._added[label] = doc_id
+
+    def __delitem__(self, label):
+        if label in self._added:
+            del self._added[label]
+        elif self._row(label) is not None:
+            self._removed.add(label)
+        else:
+            raise KeyError(label)
+
+    def __iter__(self):
+        for label in self.labels.tolist():
+            if label not in self._removed:
+                yield label
+        yield from list(self._added)
+
+    def __len__(self):
+        return len(self.labels) - len(self._removed) + len(self._added)
+
+
+def load_docstore(db_path):
+    """Returns (docstore, index_to_docstore_id) over the compact docstore at `db_path`."""
+    docstore = CompactDocstore(db_path)
+    return docstore, LabelMap(docstore)
+
+
+def save_store(faiss_db, directory):
+    """Writes index.faiss and the compact docstore (no pickle) into `directory`."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(faiss_db.index, str(directory / INDEX_FILE))
+    save_docstore(faiss_db, directory)
+    logger.debug(f"Saved {faiss_db.index.ntotal} vectors to {directory}")
+
+
+def _prune_versions(db_path, keep):
+    """Deletes saved versions other than `keep` ("" stands for the files saved before versioning)."""
+    for version in (db_path / VERSIONS_DIR).iterdir():
+        if version.name not in keep:
+            shutil.rmtree(version, ignore_errors=True)
+    if "" not in keep:
+        for name in (INDEX_FILE, CHUNKS_FILE, ROWS_FILE, LABELS_FILE, KEYS_FILE, META_FILE, INDEX_PARAMS_FILE,
+                     RAW_VECTORS_FILE, RAW_LABELS_FILE, *LEGACY_FILES):
+            (db_path / name).unlink(missing_ok=True)
+
+
+def write_vector_store(faiss_db, db_path, index_spec, search_params=None):
+    """
+    Saves a built store with everything that goes with it: index and
+    docstore (`save_store`), the index spec and search parameters
+    (index_params.json) and the full-precision vectors kept for re-ranking.
+    Parameters tuned for the previous save (tune_index.py) are kept while
+    the spec is unchanged; `search_params` override them.
+
+    All files go into a new directory under versions/, and the store only
+    switches to it when CURRENT is replaced, in one rename. Readers see
+    either the previous save or this one, never a mix. The previous
+    version is kept, because a reader may have just resolved it.
+    """
+    db_path = Path(db_path)
+    live = store_dir(db_path)
+    previous = load_index_params(live)
+    tuned = previous.get("search_params", {}) if previous.get("index_spec") == index_spec else {}
+    search_params = {**tuned, **(search_params or {})}
+    apply_search_params(faiss_db.index, search_params)
+
+    (db_path / VERSIONS_DIR).mkdir(parents=True, exist_ok=True)
+    version = Path(tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=db_path / VERSIONS_DIR))
+    try:
+        os.chmod(version, 0o755)
+        save_store(faiss_db, version)
+        save_index_params(version, index_spec, search_params)
+        if getattr(faiss_db, "raw_vectors", None) is not None:
+            faiss_db.raw_vectors.save(version)
+
+        tmp_path = db_path / f"{CURRENT_FILE}.tmp"
+        tmp_path.write_text(version.name, encoding="utf-8")
+        os.replace(tmp_path, db_path / CURRENT_FILE)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    _prune_versions(db_path, {version.name, live.name if live != db_path else ""})
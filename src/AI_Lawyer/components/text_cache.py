@@ -0,0 +1,103 @@
+import os
+import json
+import zlib
+from pathlib import Path
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+class ExtractedTextCache:
+    """
+    On-disk cache of extracted page text, keyed by file content hash and
+    parser version.
+
+    Each entry is one zlib-compressed JSON file holding the metadata shared by
+    every page once, plus the text and remaining metadata (page number etc.)
+    of each page. Reads refresh an entry's mtime, and `evict()` removes least
+    recently used entries until the cache fits in `max_bytes`.
+    """
+
+    SUFFIX = ".json.z"
+
+    def __init__(self, cache_dir, parser_version, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+
+    def _path(self, content_hash):
+        return self.cache_dir / f"{content_hash}-{self.parser_version}{self.SUFFIX}"
+
+    def has(self, content_hash):
+        return self._path(content_hash).exists()
+
+    def get(self, content_hash, source):
+        """
+        Returns the cached (text, metadata) pages for a document, or None.
+        `source` replaces the stored path so renamed files still cite correctly.
+        """
+        path = self._path(content_hash)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Discarding corrupt text cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        common = dict(entry["common"], source=source, file_path=source)
+        return [
+            (text, dict(common, **extra))
+            for text, extra in zip(entry["texts"], entry["extras"])
+        ]
+
+    def put(self, content_hash, pages):
+        """Stores the (text, metadata) pages of a fully parsed document."""
+        if not pages:
+            return
+        path_keys = ("source", "file_path")
+        common = {
+            k: v for k, v in pages[0][1].items()
+            if k not in path_keys and all(metadata.get(k) == v for _, metadata in pages)
+        }
+        entry = {
+            "common": common,
+            "texts": [text for text, _ in pages],
+            "extras": [
+                {k: v for k, v in metadata.items() if k not in common and k not in path_keys}
+                for _, metadata in pages
+            ],
+        }
+        path = self._path(content_hash)
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"), 6))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write text cache entry {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        logger.info(f"Text cache evicted {removed} entries, now {total / 1e6:.1f} MB")
@@ -0,0 +1,175 @@
+import os
+import json
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+try:
+    from transformers import AutoTokenizer
+    from huggingface_hub import hf_hub_download
+except ImportError:
+    AutoTokenizer = None
+
+
+# Cut points tried from strongest to weakest when a window has to be split
+SEPARATORS = ("\n\n", "\n", ". ", "; ", " ")
+
+
+class TokenSpans:
+    """
+    Token offsets of one text, as produced by the embedding tokenizer.
+
+    The text is tokenized once; afterwards the token count of any character
+    span is a pair of binary searches over the token start/end offsets, so
+    chunkers can measure candidate chunks without re-tokenizing them.
+    """
+
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text, offsets):
+        self.text = text
+        # Fast tokenizers may report empty offsets for special / unknown tokens
+        offsets = [(s, e) for s, e in offsets if e > s]
+        self.starts = array("q", (s for s, _ in offsets))
+        self.ends = array("q", (e for _, e in offsets))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def count(self, start, end):
+        """Number of tokens lying entirely inside text[start:end]."""
+        return max(0, bisect_right(self.ends, end) - bisect_left(self.starts, start))
+
+    def _cut(self, low, high):
+        """Latest separator end in text[low:high], or None."""
+        for separator in SEPARATORS:
+            position = self.text.rfind(separator, low, high)
+            if position >= 0:
+                return position + len(separator)
+        return None
+
+    def windows(self, start, end, size, overlap=0):
+        """
+        Splits text[start:end] into (start, end) spans of at most `size`
+        tokens. Each window is cut at the strongest separator in its second
+        half; consecutive windows share up to `overlap` tokens, starting on a
+        word boundary.
+        """
+        first = bisect_left(self.starts, start)
+        last = bisect_right(self.ends, end)
+        overlap = min(overlap, size - 1)
+        spans = []
+
+        i = first
+        while i < last:
+            j = min(i + size, last)
+            span_start = self.starts[i]
+            span_end = end if j == last else self.ends[j - 1]
+
+            if j < last:
+                cut = self._cut(self.starts[i + (j - i) // 2], span_end)
+                if cut is not None and cut > span_start:
+                    span_end = cut
+
+            while span_end > span_start and self.text[span_end - 1].isspace():
+                span_end -= 1
+            taken = bisect_right(self.ends, span_end, lo=i)
+            if taken <= i:
+                taken, span_end = j, self.ends[j - 1]
+
+            spans.append((span_start, span_end))
+            if taken >= last:
+                break
+
+            following = max(taken - overlap, i + 1)
+            # Don't open the next window in the middle of a word
+            while following < taken and self.starts[following] > 0 \
+                    and self.text[self.starts[following] - 1].isalnum():
+                following += 1
+            i = following
+
+        return spans
+
+
+def _model_file(repo, filename, offline):
+    """Local path of one file of a model directory or hub repo, or None if it has none."""
+    if os.path.isdir(repo):
+        path = os.path.join(repo, filename)
+        return path if os.path.exists(path) else None
+    try:
+        return hf_hub_download(repo, filename, local_files_only=offline)
+    except OSError:
+        return None
+
+
+def load_tokenizer(model_name, offline=False):
+    """
+    The tokenizer and max_seq_length of a sentence-transformers model, read
+    from the model's files without loading its weights. Short names resolve
+    to the sentence-transformers organisation, as SentenceTransformer does.
+    """
+    if AutoTokenizer is None:
+        raise ImportError("transformers is not installed. Install it with `pip install sentence-transformers`")
+    repo = str(model_name)
+    if not os.path.isdir(repo) and "/" not in repo:
+        repo = f"sentence-transformers/{repo}"
+
+    # The Transformer module's folder holds the tokenizer and its sentence_bert_config.json
+    subfolder = ""
+    modules = _model_file(repo, "modules.json", offline)
+    if modules:
+        with open(modules, "r", encoding="utf-8") as f:
+            subfolder = next((module["path"] for module in json.load(f)
+                              if module["type"].endswith("Transformer")), "")
+
+    tokenizer = AutoTokenizer.from_pretrained(os.path.join(repo, subfolder) if os.path.isdir(repo) else repo,
+                                              subfolder="" if os.path.isdir(repo) else subfolder,
+                                              local_files_only=offline)
+    max_seq_length = None
+    config = _model_file(repo, f"{subfolder}/sentence_bert_config.json".lstrip("/"), offline)
+    if config:
+        with open(config, "r", encoding="utf-8") as f:
+            max_seq_length = json.load(f).get("max_seq_length")
+    if max_seq_length is None:
+        # Tokenizers without a limit report a huge sentinel
+        max_seq_length = tokenizer.model_max_length if tokenizer.model_max_length < 100_000 else 512
+    return tokenizer, max_seq_length
+
+
+class TokenCounter:
+    """
+    Measures text in tokens of an embedding model's own tokenizer.
+
+    `max_tokens` is the model's max sequence length less the special tokens
+    the tokenizer adds, i.e. the largest chunk the model reads in full. Only
+    the tokenizer is loaded, never the model weights, so counting costs the
+    same whichever backend (or remote service) does the embedding.
+
+    A fast tokenizer refuses concurrent calls ("Already borrowed"), so calls
+    into this counter's own tokenizer take a lock.
+    """
+
+    def __init__(self, model_name, batch_size=64, offline=False):
+        self.model_name = model_name
+        self.tokenizer, self.max_seq_length = load_tokenizer(model_name, offline=offline)
+        self._lock = threading.Lock()
+        self.max_tokens = self.max_seq_length - self.tokenizer.num_special_tokens_to_add()
+        self.batch_size = batch_size
+
+    def measure(self, texts):
+        """Returns a TokenSpans per text, tokenizing `batch_size` texts per call."""
+        measured = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = list(texts[i:i + self.batch_size])
+            with self._lock:
+                encoded = self.tokenizer(
+                    batch,
+                    add_special_tokens=False,
+                    return_offsets_mapping=True,
+                    return_attention_mask=False,
+                    return_token_type_ids=False,
+                    verbose=False,
+                )
+            measured.extend(TokenSpans(text, offsets)
+                            for text, offsets in zip(batch, encoded["offset_mapping"]))
+        return measured
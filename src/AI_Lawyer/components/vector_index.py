@@ -0,0 +1,285 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+from AI_Lawyer.components.chunk_store import chunk_id
+from AI_Lawyer.components.reranking import RerankingFAISS, RawVectors, is_compressed
+from AI_Lawyer.utils.logging_setup import logger
+
+
+# Written next to index.faiss and the docstore files by `save_index_params`
+INDEX_PARAMS_FILE = "index_params.json"
+
+
+def as_float32_matrix(vectors):
+    """Contiguous float32 (n, d) view of `vectors`, copying only when needed."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    return vectors
+
+
+def chunk_label(doc_id):
+    """The int64 FAISS id of a chunk: 63 bits of a hash of its docstore id."""
+    digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def is_id_mapped(index):
+    """True for indexes addressed by chunk label rather than by insertion position."""
+    return isinstance(index, faiss.IndexIDMap)
+
+
+def add_vectors(faiss_db, texts, metadatas, vectors, ids=None):
+    """
+    Appends pre-computed vectors and their chunks to a LangChain FAISS store.
+
+    Same bookkeeping as `FAISS.add_embeddings`, but the (n, d) array goes to
+    `index.add` as-is instead of round-tripping through Python lists. Ids
+    default to the stable `chunk_id` of each chunk; on an ID-mapped index
+    `index_to_docstore_id` is keyed by `chunk_label`, and chunks whose id is
+    already stored are skipped. Returns the ids that were added.
+    """
+    vectors = as_float32_matrix(vectors)
+    if len(texts) != vectors.shape[0]:
+        raise ValueError(f"{len(texts)} texts but {vectors.shape[0]} vectors")
+    metadatas = metadatas if metadatas is not None else [{} for _ in texts]
+    ids = list(ids) if ids is not None else [chunk_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+
+    if is_id_mapped(faiss_db.index):
+        labels, keep = [], []
+        for i, doc_id in enumerate(ids):
+            label = chunk_label(doc_id)
+            if label not in faiss_db.index_to_docstore_id:
+                faiss_db.index_to_docstore_id[label] = doc_id
+                labels.append(label)
+                keep.append(i)
+        if len(keep) < len(ids):
+            logger.info(f"Skipped {len(ids) - len(keep)} chunks already in the index")
+            vectors = vectors[keep]
+            texts, metadatas, ids = ([values[i] for i in keep] for values in (texts, metadatas, ids))
+        if keep:
+            faiss_db.index.add_with_ids(vectors, np.asarray(labels, dtype=np.int64))
+            if getattr(faiss_db, "raw_vectors", None) is not None:
+                faiss_db.raw_vectors.add(labels, vectors)
+    else:
+        start = faiss_db.index.ntotal
+        faiss_db.index.add(vectors)
+        faiss_db.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(ids)})
+
+    faiss_db.docstore.add({
+        doc_id: Document(page_content=text, metadata=metadata)
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    return ids
+
+
+def refresh_chunks(faiss_db, texts, metadatas):
+    """
+    Stores the given metadata for chunks that are already in an ID-mapped
+    store (same stable id, e.g. the chunks of a renamed PDF), keeping their
+    vectors. Returns the positions of the chunks that still need embedding.
+    """
+    if not is_id_mapped(faiss_db.index):
+        return list(range(len(texts)))
+    missing, known = [], {}
+    for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+        doc_id = chunk_id(text, metadata)
+        if chunk_label(doc_id) in faiss_db.index_to_docstore_id:
+            known[doc_id] = Document(page_content=text, metadata=metadata)
+        else:
+            missing.append(i)
+    if known:
+        faiss_db.docstore.delete(list(known))
+        faiss_db.docstore.add(known)
+        logger.info(f"Updated {len(known)} chunks already in the index without re-embedding them")
+    return missing
+
+
+def remove_chunks(faiss_db, doc_ids):
+    """
+    Deletes chunks by docstore id from an ID-mapped store: their vectors,
+    documents and `index_to_docstore_id` entries. Unlike `FAISS.delete` the
+    remaining chunks keep their labels. Index types without `remove_ids`
+    (HNSW) are rebuilt from their remaining vectors. Returns the count removed.
+    """
+    if not is_id_mapped(faiss_db.index):
+        raise ValueError("remove_chunks needs an ID-mapped index; rebuild the vector store first")
+    labels = [label for label in map(chunk_label, doc_ids) if label in faiss_db.index_to_docstore_id]
+    if not labels:
+        return 0
+
+    index = faiss_db.index
+    try:
+        index.remove_ids(np.asarray(labels, dtype=np.int64))
+    except RuntimeError:
+        dropped = set(labels)
+        kept = np.array([label for label in faiss.vector_to_array(index.id_map) if label not in dropped],
+                        dtype=np.int64)
+        vectors = np.vstack([index.reconstruct(int(label)) for label in kept]) if len(kept) else None
+        inner = faiss.clone_index(index.index)
+        inner.reset()
+        rebuilt = faiss.IndexIDMap2(inner)
+        if vectors is not None:
+            rebuilt.add_with_ids(vectors, kept)
+        faiss_db.index = rebuilt
+        logger.info(f"Index does not support remove_ids; rebuilt it from {len(kept)} remaining vectors")
+
+    if getattr(faiss_db, "raw_vectors", None) is not None:
+        faiss_db.raw_vectors.remove(labels)
+    ids = [faiss_db.index_to_docstore_id.pop(label) for label in labels]
+    faiss_db.docstore.delete(ids)
+    return len(ids)
+
+
+def needs_training(index_spec, dimension):
+    """True for index types that must be trained before vectors are added (IVF, PQ, SQ...)."""
+    return not faiss.index_factory(dimension, index_spec, faiss.METRIC_L2).is_trained
+
+
+def make_index(vectors, index_spec="Flat", train_size=50000, seed=0):
+    """
+    Empty L2 index for `faiss.index_factory` spec (e.g. "Flat", "HNSW32",
+    "IVF1024,Flat"), wrapped in an IndexIDMap2 so chunks are addressed by
+    their stable label. Index types that need training are trained on a
+    random sample of at most `train_size` rows of `vectors`.
+    """
+    index = faiss.index_factory(vectors.shape[1], index_spec, faiss.METRIC_L2)
+    if not index.is_trained:
+        sample = vectors
+        if len(vectors) > train_size:
+            rows = np.random.default_rng(seed).choice(len(vectors), train_size, replace=False)
+            sample = vectors[np.sort(rows)]
+        try:
+            index.train(sample)
+        except RuntimeError as e:
+            raise ValueError(f"Could not train '{index_spec}' on {len(sample)} vectors; use fewer IVF lists "
+                             f"(rule of thumb: at least 39 vectors per list) or a 'Flat' / 'HNSW' spec: {e}")
+        logger.info(f"Trained '{index_spec}' on {len(sample)} vectors")
+    return faiss.IndexIDMap2(index)
+
+
+def stored_vectors(index):
+    """(labels, vectors) of every entry in an ID-mapped index, read back with `reconstruct`."""
+    labels = faiss.vector_to_array(index.id_map).astype(np.int64)
+    vectors = np.empty((len(labels), index.d), dtype=np.float32)
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        # IVF lists can only be read back by id through a direct map; dropped again afterwards
+        ivf.make_direct_map()
+    try:
+        for row, label in enumerate(labels):
+            vectors[row] = index.reconstruct(int(label))
+    finally:
+        if ivf is not None:
+            ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+    return labels, vectors
+
+
+def attach_raw_vectors(faiss_db, index_spec, rerank_factor, labels=None, vectors=None):
+    """Keeps full-precision vectors for re-ranking when `index_spec` is compressed and re-ranking is on."""
+    if rerank_factor > 0 and is_compressed(index_spec):
+        faiss_db.raw_vectors = RawVectors(labels, vectors, dimension=faiss_db.index.d)
+        faiss_db.rerank_factor = rerank_factor
+    else:
+        faiss_db.raw_vectors = None
+
+
+def convert_index(faiss_db, index_spec, train_size=50000, rerank_factor=0):
+    """
+    Rebuilds `faiss_db.index` as `index_spec` from its own vectors (the raw
+    side file when there is one, so no precision is lost), keeping labels
+    and docstore.
+    """
+    raw = getattr(faiss_db, "raw_vectors", None)
+    if raw is not None and len(raw):
+        labels = faiss.vector_to_array(faiss_db.index.id_map).astype(np.int64)
+        vectors = raw.get(labels)
+    else:
+        labels, vectors = stored_vectors(faiss_db.index)
+    index = make_index(vectors, index_spec, train_size=train_size)
+    if len(labels):
+        index.add_with_ids(vectors, labels)
+    faiss_db.index = index
+    attach_raw_vectors(faiss_db, index_spec, rerank_factor, labels, vectors)
+    return faiss_db
+
+
+# -----------------------------------------------------------
+# Search-time parameters
+# -----------------------------------------------------------
+
+def search_knob(index):
+    """
+    The main search-time accuracy/speed knob of an index as (name,
+    candidate values): `nprobe` for IVF, `efSearch` for HNSW, None for
+    exact indexes.
+    """
+    try:
+        nlist = faiss.extract_index_ivf(index).nlist
+        return "nprobe", [v for v in (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048) if v < nlist] + [nlist]
+    except (RuntimeError, AttributeError):
+        pass
+    inner = faiss.downcast_index(index.index if is_id_mapped(index) else index)
+    if hasattr(inner, "hnsw"):
+        return "efSearch", [16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 1024]
+    return None
+
+
+def apply_search_params(index, params):
+    """Sets search-time parameters such as {"nprobe": 32} or {"efSearch": 128} on `index`."""
+    space = faiss.ParameterSpace()
+    for name, value in (params or {}).items():
+        space.set_index_parameter(index, name, value)
+
+
+def save_index_params(db_path, index_spec, search_params):
+    path = Path(db_path) / INDEX_PARAMS_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"index_spec": index_spec, "search_params": search_params or {}}, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_index_params(db_path):
+    """The sidecar written by `save_index_params`, or {} for stores saved without one."""
+    path = Path(db_path) / INDEX_PARAMS_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_faiss_store(texts, metadatas, vectors, embedding_model, ids=None, index_spec="Flat", train_size=50000,
+                      rerank_factor=0):
+    """
+    Builds a LangChain FAISS store directly from an (n, d) float32 array.
+
+    The default "Flat" spec is the same flat L2 index `FAISS.from_texts`
+    creates (ID-mapped); on unit-normalised vectors L2 ranking equals
+    cosine ranking. Stores are saved without a pickle
+    (`store_io.write_vector_store`) and loaded with
+    `EmbeddingCreator.load_vector_store`, which reads the index and
+    `store_io.load_docstore`; `FAISS.load_local` cannot read them. For
+    compressed specs with `rerank_factor > 0` the full-precision vectors
+    are kept for exact re-ranking.
+    """
+    vectors = as_float32_matrix(vectors)
+    faiss_db = RerankingFAISS(
+        embedding_function=embedding_model,
+        index=make_index(vectors, index_spec, train_size=train_size),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    attach_raw_vectors(faiss_db, index_spec, rerank_factor)
+    add_vectors(faiss_db, texts, metadatas, vectors, ids=ids)
+    return faiss_db
@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from AI_Lawyer.utils.common import read_yaml, create_directories
 from AI_Lawyer.utils.logging_setup import *
-from AI_Lawyer.entity.config_entity import DataConfig, ChunkingConfig, EmbeddingConfig, LLMConfig
+from AI_Lawyer.entity.config_entity import DataConfig, ChunkingConfig, EmbeddingConfig, LLMConfig, PipelineConfig, DedupConfig, ShardingConfig
 from AI_Lawyer.constants import *
 
 class ConfigurationManager:
@@ -13,15 +13,37 @@ class ConfigurationManager:
         # ✅ This is now correctly placed inside __init__ and uses self
         create_directories([self.config['data']['root_dir']])
 
+    @staticmethod
+    def _flatten_sources(source_url):
+        """`source_url` is either a list of URLs or a mapping of legal domain -> URLs."""
+        if isinstance(source_url, dict):
+            return [url for urls in source_url.values() for url in urls]
+        return list(source_url)
+
     def get_data_ingestion_config(self) -> DataConfig:
         config = self.config['data']
 
         create_directories([config['pdf_directory']])
+
+        download = config.get('download', {})
+        parsing = config.get('parsing', {})
         
         data_config = DataConfig(   
             root_dir=Path(config['root_dir']),
             pdf_directory=Path(config['pdf_directory']),
-            source_url=config['source_url']  # ✅ This stays as a list
+            source_url=self._flatten_sources(config['source_url']),  # ✅ This stays as a list
+            max_workers=download.get('max_workers', 8),
+            connect_timeout=download.get('connect_timeout', 10),
+            read_timeout=download.get('read_timeout', 60),
+            download_chunk_size=download.get('chunk_size', 65536),
+            registry_path=Path(config.get('registry_path', Path(config['root_dir']) / "data" / "document_registry.json")),
+            parse_workers=parsing.get('workers', 0),
+            pages_per_task=parsing.get('pages_per_task', 64),
+            parse_timeout=parsing.get('timeout', 300),
+            text_cache_dir=Path(parsing['cache_dir']) if parsing.get('cache_dir') else None,
+            text_cache_max_mb=parsing.get('cache_max_mb', 512),
+            extractor=parsing.get('extractor', 'pdfplumber'),
+            stitch_pages=parsing.get('stitch_pages', False)
         )
         return data_config
 
@@ -31,11 +53,31 @@ class ConfigurationManager:
         chunking_config = ChunkingConfig(
             chunk_size = config['chunk_size'],
             chunk_overlap = config['chunk_overlap'],
-            add_start_index = config['add_start_index']
+            add_start_index = config['add_start_index'],
+            strategy = config.get('strategy', 'recursive'),
+            length_unit = config.get('length_unit', 'chars'),
+            # Token counts only mean something for the model that embeds the chunks
+            tokenizer = config.get('tokenizer') or self.config['embeddings']['model'],
+            strict_window = config.get('strict_window', True),
+            tokenizer_offline = self.config['embeddings'].get('offline', False)
         )
 
         return chunking_config
         
+    def get_dedup_config(self) -> DedupConfig:
+        config = self.params.get('dedupparams', {})
+
+        dedup_config = DedupConfig(
+            enabled = config.get('enabled', False),
+            threshold = config.get('threshold', 0.9),
+            num_perm = config.get('num_perm', 128),
+            bands = config.get('bands', 32),
+            shingle_size = config.get('shingle_size', 5),
+            embedding_dim = config.get('embedding_dim', 384),
+            duplicates_path = Path(config.get('duplicates_path', "artifacts/data/duplicates.json"))
+        )
+
+        return dedup_config
      
     def get_embeddings_config(self) -> EmbeddingConfig:
         config = self.config['embeddings']
@@ -43,7 +85,30 @@ class ConfigurationManager:
             model = config['model'],
             vector_store = config['vector_store'],
             vector_store_path = config['vector_store_path'],
-            api_key = config['api_key']
+            api_key = config['api_key'],
+            batch_size = config.get('batch_size', 64),
+            normalize = config.get('normalize', True),
+            cache_dir = Path(config['cache_dir']) if config.get('cache_dir') else None,
+            cache_max_mb = config.get('cache_max_mb', 1024),
+            num_workers = config.get('num_workers', 0),
+            threads_per_worker = config.get('threads_per_worker', 1),
+            backend = config.get('backend', 'torch'),
+            quantize = config.get('quantize') or '',
+            offline = config.get('offline', False),
+            export_dir = Path(config.get('export_dir', 'artifacts/models')),
+            device = config.get('device') or '',
+            service_address = config.get('service_address') or '',
+            service_max_batch = config.get('service_max_batch', 64),
+            service_max_wait_ms = config.get('service_max_wait_ms', 5.0),
+            index_spec = config.get('index_spec') or 'Flat',
+            index_train_size = config.get('index_train_size', 50000),
+            search_params = dict(config.get('search_params') or {}),
+            rerank_factor = config.get('rerank_factor', 4),
+            load_mode = config.get('load_mode', 'memory'),
+            api_endpoint = config.get('api_endpoint') or '',
+            max_concurrency = config.get('max_concurrency', 4),
+            requests_per_minute = config.get('requests_per_minute', 1500),
+            max_retries = config.get('max_retries', 6)
         )
         return embedding_config
 
@@ -55,4 +120,28 @@ class ConfigurationManager:
             model = config['model'],
             api_key = config['api_key']
         )
-        return llm_config
\ No newline at end of file
+        return llm_config
+
+    def get_pipeline_config(self) -> PipelineConfig:
+        config = self.config.get('pipeline', {})
+        pipeline_config = PipelineConfig(
+            streaming = config.get('streaming', False),
+            queue_size = config.get('queue_size', 4),
+            embed_batch_size = config.get('embed_batch_size', 256),
+            incremental = config.get('incremental', False)
+        )
+        return pipeline_config
+
+    def get_sharding_config(self) -> ShardingConfig:
+        config = self.config.get('sharding', {})
+        source_url = self.config['data']['source_url']
+        sharding_config = ShardingConfig(
+            enabled = config.get('enabled', False),
+            # Shards follow the domain grouping of source_url
+            domains = {domain: list(urls) for domain, urls in source_url.items()} if isinstance(source_url, dict) else {},
+            default_domain = config.get('default_domain') or 'other',
+            top_shards = config.get('top_shards', 3),
+            search_workers = config.get('search_workers', 4),
+            centroids_per_shard = config.get('centroids_per_shard', 8)
+        )
+        return sharding_config
@@ -1,12 +1,24 @@
 from pathlib import Path
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Dict
 
 @dataclass(frozen=True)
 class DataConfig:
     root_dir: Path
     source_url: List[str]
     pdf_directory: Path
+    max_workers: int = 8
+    connect_timeout: float = 10
+    read_timeout: float = 60
+    download_chunk_size: int = 65536
+    registry_path: Path = None
+    parse_workers: int = 0
+    pages_per_task: int = 64
+    parse_timeout: float = 300
+    text_cache_dir: Path = None
+    text_cache_max_mb: int = 512
+    extractor: str = "pdfplumber"
+    stitch_pages: bool = False
 
 
 
@@ -16,6 +28,29 @@ class EmbeddingConfig:
     vector_store: str
     vector_store_path: str
     api_key: str
+    batch_size: int = 64
+    normalize: bool = True
+    cache_dir: Path = None
+    cache_max_mb: int = 1024
+    num_workers: int = 0
+    threads_per_worker: int = 1
+    backend: str = "torch"
+    quantize: str = ""
+    offline: bool = False
+    export_dir: Path = Path("artifacts/models")
+    device: str = ""
+    service_address: str = ""
+    service_max_batch: int = 64
+    service_max_wait_ms: float = 5.0
+    index_spec: str = "Flat"
+    index_train_size: int = 50000
+    search_params: Dict[str, float] = field(default_factory=dict)
+    rerank_factor: int = 4
+    load_mode: str = "memory"
+    api_endpoint: str = ""
+    max_concurrency: int = 4
+    requests_per_minute: int = 1500
+    max_retries: int = 6
 
 @dataclass(frozen= True)
 class LLMConfig:
@@ -28,6 +63,37 @@ class ChunkingConfig:
     chunk_size: int
     chunk_overlap: int
     add_start_index: bool
+    strategy: str = "recursive"
+    length_unit: str = "chars"
+    tokenizer: str = "all-MiniLM-L6-v2"
+    strict_window: bool = True
+    tokenizer_offline: bool = False
+
+@dataclass(frozen= True)
+class DedupConfig:
+    enabled: bool = False
+    threshold: float = 0.9
+    num_perm: int = 128
+    bands: int = 32
+    shingle_size: int = 5
+    embedding_dim: int = 384
+    duplicates_path: Path = Path("artifacts/data/duplicates.json")
+
+@dataclass(frozen= True)
+class PipelineConfig:
+    streaming: bool = False
+    queue_size: int = 4
+    embed_batch_size: int = 256
+    incremental: bool = False
+
+@dataclass(frozen= True)
+class ShardingConfig:
+    enabled: bool = False
+    domains: Dict[str, List[str]] = field(default_factory=dict)
+    default_domain: str = "other"
+    top_shards: int = 3
+    search_workers: int = 4
+    centroids_per_shard: int = 8
 
 @dataclass
 class config:
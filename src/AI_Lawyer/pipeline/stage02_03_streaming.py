@@ -0,0 +1,116 @@
+from AI_Lawyer.config.configuration import ConfigurationManager
+from AI_Lawyer.components.chunking_component import Data_Loader, Chunking_text
+from AI_Lawyer.components.local_embedding import EmbeddingCreator
+from AI_Lawyer.components.chunk_store import ChunkStore
+from AI_Lawyer.components.dedup import NearDuplicateFilter
+from AI_Lawyer.utils.streaming import StreamingPipeline, rebatch
+from AI_Lawyer.utils.logging_setup import logger
+
+
+STAGE_NAME = "Streaming Parse/Chunk/Embed"
+
+
+def start_streaming_pipeline(only_changed=False, incremental=False):
+    """
+    Runs stages 02 and 03 as one pipeline:
+      parse (one item per PDF) -> chunk [-> dedup] -> rebatch -> embed + append to FAISS
+
+    Stages overlap on separate threads joined by bounded queues, so peak
+    memory is set by `pipeline.queue_size` and `pipeline.embed_batch_size`
+    rather than by the corpus. With `incremental=True` the saved store is
+    loaded, chunks of changed / removed documents are deleted from it and
+    only added / changed documents are streamed in. Returns (faiss_db, chunk_count).
+    """
+    try:
+        logger.info(f"===== Starting {STAGE_NAME} Pipeline =====")
+
+        config_manager = ConfigurationManager()
+        data_config = config_manager.get_data_ingestion_config()
+        chunk_config = config_manager.get_chunking_config()
+        embedding_config = config_manager.get_embeddings_config()
+        pipeline_config = config_manager.get_pipeline_config()
+        dedup_config = config_manager.get_dedup_config()
+
+        loader = Data_Loader(config=data_config)
+        chunker = Chunking_text(config=chunk_config)
+        embedding_creator = EmbeddingCreator(config=embedding_config)
+        embedding_model = embedding_creator.get_embedding_model()
+
+        state = {"faiss_db": None, "chunks": 0}
+        delta = None
+        if incremental:
+            delta = loader.scan()
+            state["faiss_db"] = embedding_creator.load_vector_store(embedding_model, mmap=False)
+            removed = embedding_creator.remove_documents(state["faiss_db"], delta.stale_hashes)
+            logger.info(f"Incremental mode ({delta.summary()}): removed {removed} stale chunks")
+            only_changed = True
+
+        # One filter for the whole run, so duplicates across PDFs are caught too.
+        # An incremental run only sees the delta's chunks, so it can neither
+        # match them against unchanged documents nor restore chunks dropped
+        # in favour of a removed one: dedup runs on full builds only.
+        dedup = None
+        if dedup_config.enabled and incremental:
+            logger.info("Deduplication skipped: it runs on full builds only; chunks dropped as duplicates "
+                        "of changed or removed documents come back with the next full build")
+        elif dedup_config.enabled:
+            dedup = NearDuplicateFilter(config=dedup_config)
+
+        def chunk_stage(documents):
+            text_chunks = chunker.main(documents)
+            if dedup is not None:
+                text_chunks = dedup.filter(text_chunks)
+            if len(text_chunks):
+                yield text_chunks
+
+        def embed_stage(text_chunks):
+            state["faiss_db"] = embedding_creator.add_to_vector_store(
+                state["faiss_db"], text_chunks, embedding_model
+            )
+            state["chunks"] += len(text_chunks)
+            return ()
+
+        pipeline = StreamingPipeline(queue_size=pipeline_config.queue_size)
+        try:
+            pipeline.run(
+                loader.iter_documents(only_changed=only_changed, delta=delta),
+                [
+                    ("chunk", chunk_stage),
+                    ("batch", rebatch(pipeline_config.embed_batch_size, concat=ChunkStore.concat)),
+                    ("embed", embed_stage),
+                ],
+                source_name="parse",
+            )
+        finally:
+            embedding_creator.close()
+
+        if state["faiss_db"] is None:
+            raise RuntimeError("Streaming pipeline produced no text chunks.")
+
+        if incremental:
+            embedding_creator.save_vector_store(state["faiss_db"], embedding_creator.saved_index_spec())
+        else:
+            embedding_creator.save_vector_store(embedding_creator.finish_streamed_store(state["faiss_db"]))
+            embedding_creator.report_index(state["faiss_db"], embedding_config.index_spec)
+        # Only now that the store is saved may the registry consider these files indexed
+        loader.commit()
+        if dedup is not None:
+            dedup.save_duplicates()
+            logger.info(f"Deduplication: {dedup.report.summary()}")
+
+        logger.info(f"{STAGE_NAME} completed: {state['chunks']} chunks embedded.")
+        return state["faiss_db"], state["chunks"]
+
+    except Exception as e:
+        logger.exception(f"{STAGE_NAME} failed due to: {e}")
+        raise e
+
+
+if __name__ == '__main__':
+    try:
+        logger.info(f">>>> Stage {STAGE_NAME} started <<<<")
+        start_streaming_pipeline()
+        logger.info(f">>>> Stage {STAGE_NAME} completed <<<<")
+
+    except Exception as e:
+        logger.exception(e)
@@ -1,10 +1,17 @@
 from AI_Lawyer.config.configuration import ConfigurationManager
 from AI_Lawyer.components.chunking_component import Data_Loader,Chunking_text
+from AI_Lawyer.components.dedup import NearDuplicateFilter
 from AI_Lawyer.utils.logging_setup import logger
 
 STAGE_NAME = "Text_Chunking"
 
-def start_data_loader_pipeline():
+def start_data_loader_pipeline(only_changed=False, return_loader=False):
+    """
+    Loads PDF pages. With `only_changed=True` only documents added or changed
+    since the last run are parsed; with `return_loader=True` the Data_Loader
+    is returned too, as (documents, loader): its `delta` is the registry
+    delta and `loader.commit()` saves the registry once the index is saved.
+    """
     try:
         logger.info(f"===== Starting Data Loading Pipeline =====")
 
@@ -14,10 +21,12 @@ def start_data_loader_pipeline():
         loader = Data_Loader(config=data_config)
 
         # Load all PDF documents
-        documents = loader.main()
+        documents = loader.main(only_changed=only_changed)
 
-        logger.info(f"Documents Loaded: {len(documents)}")
+        logger.info(f"Documents Loaded: {len(documents)} ({loader.delta.summary()})")
 
+        if return_loader:
+            return documents, loader
         return documents
 
     except Exception as e:
@@ -25,7 +34,13 @@ def start_data_loader_pipeline():
         raise e
     
 
-def start_chunking_pipeline(documents):
+def start_chunking_pipeline(documents, partial=False):
+    """
+    Chunks `documents`. `partial=True` means they are only part of the
+    corpus (an incremental update or a single-shard rebuild): near-duplicate
+    removal is skipped then, since it can only compare chunks against the
+    rest of the corpus on a full build.
+    """
     try:
         logger.info(f"===== Starting Text Chunking Pipeline =====")
 
@@ -39,6 +54,17 @@ def start_chunking_pipeline(documents):
 
         logger.info(f"Total Chunks Created: {len(text_chunks)}")
 
+        # Drop exact / near-duplicate chunks before they reach the embedder
+        dedup_config = config_manager.get_dedup_config()
+        if dedup_config.enabled and partial:
+            logger.info("Deduplication skipped: it runs on full builds only; chunks dropped as duplicates "
+                        "of changed or removed documents come back with the next full build")
+        elif dedup_config.enabled:
+            dedup = NearDuplicateFilter(config=dedup_config)
+            text_chunks = dedup.filter(text_chunks)
+            dedup.save_duplicates()
+            logger.info(f"Deduplication: {dedup.report.summary()}")
+
         return text_chunks
 
     except Exception as e:
@@ -1,12 +1,20 @@
 from AI_Lawyer.config.configuration import ConfigurationManager
 from AI_Lawyer.components.local_embedding import EmbeddingCreator
+from AI_Lawyer.components.sharding import ShardedVectorStore
 from AI_Lawyer.utils.logging_setup import logger
-from langchain_community.vectorstores import FAISS
 
 
 STAGE_NAME = "Embedding Stage"
 
 
+def _sharded_store(config_manager):
+    """The per-domain ShardedVectorStore when `sharding.enabled`, else None."""
+    sharding_config = config_manager.get_sharding_config()
+    if not sharding_config.enabled:
+        return None
+    return ShardedVectorStore(config_manager.get_embeddings_config(), sharding_config)
+
+
 def start_embedding_pipeline(text_chunks):
     """
     Runs the embedding creation process:
@@ -21,6 +29,13 @@ def start_embedding_pipeline(text_chunks):
         config_manager = ConfigurationManager()
         embedding_config = config_manager.get_embeddings_config()
 
+        # One shard per legal domain, queried through a router
+        sharded = _sharded_store(config_manager)
+        if sharded is not None:
+            sharded.build(text_chunks)
+            logger.info("Embedding Pipeline completed successfully.")
+            return sharded.load()
+
         # Initialize embedding component
         embedding_creator = EmbeddingCreator(config=embedding_config)
 
@@ -36,6 +51,43 @@ def start_embedding_pipeline(text_chunks):
 
 
 
+def start_incremental_embedding_pipeline(text_chunks, delta):
+    """
+    Incremental stage 03: applies the document registry `delta` to the
+    saved FAISS store (remove chunks of changed / deleted documents, embed
+    and add `text_chunks` of added / changed ones) and saves it.
+    """
+    try:
+        logger.info("===== Starting Incremental Embedding Pipeline =====")
+
+        config_manager = ConfigurationManager()
+        embedding_config = config_manager.get_embeddings_config()
+
+        sharded = _sharded_store(config_manager)
+        if sharded is not None:
+            sharded.update(text_chunks, delta)
+            logger.info("Incremental Embedding Pipeline completed successfully.")
+            return sharded.load()
+
+        embedding_creator = EmbeddingCreator(config=embedding_config)
+        faiss_db = embedding_creator.update_vector_store(text_chunks, delta)
+
+        logger.info("Incremental Embedding Pipeline completed successfully.")
+        return faiss_db
+
+    except Exception as e:
+        logger.exception(f"Incremental Embedding Pipeline failed due to: {e}")
+        raise e
+
+
+def vector_store_exists():
+    config_manager = ConfigurationManager()
+    sharded = _sharded_store(config_manager)
+    if sharded is not None:
+        return sharded.exists()
+    return EmbeddingCreator(config=config_manager.get_embeddings_config()).has_vector_store()
+
+
 def load_existing_vector_store():
     """
     Optional method:
@@ -47,14 +99,16 @@ def load_existing_vector_store():
         config_manager = ConfigurationManager()
         embedding_config = config_manager.get_embeddings_config()
 
+        sharded = _sharded_store(config_manager)
+        if sharded is not None:
+            db = sharded.load()
+            logger.info("Existing sharded FAISS Database loaded successfully.")
+            return db
+
         embedding_creator = EmbeddingCreator(config=embedding_config)
 
-        # Load from path
-        db = FAISS.load_local(
-            embedding_creator.db_path,
-            embedding_creator.get_embedding_model(),
-            allow_dangerous_deserialization=True
-        )
+        # Load from path, with the index's saved search params (nprobe / efSearch)
+        db = embedding_creator.load_vector_store(embedding_creator.get_embedding_model())
 
         logger.info("Existing FAISS Database loaded successfully.")
         return db
@@ -64,6 +118,50 @@ def load_existing_vector_store():
         raise e
 
 
+def rebuild_vector_store_from_cache(index_spec="Flat"):
+    """
+    Rebuilds the saved FAISS store as another index type (a faiss
+    index_factory spec such as "HNSW32" or "IVF256,Flat") from the
+    embedding cache, with no model inference.
+    """
+    try:
+        logger.info(f"===== Rebuilding FAISS Database as '{index_spec}' =====")
+
+        config_manager = ConfigurationManager()
+        embedding_config = config_manager.get_embeddings_config()
+
+        embedding_creator = EmbeddingCreator(config=embedding_config)
+        db = embedding_creator.rebuild_vector_store(index_spec=index_spec)
+
+        logger.info("FAISS Database rebuilt successfully.")
+        return db
+
+    except Exception as e:
+        logger.exception(f"Failed to rebuild FAISS database: {e}")
+        raise e
+
+
+
+def rebuild_shards(text_chunks, domains):
+    """
+    Rebuilds only the shards of `domains` from `text_chunks` (the chunks of
+    those domains' PDFs); the other shards and their files are not touched.
+    """
+    try:
+        logger.info(f"===== Rebuilding shards: {', '.join(domains)} =====")
+
+        config_manager = ConfigurationManager()
+        sharded = ShardedVectorStore(config_manager.get_embeddings_config(), config_manager.get_sharding_config())
+        table = sharded.build(text_chunks, domains=domains)
+
+        logger.info("Shards rebuilt successfully.")
+        return table
+
+    except Exception as e:
+        logger.exception(f"Failed to rebuild shards: {e}")
+        raise e
+
+
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,223 @@
+import time
+import queue
+import threading
+from dataclasses import dataclass
+
+from AI_Lawyer.utils.logging_setup import logger
+
+
+# Marks the end of a stream between two stages
+_END = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    busy_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def throughput(self):
+        """Items produced per second of work in this stage."""
+        return self.items_out / self.busy_seconds if self.busy_seconds else 0.0
+
+    def summary(self):
+        return (f"{self.name}: in={self.items_in} out={self.items_out} "
+                f"busy={self.busy_seconds:.1f}s wall={self.wall_seconds:.1f}s "
+                f"throughput={self.throughput:.1f} items/s")
+
+
+class StreamingPipeline:
+    """
+    Runs a source generator and a chain of stages on separate threads joined
+    by bounded queues, so peak memory is capped by `queue_size` rather than
+    by the size of the corpus.
+
+    Each stage is `(name, fn)` where `fn(item)` returns an iterable of output
+    items (empty to drop, several to fan out). A stage that buffers may expose
+    `fn.flush()`, which is drained once its input ends. An optional final
+    `sink(item)` consumes what the last stage produces on the calling thread.
+    The source is closed (if it has `close()`) when it ends or the pipeline
+    stops early.
+    """
+
+    def __init__(self, queue_size=4):
+        self.queue_size = queue_size
+        self.stats = []
+        self._error = None
+        self._stop = threading.Event()
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, name, error):
+        if self._error is None:
+            logger.error(f"Streaming stage '{name}' failed: {error}")
+            self._error = error
+        self._stop.set()
+
+    def _run_source(self, name, source, out_q, stats):
+        started = time.perf_counter()
+        iterator = None
+        try:
+            iterator = iter(source)
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats.busy_seconds += time.perf_counter() - t0
+                stats.items_out += 1
+                if not self._put(out_q, item):
+                    return
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            # Closing here, on the thread that runs it, lets a generator
+            # source release what it holds (e.g. a parse pool) when a
+            # downstream stage fails before the stream is exhausted
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Closing streaming source '{name}' failed: {e}")
+            stats.wall_seconds = time.perf_counter() - started
+            self._put(out_q, _END)
+
+    def _emit(self, out_q, outputs, stats):
+        for output in outputs:
+            stats.items_out += 1
+            if not self._put(out_q, output):
+                return False
+        return True
+
+    def _run_stage(self, name, fn, in_q, out_q, stats):
+        started = time.perf_counter()
+        flush = getattr(fn, "flush", None)
+        try:
+            while True:
+                item = self._get(in_q)
+                if item is _END:
+                    if flush is not None and not self._stop.is_set():
+                        # Let buffering stages emit what they are still holding
+                        t0 = time.perf_counter()
+                        outputs = list(flush())
+                        stats.busy_seconds += time.perf_counter() - t0
+                        self._emit(out_q, outputs, stats)
+                    break
+
+                stats.items_in += 1
+                t0 = time.perf_counter()
+                outputs = list(fn(item))
+                stats.busy_seconds += time.perf_counter() - t0
+                if not self._emit(out_q, outputs, stats):
+                    return
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            stats.wall_seconds = time.perf_counter() - started
+            self._put(out_q, _END)
+
+    def run(self, source, stages, sink=None, source_name="source"):
+        """
+        Drives the pipeline to completion and returns the per-stage stats.
+        Re-raises the first exception raised by any stage.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        self.stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+
+        threads = [threading.Thread(
+            target=self._run_source,
+            args=(source_name, source, queues[0], self.stats[0]),
+            name=f"stream-{source_name}",
+            daemon=True,
+        )]
+        for i, (name, fn) in enumerate(stages):
+            threads.append(threading.Thread(
+                target=self._run_stage,
+                args=(name, fn, queues[i], queues[i + 1], self.stats[i + 1]),
+                name=f"stream-{name}",
+                daemon=True,
+            ))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _END:
+                    break
+                if sink is not None:
+                    sink(item)
+        except Exception as e:
+            self._fail("sink", e)
+        finally:
+            for thread in threads:
+                thread.join()
+
+        for stats in self.stats:
+            logger.info(f"[stream] {stats.summary()}")
+
+        if self._error is not None:
+            raise self._error
+
+        return self.stats
+
+
+def rebatch(batch_size, concat=None):
+    """
+    Stage factory that regroups a stream of lists into lists of `batch_size`.
+    With `concat`, items are opaque sized containers (e.g. ChunkStores) that
+    are buffered until they hold at least `batch_size` entries and then merged
+    with `concat(items)`. `StreamingPipeline` calls the stage's `flush()` at
+    end of stream so the final, shorter batch is not lost.
+    """
+    buffer = []
+
+    if concat is not None:
+        def stage(item):
+            buffer.append(item)
+            if sum(len(b) for b in buffer) >= batch_size:
+                yield concat(buffer)
+                buffer.clear()
+
+        def flush():
+            if buffer:
+                yield concat(buffer)
+                buffer.clear()
+
+        stage.flush = flush
+        return stage
+
+    def stage(items):
+        buffer.extend(items)
+        while len(buffer) >= batch_size:
+            yield buffer[:batch_size]
+            del buffer[:batch_size]
+
+    def flush():
+        if buffer:
+            yield list(buffer)
+            buffer.clear()
+
+    stage.flush = flush
+    return stage
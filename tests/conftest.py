@@ -0,0 +1,51 @@
+import sys
+import hashlib
+import dataclasses
+from pathlib import Path
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+ROOT = Path(__file__).resolve().parent.parent
+# Add src to path, as the root scripts do, and the root for the scripts themselves
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(1, str(ROOT))
+
+from AI_Lawyer.entity.config_entity import EmbeddingConfig
+
+
+class HashEmbeddings(Embeddings):
+    """Stands in for the embedding model: a fixed unit vector per text, derived from its hash."""
+
+    model_name = "hash-embeddings"
+    dimension = 16
+
+    def encode(self, texts):
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.dimension)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+    def embed_documents(self, texts):
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.encode([text])[0].tolist()
+
+
+@pytest.fixture
+def make_creator(tmp_path, monkeypatch):
+    """EmbeddingCreator factory over a store in tmp_path that embeds with HashEmbeddings."""
+    from AI_Lawyer.components.local_embedding import EmbeddingCreator
+
+    monkeypatch.setattr(EmbeddingCreator, "get_embedding_model", lambda self: HashEmbeddings())
+
+    def make(path="store", **overrides):
+        config = EmbeddingConfig(model="hash-embeddings", vector_store="faiss",
+                                 vector_store_path=str(tmp_path / path), api_key="")
+        return EmbeddingCreator(config=dataclasses.replace(config, **overrides))
+
+    return make
@@ -0,0 +1,114 @@
+"""
+ChunkStore offsets and metadata: chunk refs that point back into the
+document text, stitched pages mapped back to page ranges, stable chunk ids,
+and chunk text materialised one slice at a time.
+"""
+
+import faiss
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.components import chunk_store as chunk_store_module
+from AI_Lawyer.components.chunk_store import (
+    ChunkStore, chunk_content_hash, chunk_id, iter_texts_and_metadatas, page_range, stitch_pages,
+    texts_and_metadatas
+)
+from AI_Lawyer.components.chunking_component import Chunking_text
+from AI_Lawyer.entity.config_entity import ChunkingConfig
+
+
+PAGES = [
+    ("Section 1. Short title and extent.", {"source": "/pdfs/act.pdf", "page": 0, "total_pages": 3}),
+    ("Section 2. Definitions apply throughout.", {"source": "/pdfs/act.pdf", "page": 1, "total_pages": 3}),
+    ("Section 3. Repeal and savings.", {"source": "/pdfs/act.pdf", "page": 2, "total_pages": 3, "rotated": True}),
+]
+
+
+def test_refs_point_into_document_text():
+    documents = [Document(page_content=" ".join(f"Clause {i} binds the parties." for i in range(40)),
+                          metadata={"source": "/pdfs/contract.pdf", "page": page}) for page in range(2)]
+    store = Chunking_text(ChunkingConfig(chunk_size=200, chunk_overlap=40, add_start_index=True)).main(documents)
+
+    assert len(store) > 4
+    for i in range(len(store)):
+        ref = store.ref(i)
+        text = documents[ref.doc_id].page_content
+        assert store.text(i) == text[ref.start:ref.end] and len(store.text(i)) <= 200
+        assert store.metadata(i) == {**documents[ref.doc_id].metadata, "start_index": ref.start}
+        assert store[i] == Document(page_content=store.text(i), metadata=store.metadata(i))
+    # Overlapping chunks share the document text instead of copying it
+    assert store.texts == [document.page_content for document in documents]
+    assert store.ref(1).start < store.ref(0).end
+
+
+def test_stitched_pages_map_back_to_page_ranges():
+    text, metadata = stitch_pages(PAGES)
+
+    assert text == "\n".join(page_text for page_text, _ in PAGES)
+    assert metadata == {"source": "/pdfs/act.pdf", "total_pages": 3,
+                        "page_offsets": [0, 35, 76], "page_numbers": [0, 1, 2]}
+
+    def pages_of(fragment):
+        start = text.index(fragment)
+        chunk_metadata = page_range(metadata, start, start + len(fragment))
+        return chunk_metadata["page"], chunk_metadata["page_end"]
+
+    assert pages_of("Short title") == (0, 0)
+    assert pages_of("extent.\nSection 2") == (0, 1)
+    assert pages_of("throughout.\nSection 3. Repeal") == (1, 2)
+    assert pages_of("Repeal and savings.") == (2, 2)
+    # A chunk ending on a page's last character stays on that page
+    assert page_range(metadata, 35, 76)["page_end"] == 1
+    # Unstitched metadata passes through unchanged
+    assert page_range(PAGES[0][1], 3, 9) is PAGES[0][1]
+
+
+def test_chunk_ids_are_stable():
+    metadata = {"source": "/pdfs/act.pdf", "content_hash": "h-act", "page": 4, "start_index": 120}
+
+    assert chunk_id("Section 9.", metadata) == "h-act:4:120:130"
+    # The path is not part of the id, so a renamed PDF keeps its chunk ids
+    assert chunk_id("Section 9.", {**metadata, "source": "/pdfs/renamed.pdf"}) == "h-act:4:120:130"
+    assert chunk_content_hash(chunk_id("Section 9.", metadata)) == "h-act"
+
+    fallback = chunk_id("Section 9.", {"source": "/pdfs/act.pdf"})
+    assert fallback.startswith("text-") and fallback == chunk_id("Section 9.", {"source": "/pdfs/act.pdf"})
+    assert fallback != chunk_id("Section 10.", {"source": "/pdfs/act.pdf"})
+
+
+def test_texts_and_metadatas_by_slice(monkeypatch):
+    store = ChunkStore()
+    text, metadata = stitch_pages(PAGES)
+    doc_id = store.add_document(text, metadata)
+    for start in range(0, len(text), 10):
+        store.add_chunk(doc_id, start, min(start + 10, len(text)), {"section": start // 40})
+
+    texts, metadatas = texts_and_metadatas(store)
+    assert texts_and_metadatas(list(store)) == (texts, metadatas)
+    assert texts_and_metadatas(store, 3, 5) == (texts[3:5], metadatas[3:5])
+    assert "page_offsets" not in metadatas[0] and metadatas[4]["section"] == 1
+
+    slices = list(iter_texts_and_metadatas(store, slice_size=4))
+    assert [len(texts) for texts, _ in slices] == [4, 4, 3]
+    assert [t for texts, _ in slices for t in texts] == texts
+
+    monkeypatch.setattr(chunk_store_module, "SLICE_SIZE", 5)
+    assert [len(texts) for texts, _ in iter_texts_and_metadatas(list(store))] == [5, 5, 1]
+
+
+@pytest.mark.parametrize("index_spec", ["Flat", "IVF4,Flat"])
+def test_store_built_slice_by_slice(make_creator, monkeypatch, index_spec):
+    monkeypatch.setattr(chunk_store_module, "SLICE_SIZE", 64)
+    store = ChunkStore()
+    for n in range(3):
+        text = " ".join(f"Act {n} section {i} applies." for i in range(100))
+        doc_id = store.add_document(text, {"source": f"/pdfs/act{n}.pdf", "content_hash": f"h-{n}"})
+        for start in range(0, len(text), 50):
+            store.add_chunk(doc_id, start, min(start + 50, len(text)))
+
+    faiss_db = make_creator(index_spec=index_spec, index_train_size=1000).create_vector_store(store)
+
+    assert faiss_db.index.ntotal == len(store) > 2 * 64
+    assert type(faiss.downcast_index(faiss_db.index.index)) is type(faiss.index_factory(16, index_spec))
+    assert sorted(faiss_db.index_to_docstore_id.values()) == \
+        sorted(chunk_id(text, metadata) for text, metadata in zip(*texts_and_metadatas(store)))
@@ -0,0 +1,92 @@
+"""
+Data_Loader's process-pool parser with a stand-in extractor whose "PDFs"
+say how many pages they have and how long each page takes to extract.
+"""
+
+import time
+
+import pytest
+
+from AI_Lawyer.entity.config_entity import DataConfig
+from AI_Lawyer.components import chunking_component
+from AI_Lawyer.components.chunking_component import Data_Loader, PDFExtractor
+
+
+class ScriptedExtractor(PDFExtractor):
+    """Reads "<pages> <seconds per page>" from the file; a negative delay hangs."""
+
+    name = "scripted"
+
+    @staticmethod
+    def _script(pdf_path):
+        pages, delay = open(pdf_path, encoding="utf-8").read().split()
+        return int(pages), float(delay)
+
+    def page_count(self, pdf_path):
+        return self._script(pdf_path)[0]
+
+    def extract(self, pdf_path, start=0, stop=None):
+        pages, delay = self._script(pdf_path)
+        if delay < 0:
+            time.sleep(3600)
+        result = []
+        for page in range(pages)[start:stop]:
+            time.sleep(delay)
+            result.append((f"page {page}", self._page_metadata(pdf_path, page, pages, {}, self.name)))
+        return result
+
+
+@pytest.fixture
+def make_loader(tmp_path, monkeypatch):
+    monkeypatch.setitem(chunking_component.EXTRACTORS, ScriptedExtractor.name, ScriptedExtractor)
+
+    def make(files, timeout, workers=2):
+        pdf_dir = tmp_path / "pdfs"
+        pdf_dir.mkdir()
+        for name, script in files.items():
+            (pdf_dir / name).write_text(script, encoding="utf-8")
+        config = DataConfig(root_dir=tmp_path, source_url=[], pdf_directory=pdf_dir,
+                            parse_workers=workers, pages_per_task=1, parse_timeout=timeout,
+                            text_cache_dir=None, extractor=ScriptedExtractor.name)
+        loader = Data_Loader(config=config)
+        loader.scan()
+        return loader, sorted(pdf_dir.glob("*.pdf"))
+
+    return make
+
+
+def test_parallel_parse_keeps_order(make_loader):
+    loader, targets = make_loader({"a.pdf": "3 0", "b.pdf": "1 0", "c.pdf": "5 0"}, timeout=30)
+
+    parsed = list(loader._parse_parallel(targets))
+
+    assert [pdf_file for pdf_file, _ in parsed] == targets
+    assert [[text for text, _ in pages] for _, pages in parsed] == [
+        ["page 0", "page 1", "page 2"], ["page 0"], ["page 0", "page 1", "page 2", "page 3", "page 4"],
+    ]
+
+
+def test_timeout_is_per_file(make_loader):
+    # b hangs the only worker; c needs most of its own budget and must
+    # neither inherit b's wait nor queue behind the stuck worker
+    loader, targets = make_loader({"a.pdf": "2 0", "b.pdf": "1 -1", "c.pdf": "2 0.35", "d.pdf": "1 0"},
+                                  timeout=1.0, workers=1)
+
+    started = time.monotonic()
+    parsed = dict(loader._parse_parallel(targets))
+
+    assert parsed[targets[1]] is None
+    assert [len(parsed[f]) for f in (targets[0], targets[2], targets[3])] == [2, 2, 1]
+    assert time.monotonic() - started < 10
+
+
+def test_registry_is_saved_only_on_commit(make_loader):
+    loader, targets = make_loader({"a.pdf": "2 0", "b.pdf": "1 0"}, timeout=30, workers=0)
+
+    assert len(list(loader.iter_documents(only_changed=True, delta=loader.delta))) == 2
+    # Until the index built from them is saved, both files are still new
+    assert len(Data_Loader(config=loader.config).scan().added) == 2
+
+    loader.commit()
+    delta = Data_Loader(config=loader.config).scan()
+    assert delta.dirty == [] and sorted(delta.unchanged) == targets
@@ -0,0 +1,211 @@
+"""
+DataIngestion against a local stand-in for the source servers: a threaded
+http.server that serves a few PDFs with ETags, answers conditional requests
+with 304, serves byte ranges with 206 while If-Range still matches and
+serves one URL as HTML.
+"""
+
+import re
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from AI_Lawyer.entity.config_entity import DataConfig
+from AI_Lawyer.components.data_ingestion import DataIngestion, IncompleteDownloadError
+
+
+PDFS = {f"/act{i}.pdf": b"%PDF-1.4\n" + bytes([i]) * 200_000 + b"\n%%EOF\n" for i in range(4)}
+HTML = b"<html><body>viewer page</body></html>"
+
+
+def pdf_body(path, version):
+    # Each version of a file is a different body under a different ETag
+    return PDFS[path].replace(b"%PDF-1.4", f"%PDF-1.{3 + version}".encode())
+
+
+class PDFServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.statuses = []
+        self.delay = 0.2
+        self.version = 1
+        # Send only this many bytes of the body, then drop the connection
+        self.truncate = None
+        # Without Content-Length the body just ends when the connection closes
+        self.send_length = True
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=()):
+        with self.server.lock:
+            self.server.statuses.append((self.path, status))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        if self.server.send_length:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:self.server.truncate])
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.peak = max(self.server.peak, self.server.in_flight)
+        try:
+            # Long enough for concurrent requests to overlap
+            time.sleep(self.server.delay)
+            if self.path == "/viewer.pdf":
+                return self._reply(200, HTML, [("Content-Type", "text/html")])
+            if self.path not in PDFS:
+                return self._reply(404)
+            body = pdf_body(self.path, self.server.version)
+            etag = f'"{self.path}-v{self.server.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, headers=[("ETag", etag)])
+            headers = [("Content-Type", "application/pdf"), ("ETag", etag)]
+            match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+            # A Range whose If-Range no longer matches gets the whole new body
+            if match and self.headers.get("If-Range") in (None, etag):
+                start = int(match.group(1))
+                if start >= len(body):
+                    return self._reply(416, headers=[("Content-Range", f"bytes */{len(body)}")])
+                headers.append(("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"))
+                return self._reply(206, body[start:], headers)
+            self._reply(200, body, headers)
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    server = PDFServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_ingestion(tmp_path, urls, max_workers=4):
+    config = DataConfig(root_dir=tmp_path, source_url=urls, pdf_directory=tmp_path / "pdfs",
+                        max_workers=max_workers, connect_timeout=5, read_timeout=5)
+    return DataIngestion(config)
+
+
+def test_downloads_concurrently(server, tmp_path):
+    urls = [server.url(path) for path in PDFS]
+    results = make_ingestion(tmp_path, urls).download_pdfs()
+
+    assert all(results[url] is not None for url in urls)
+    for path, body in PDFS.items():
+        assert (tmp_path / "pdfs" / path.lstrip("/")).read_bytes() == body
+    assert server.peak > 1
+
+
+def test_rerun_is_not_modified(server, tmp_path):
+    urls = [server.url(path) for path in PDFS]
+    make_ingestion(tmp_path, urls).download_pdfs()
+    mtimes = {p.name: p.stat().st_mtime_ns for p in (tmp_path / "pdfs").glob("*.pdf")}
+    server.statuses.clear()
+
+    results = make_ingestion(tmp_path, urls).download_pdfs()
+
+    assert all(results[url] is not None for url in urls)
+    assert sorted(status for _, status in server.statuses) == [304] * len(PDFS)
+    assert mtimes == {p.name: p.stat().st_mtime_ns for p in (tmp_path / "pdfs").glob("*.pdf")}
+
+
+def test_rejects_non_pdf_content_type(server, tmp_path):
+    good, bad = server.url("/act0.pdf"), server.url("/viewer.pdf")
+    results = make_ingestion(tmp_path, [good, bad]).download_pdfs()
+
+    assert results[good] is not None
+    assert results[bad] is None
+    assert not (tmp_path / "pdfs" / "viewer.pdf").exists()
+    assert not list((tmp_path / "pdfs").glob("viewer.pdf*"))
+
+
+def test_failed_refresh_keeps_committed_entry(server, tmp_path):
+    url = server.url("/act1.pdf")
+    make_ingestion(tmp_path, [url]).download_pdfs()
+    save_path = tmp_path / "pdfs" / "act1.pdf"
+    manifest_path = DataIngestion.manifest_path_for(save_path)
+    committed = json.loads(manifest_path.read_text())
+    assert committed["complete"] and committed["etag"] == '"/act1.pdf-v1"'
+
+    # The file changes upstream and the refresh is cut off half way
+    server.version, server.truncate = 2, 100_000
+    results = make_ingestion(tmp_path, [url]).download_pdfs()
+
+    assert results[url] is None
+    assert save_path.read_bytes() == PDFS["/act1.pdf"]
+    manifest = json.loads(manifest_path.read_text())
+    assert {k: v for k, v in manifest.items() if k != "pending"} == committed
+    assert manifest["pending"]["etag"] == '"/act1.pdf-v2"'
+
+    # The next run still revalidates against v1 and replaces the file in full
+    server.truncate = None
+    results = make_ingestion(tmp_path, [url]).download_pdfs()
+
+    assert results[url] == save_path
+    manifest = json.loads(manifest_path.read_text())
+    assert "pending" not in manifest
+    assert manifest["complete"] and manifest["etag"] == '"/act1.pdf-v2"'
+
+
+def test_resumes_interrupted_download(server, tmp_path):
+    url = server.url("/act2.pdf")
+    save_path = tmp_path / "pdfs" / "act2.pdf"
+    part_path = DataIngestion.part_path_for(save_path)
+    server.truncate = 120_000
+
+    assert make_ingestion(tmp_path, [url]).download_pdfs()[url] is None
+    first = part_path.stat().st_size
+    assert 0 < first < len(PDFS["/act2.pdf"]) and not save_path.exists()
+
+    # A resumed range that ends early with no Content-Length is caught against Content-Range
+    server.truncate, server.send_length = 10_000, False
+    with pytest.raises(IncompleteDownloadError):
+        make_ingestion(tmp_path, [url]).download_file(url)
+    assert part_path.stat().st_size == first + 10_000
+
+    server.truncate, server.send_length = None, True
+    server.statuses.clear()
+    results = make_ingestion(tmp_path, [url]).download_pdfs()
+
+    assert results[url] == save_path and server.statuses == [("/act2.pdf", 206)]
+    assert save_path.read_bytes() == PDFS["/act2.pdf"] and not part_path.exists()
+    manifest = json.loads(DataIngestion.manifest_path_for(save_path).read_text())
+    assert manifest["complete"] and manifest["content_length"] == len(PDFS["/act2.pdf"])
+
+
+def test_changed_etag_restarts_download(server, tmp_path):
+    url = server.url("/act3.pdf")
+    save_path = tmp_path / "pdfs" / "act3.pdf"
+    server.truncate = 120_000
+    make_ingestion(tmp_path, [url]).download_pdfs()
+
+    # The file changes upstream before the resume: If-Range fails and the full new body comes back
+    server.version, server.truncate = 2, None
+    server.statuses.clear()
+    results = make_ingestion(tmp_path, [url]).download_pdfs()
+
+    assert results[url] == save_path and server.statuses == [("/act3.pdf", 200)]
+    assert save_path.read_bytes() == pdf_body("/act3.pdf", 2)
+    manifest = json.loads(DataIngestion.manifest_path_for(save_path).read_text())
+    assert manifest["etag"] == '"/act3.pdf-v2"' and "pending" not in manifest
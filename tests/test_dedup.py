@@ -0,0 +1,96 @@
+"""
+NearDuplicateFilter: exact copies are dropped regardless of case and
+spacing, near copies are dropped once their MinHash similarity reaches the
+threshold, and every removal is written to duplicates.json with a
+back-reference to the chunk that was kept.
+"""
+
+import json
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+from AI_Lawyer.components.chunk_store import ChunkStore
+from AI_Lawyer.components.dedup import NearDuplicateFilter
+from AI_Lawyer.entity.config_entity import DedupConfig
+
+
+SECTION = ("Whoever commits murder shall be punished with death or imprisonment for life and shall also be "
+           "liable to fine, and whoever attempts to commit murder shall be punished with imprisonment of "
+           "either description for a term which may extend to ten years and shall also be liable to fine")
+# One word changed near the end of the section
+AMENDED = SECTION.replace("ten years", "seven years")
+UNRELATED = ("The lessee shall keep the premises in good and tenantable repair and shall deliver them up "
+             "to the lessor at the end of the lease in the same condition")
+
+
+def document(text, page):
+    return Document(page_content=text, metadata={"source": "/pdfs/ipc.pdf", "page": page, "start_index": 0})
+
+
+def similarity(dedup, first, second):
+    words = [re.findall(r"\w+", text.lower()) for text in (first, second)]
+    return float(np.mean(dedup._signature(words[0]) == dedup._signature(words[1])))
+
+
+def test_signatures_are_deterministic():
+    first, second = NearDuplicateFilter(DedupConfig()), NearDuplicateFilter(DedupConfig())
+    words = SECTION.lower().split()
+
+    np.testing.assert_array_equal(first._signature(words), second._signature(words))
+    assert 0.5 < similarity(first, SECTION, AMENDED) < 1.0
+
+
+def test_exact_and_near_duplicates(tmp_path):
+    threshold = similarity(NearDuplicateFilter(DedupConfig()), SECTION, AMENDED)
+    dedup = NearDuplicateFilter(DedupConfig(threshold=threshold, duplicates_path=tmp_path / "duplicates.json"))
+    chunks = [document(SECTION, 1), document(f"  {SECTION.upper()}\n", 2), document(UNRELATED, 3),
+              document(AMENDED, 4)]
+
+    kept = dedup.filter(chunks)
+
+    assert [chunk.metadata["page"] for chunk in kept] == [1, 3]
+    assert kept[0].metadata["duplicate_sources"] == ["/pdfs/ipc.pdf#page=2", "/pdfs/ipc.pdf#page=4"]
+    assert "duplicate_sources" not in kept[1].metadata
+
+    dedup.save_duplicates()
+    saved = json.loads((tmp_path / "duplicates.json").read_text(encoding="utf-8"))
+    canonical = {"source": "/pdfs/ipc.pdf", "page": 1, "start_index": 0}
+    assert saved["report"] == {"total": 4, "kept": 2, "exact_duplicates": 1, "near_duplicates": 1,
+                               "embedding_dim": 384}
+    assert saved["duplicates"] == [
+        {"source": "/pdfs/ipc.pdf", "page": 2, "start_index": 0, "kind": "exact", "similarity": 1.0,
+         "canonical": canonical},
+        {"source": "/pdfs/ipc.pdf", "page": 4, "start_index": 0, "kind": "near",
+         "similarity": round(threshold, 3), "canonical": canonical},
+    ]
+
+
+def test_near_duplicate_below_threshold_is_kept():
+    threshold = similarity(NearDuplicateFilter(DedupConfig()), SECTION, AMENDED)
+    dedup = NearDuplicateFilter(DedupConfig(threshold=threshold + 1 / DedupConfig.num_perm))
+
+    kept = dedup.filter([document(SECTION, 1), document(AMENDED, 2)])
+
+    assert [chunk.metadata["page"] for chunk in kept] == [1, 2]
+    assert dedup.duplicates == [] and dedup.report.removed == 0
+
+
+def test_filter_chunk_store_across_batches():
+    dedup = NearDuplicateFilter(DedupConfig(threshold=0.5))
+
+    def batch(*texts):
+        store = ChunkStore()
+        for page, text in enumerate(texts, start=1):
+            doc_id = store.add_document(text, {"source": "/pdfs/ipc.pdf", "page": page})
+            store.add_chunk(doc_id, 0, len(text))
+        return store
+
+    first = dedup.filter(batch(SECTION, UNRELATED))
+    # The canonical chunk was kept by an earlier batch, so only the report records the copy
+    second = dedup.filter(batch(AMENDED, SECTION.lower()))
+
+    assert isinstance(first, ChunkStore) and len(first) == 2 and len(second) == 0
+    assert [duplicate["kind"] for duplicate in dedup.duplicates] == ["near", "exact"]
+    assert dedup.report.kept == 2 and dedup.report.removed == 2
@@ -0,0 +1,135 @@
+"""
+DocumentRegistry scans over a directory of small files: identical files
+under different names, renames and content changes, and what each means
+for the content-addressed index (stale hashes, moved chunks).
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from AI_Lawyer.components.document_registry import DocumentRegistry, file_sha256
+from AI_Lawyer.components.vector_index import build_faiss_store, refresh_chunks
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+
+    def write(name, content):
+        path = pdf_dir / name
+        path.write_bytes(content)
+        return path
+
+    def registry(parser_version="v1"):
+        return DocumentRegistry(pdf_dir, tmp_path / "registry.json", parser_version)
+
+    return pdf_dir, write, registry
+
+
+def commit_all(registry, pages=3):
+    delta = registry.scan()
+    for pdf_file in delta.dirty:
+        registry.record_parsed(pdf_file, pages)
+    registry.commit(delta)
+    return delta
+
+
+def test_duplicate_files_keep_their_own_entries(corpus):
+    pdf_dir, write, registry = corpus
+    a, b = write("a.pdf", b"same act"), write("b.pdf", b"same act")
+
+    delta = commit_all(registry())
+    assert delta.added == [a] and delta.duplicates == [b] and delta.dirty == [a]
+
+    reloaded = registry()
+    assert sorted(reloaded.entries) == [str(a), str(b)]
+    assert {entry["sha256"] for entry in reloaded.entries.values()} == {file_sha256(a)}
+    delta = reloaded.scan()
+    assert delta.unchanged == [a, b] and delta.dirty == [] and delta.stale_hashes == set()
+
+
+def test_removing_one_copy_keeps_the_content(corpus):
+    pdf_dir, write, registry = corpus
+    a, b = write("a.pdf", b"same act"), write("b.pdf", b"same act")
+    digest = file_sha256(a)
+    commit_all(registry())
+
+    os.remove(a)
+    delta = commit_all(registry())
+    # The index's chunks cited a.pdf; b.pdf takes them over instead of losing them
+    assert delta.removed == [str(a)] and delta.moved == {str(b): str(a)}
+    assert delta.stale_hashes == set()
+
+    os.remove(b)
+    delta = registry().scan()
+    assert delta.removed == [str(b)] and delta.stale_hashes == {digest}
+
+
+def test_rename_moves_chunks_without_reparsing_content(corpus):
+    pdf_dir, write, registry = corpus
+    a = write("a.pdf", b"the contract act")
+    commit_all(registry())
+
+    renamed = pdf_dir / "contract_act.pdf"
+    shutil.move(a, renamed)
+    delta = commit_all(registry())
+
+    assert delta.added == [] and delta.removed == [str(a)]
+    assert delta.moved == {str(renamed): str(a)} and delta.stale_hashes == set()
+    assert registry().scan().unchanged == [renamed]
+
+
+def test_changed_content_and_parser_upgrade_are_stale(corpus):
+    pdf_dir, write, registry = corpus
+    a, b = write("a.pdf", b"first version"), write("b.pdf", b"other act")
+    commit_all(registry())
+    old_hash = file_sha256(a)
+
+    write("a.pdf", b"second version, longer")
+    delta = commit_all(registry())
+    assert delta.changed == [a] and delta.unchanged == [b] and delta.stale_hashes == {old_hash}
+
+    delta = registry(parser_version="v2").scan()
+    assert delta.changed == [a, b] and delta.stale_hashes == {file_sha256(a), file_sha256(b)}
+
+
+def test_reads_version_1_registry(corpus):
+    pdf_dir, write, registry = corpus
+    a = write("a.pdf", b"the contract act")
+    stat = a.stat()
+    legacy = {"version": 1, "documents": {file_sha256(a): {
+        "path": str(a), "size": stat.st_size, "mtime": stat.st_mtime, "pages": 3, "parser_version": "v1"}}}
+    (pdf_dir.parent / "registry.json").write_text(json.dumps(legacy))
+
+    assert registry().scan().unchanged == [a]
+
+
+def test_rename_relabels_indexed_chunks(corpus):
+    pdf_dir, write, registry = corpus
+    a = write("a.pdf", b"the contract act")
+    commit_all(registry())
+    digest = file_sha256(a)
+
+    def chunks(source):
+        texts = ["Section 1. Short title.", "Section 2. Definitions."]
+        return texts, [{"source": source, "content_hash": digest, "page": 0, "start_index": 40 * i}
+                       for i in range(len(texts))]
+
+    texts, metadatas = chunks(str(a))
+    faiss_db = build_faiss_store(texts, metadatas, np.eye(2, 4, dtype=np.float32), None)
+
+    renamed = pdf_dir / "contract_act.pdf"
+    shutil.move(a, renamed)
+    delta = registry().scan()
+    texts, metadatas = chunks(str(renamed))
+
+    assert delta.stale_hashes == set()
+    assert refresh_chunks(faiss_db, texts, metadatas) == []
+    assert faiss_db.index.ntotal == 2
+    assert {faiss_db.docstore.search(doc_id).metadata["source"]
+            for doc_id in faiss_db.index_to_docstore_id.values()} == {str(renamed)}
@@ -0,0 +1,105 @@
+"""
+Parity of the local embedding backends: ONNX Runtime (fp32 and int8) must
+give the same vectors and the same neighbours as PyTorch, normalized the
+same way.
+
+Needs sentence-transformers and the model in the local cache; nothing is
+downloaded. AI_LAWYER_TEST_MODEL points at another model name or a local
+path. benchmark_backends.py runs the same comparison on the real corpus.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from AI_Lawyer.components.local_embedding import LocalSentenceTransformerEmbeddings
+
+
+MODEL = os.environ.get("AI_LAWYER_TEST_MODEL", "all-MiniLM-L6-v2")
+TOP_K = 5
+
+# (backend, quantize) -> (min cosine to the torch vectors, mean top-k overlap)
+THRESHOLDS = {
+    ("onnx", ""): (0.999, 0.95),
+    ("onnx", "avx2"): (0.97, 0.8),
+}
+
+SUBJECTS = ["theft", "murder", "bail", "divorce", "maintenance", "adoption", "arbitration",
+            "partnership", "insolvency", "income tax", "GST registration", "election petition"]
+TEMPLATES = [
+    "Section {n} of the Act lays down the punishment for {s}.",
+    "The court held that the law on {s} must be read with Article {n} of the Constitution.",
+    "An application relating to {s} shall be filed within {n} days of the order.",
+    "Chapter {n} deals with the procedure to be followed in cases of {s}.",
+]
+TEXTS = [template.format(n=3 + 7 * i + j, s=subject)
+         for i, subject in enumerate(SUBJECTS) for j, template in enumerate(TEMPLATES)]
+QUERIES = ["What is the punishment for theft?", "How do I apply for bail?", "Time limit to file a divorce appeal",
+           "procedure for insolvency", "GST registration rules", "Who can file an election petition?"]
+
+
+def make_embedder(backend, quantize, export_dir, normalize=True):
+    try:
+        embedder = LocalSentenceTransformerEmbeddings(MODEL, batch_size=16, normalize=normalize, backend=backend,
+                                                      quantize=quantize, offline=True, export_dir=str(export_dir))
+        embedder.encode(TEXTS[:1])
+    except ImportError as e:
+        pytest.skip(f"{backend} backend unavailable: {e}")
+    except Exception as e:
+        pytest.skip(f"{MODEL} ({backend}{', ' + quantize if quantize else ''}) could not be loaded offline: {e}")
+    return embedder
+
+
+@pytest.fixture(scope="module")
+def export_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("models")
+
+
+@pytest.fixture(scope="module")
+def reference(export_dir):
+    embedder = make_embedder("torch", "", export_dir)
+    return embedder.encode(TEXTS), np.array([embedder.embed_query(q) for q in QUERIES], dtype=np.float32)
+
+
+def top_k(documents, queries):
+    return np.argsort(-(queries @ documents.T), axis=1, kind="stable")[:, :TOP_K]
+
+
+@pytest.mark.parametrize("backend, quantize", list(THRESHOLDS))
+def test_backend_matches_torch(backend, quantize, export_dir, reference):
+    min_cosine, min_overlap = THRESHOLDS[(backend, quantize)]
+    documents, queries = reference
+    embedder = make_embedder(backend, quantize, export_dir)
+
+    vectors = embedder.encode(TEXTS)
+    query_vectors = np.array([embedder.embed_query(q) for q in QUERIES], dtype=np.float32)
+
+    # Vectors are unit length on both backends, so dot products are cosines
+    cosine = np.sum(vectors * documents, axis=1)
+    assert cosine.min() >= min_cosine, f"min cosine {cosine.min():.5f}"
+    assert np.sum(query_vectors * queries, axis=1).min() >= min_cosine
+
+    expected, got = top_k(documents, queries), top_k(vectors, query_vectors)
+    overlap = np.mean([len(set(e) & set(g)) / TOP_K for e, g in zip(expected, got)])
+    assert overlap >= min_overlap, f"top-{TOP_K} overlap {overlap:.2f}"
+
+
+@pytest.mark.parametrize("backend, quantize", list(THRESHOLDS))
+@pytest.mark.parametrize("normalize", [True, False])
+def test_backends_normalize_alike(backend, quantize, normalize, export_dir):
+    def norms(embedder):
+        vectors = embedder.encode(TEXTS)
+        assert vectors.dtype == np.float32 and vectors.flags.c_contiguous
+        query = np.asarray(embedder.embed_query(QUERIES[0]), dtype=np.float32)
+        return np.linalg.norm(np.vstack([vectors, query]), axis=1)
+
+    expected = norms(make_embedder("torch", "", export_dir, normalize=normalize))
+    got = norms(make_embedder(backend, quantize, export_dir, normalize=normalize))
+
+    if normalize:
+        np.testing.assert_allclose(expected, 1.0, atol=1e-4)
+        np.testing.assert_allclose(got, 1.0, atol=1e-4)
+    else:
+        # Whatever the model itself does, neither path adds or drops a normalization
+        np.testing.assert_allclose(got, expected, rtol=0.05)
@@ -0,0 +1,111 @@
+"""
+EmbeddingCache: hits and misses keyed by chunk text, LRU eviction past
+max_bytes, a separate cache per model, crash-safe saves and concurrent
+writers sharing one directory.
+"""
+
+import numpy as np
+import pytest
+
+from AI_Lawyer.components.embedding_cache import EmbeddingCache, text_key
+from conftest import HashEmbeddings
+
+
+def sections(start, count):
+    return [f"Section {i}. The court may condone delay for sufficient cause." for i in range(start, start + count)]
+
+
+def put_texts(cache, texts):
+    cache.put([text_key(text) for text in texts], HashEmbeddings().encode(texts))
+
+
+def cached(cache, texts):
+    rows = cache.lookup([text_key(text) for text in texts])
+    return rows, cache.get(rows[rows >= 0])
+
+
+def test_hit_and_miss(tmp_path):
+    cache = EmbeddingCache(tmp_path, "hash-embeddings")
+    put_texts(cache, sections(0, 5))
+    # Buffered vectors are served before they are saved
+    np.testing.assert_array_equal(cached(cache, sections(0, 5))[1], HashEmbeddings().encode(sections(0, 5)))
+    cache.save()
+
+    reopened = EmbeddingCache(tmp_path, "hash-embeddings")
+    # Re-wrapped text shares the key of the original
+    texts = ["Section 3.  The court may condone\ndelay for sufficient cause.", "Section 9. Unseen."]
+    rows, vectors = cached(reopened, texts)
+
+    assert len(reopened) == 5 and rows[1] == -1 and rows[0] >= 0
+    np.testing.assert_array_equal(vectors, HashEmbeddings().encode(sections(3, 1)))
+
+
+def test_least_recently_used_rows_evicted(tmp_path):
+    row_bytes = 4 * HashEmbeddings.dimension
+    cache = EmbeddingCache(tmp_path, "hash-embeddings", max_bytes=8 * row_bytes)
+    put_texts(cache, sections(0, 8))
+    cache.save()
+    cache.lookup([text_key(text) for text in sections(0, 3)])
+    put_texts(cache, sections(8, 5))
+    cache.save()
+
+    assert len(cache) == 8 and cache.nbytes <= 8 * row_bytes
+    # Sections 3-7 were used least recently
+    reopened = EmbeddingCache(tmp_path, "hash-embeddings", max_bytes=8 * row_bytes)
+    rows, vectors = cached(reopened, sections(0, 13))
+    assert np.flatnonzero(rows < 0).tolist() == [3, 4, 5, 6, 7]
+    np.testing.assert_array_equal(vectors, HashEmbeddings().encode(sections(0, 3) + sections(8, 5)))
+    # The compacted generation replaced the original files
+    assert sorted(path.name for path in reopened.cache_dir.glob("vectors*")) == ["vectors.1.f32"]
+
+
+def test_interrupted_save_keeps_committed_rows(tmp_path, monkeypatch):
+    cache = EmbeddingCache(tmp_path, "hash-embeddings")
+    put_texts(cache, sections(0, 4))
+    cache.save()
+
+    def crash(*args):
+        raise OSError("disk full")
+
+    put_texts(cache, sections(4, 4))
+    monkeypatch.setattr(cache, "_save_array", crash)
+    with pytest.raises(OSError):
+        cache.save()
+
+    # The appended vectors were never committed, so only the first save is seen
+    reopened = EmbeddingCache(tmp_path, "hash-embeddings")
+    rows, vectors = cached(reopened, sections(0, 8))
+    assert (rows[:4] >= 0).all() and (rows[4:] < 0).all()
+    np.testing.assert_array_equal(vectors, HashEmbeddings().encode(sections(0, 4)))
+
+
+def test_concurrent_writers_merge(tmp_path):
+    first = EmbeddingCache(tmp_path, "hash-embeddings")
+    second = EmbeddingCache(tmp_path, "hash-embeddings")
+    put_texts(first, sections(0, 4))
+    put_texts(second, sections(2, 4))
+    first.save()
+    second.save()
+
+    reopened = EmbeddingCache(tmp_path, "hash-embeddings")
+    rows, vectors = cached(reopened, sections(0, 6))
+    assert len(reopened) == 6 and (rows >= 0).all()
+    np.testing.assert_array_equal(vectors, HashEmbeddings().encode(sections(0, 6)))
+
+
+def test_model_change_invalidates(make_creator, tmp_path, monkeypatch):
+    from AI_Lawyer.components.local_embedding import EmbeddingCreator
+
+    encoded = []
+    encode = EmbeddingCreator._encode
+    monkeypatch.setattr(EmbeddingCreator, "_encode",
+                        lambda self, texts, model: encoded.append(len(texts)) or encode(self, texts, model))
+    texts = sections(0, 6)
+
+    make_creator(cache_dir=str(tmp_path / "cache")).embed_texts(texts, HashEmbeddings())
+    make_creator(cache_dir=str(tmp_path / "cache")).embed_texts(texts, HashEmbeddings())
+    make_creator(cache_dir=str(tmp_path / "cache"), model="other-model").embed_texts(texts, HashEmbeddings())
+    make_creator(cache_dir=str(tmp_path / "cache"), backend="onnx").embed_texts(texts, HashEmbeddings())
+
+    # Only the first run of each model (or backend) goes through it
+    assert encoded == [6, 6, 6]
@@ -0,0 +1,64 @@
+"""
+EmbeddingWorkerPool against the single-process embedder: vectors come back
+in input order whatever the shard each text landed in, and a worker started
+after the core sets ran out comes up unpinned instead of waiting for one.
+
+The pool tests need the model in the local cache; AI_LAWYER_TEST_MODEL
+points at another model name or a local path.
+"""
+
+import os
+import queue
+
+import numpy as np
+import pytest
+
+from AI_Lawyer.components import local_embedding
+from AI_Lawyer.components.local_embedding import EmbeddingWorkerPool, LocalSentenceTransformerEmbeddings
+
+
+MODEL = os.environ.get("AI_LAWYER_TEST_MODEL", "all-MiniLM-L6-v2")
+# Lengths vary so the length sort scatters neighbours across shards
+TEXTS = [f"Section {i}. " + "The tenant shall pay the rent. " * (i * 7 % 13) for i in range(90)]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    try:
+        embedder = LocalSentenceTransformerEmbeddings(MODEL, batch_size=8, offline=True)
+        return embedder.encode(TEXTS)
+    except Exception as e:
+        pytest.skip(f"{MODEL} could not be loaded offline: {e}")
+
+
+def make_pool(num_workers):
+    return EmbeddingWorkerPool(MODEL, num_workers=num_workers, threads_per_worker=1, shard_batches=2,
+                               batch_size=8, offline=True)
+
+
+def test_pool_keeps_input_order(reference):
+    pool = make_pool(2)
+    try:
+        vectors = pool.encode(TEXTS)
+        empty = pool.encode([])
+    finally:
+        pool.close()
+
+    np.testing.assert_allclose(vectors, reference, atol=1e-5)
+    assert empty.shape == (0, reference.shape[1])
+
+
+def test_worker_without_a_core_set_starts_unpinned(monkeypatch):
+    pinned = []
+    monkeypatch.setattr(local_embedding.os, "sched_setaffinity", lambda pid, cores: pinned.append(cores),
+                        raising=False)
+    monkeypatch.setattr(local_embedding, "_worker_embedder", None)
+    core_sets = queue.Queue()
+    core_sets.put({0})
+
+    local_embedding._init_embedding_worker(MODEL, {"offline": True}, 0, core_sets)
+    # As when the pool replaces a worker that died: the queue is already empty
+    local_embedding._init_embedding_worker(MODEL, {"offline": True}, 0, core_sets)
+
+    assert pinned == [{0}]
+    assert local_embedding._worker_embedder.model_name == MODEL
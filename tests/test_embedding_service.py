@@ -0,0 +1,62 @@
+"""
+EmbeddingService under concurrent load: bulk /encode requests and micro-
+batched /embed_query requests share one model, which must never be
+entered from two threads at once.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from AI_Lawyer.components.embedding_service import EmbeddingService, EmbeddingServiceClient
+
+
+class SingleThreadedEmbedder:
+    """Fails like a borrowed HF tokenizer if encode is re-entered from another thread."""
+
+    model_name = "single-threaded"
+    backend = "torch"
+    quantize = ""
+    dimension = 3
+
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    @staticmethod
+    def expected(texts):
+        return np.array([[len(t), sum(map(ord, t)) % 997, 1.0] for t in texts], dtype=np.float32)
+
+    def encode(self, texts):
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("Already borrowed")
+        try:
+            time.sleep(0.005)
+            return self.expected(texts)
+        finally:
+            self._busy.release()
+
+
+@pytest.fixture
+def service():
+    service = EmbeddingService(SingleThreadedEmbedder(), "http://127.0.0.1:0", max_wait_ms=2).start()
+    yield service
+    service.shutdown()
+
+
+def test_concurrent_encode_and_queries(service):
+    client = EmbeddingServiceClient(service.address)
+    batches = [[f"Section {i}.{j} of the Act" for j in range(8)] for i in range(24)]
+    queries = [f"What does section {i} say?" for i in range(48)]
+
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        encoded = executor.map(client.encode, batches)
+        answered = executor.map(client.embed_query, queries)
+        encoded, answered = list(encoded), list(answered)
+
+    for batch, vectors in zip(batches, encoded):
+        np.testing.assert_array_equal(vectors, SingleThreadedEmbedder.expected(batch))
+    np.testing.assert_array_equal(np.array(answered), SingleThreadedEmbedder.expected(queries))
+    assert client.info()["queries"] == len(queries)
@@ -0,0 +1,181 @@
+"""
+GeminiEmbedding against a local stand-in for the Gemini REST API: a
+threaded http.server that answers embedContent / batchEmbedContents with
+vectors derived from each text, and fails calls on a fixed schedule with
+429, 503 or a dropped connection.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from AI_Lawyer.components import embedding
+from AI_Lawyer.components.embedding import GeminiEmbedding, GeminiAPIError
+
+
+DIM = 8
+
+
+def fake_vector(text):
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [round((digest[i] - 127.5) / 127.5, 6) for i in range(DIM)]
+
+
+class GeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.texts = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.keys = set()
+        self.outcomes = []
+        # Call number -> "throttle" | "fault" | "drop"; every other call succeeds
+        self.schedule = lambda call: None
+        self.retry_after = "0"
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.keys.add(self.headers.get("x-goog-api-key"))
+            outcome = server.schedule(server.calls)
+            server.outcomes.append(outcome or "ok")
+        try:
+            # Long enough for concurrent batches to overlap
+            time.sleep(0.01)
+            if outcome == "drop":
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            if outcome == "throttle":
+                return self._reply(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                                   [("Retry-After", server.retry_after)])
+            if outcome == "fault":
+                return self._reply(503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+
+            if self.path.endswith(":batchEmbedContents"):
+                texts = [r["content"]["parts"][0]["text"] for r in payload["requests"]]
+            else:
+                texts = [payload["content"]["parts"][0]["text"]]
+            if "INVALID" in texts:
+                return self._reply(400, {"error": {"code": 400, "status": "INVALID_ARGUMENT"}})
+            with server.lock:
+                server.texts += len(texts)
+            if self.path.endswith(":batchEmbedContents"):
+                return self._reply(200, {"embeddings": [{"values": fake_vector(t)} for t in texts]})
+            return self._reply(200, {"embedding": {"values": fake_vector(texts[0])}})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def server():
+    server = GeminiServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    # Retry-After still applies; only the jittered backoff is taken out
+    monkeypatch.setattr(embedding, "backoff_delay", lambda attempt: 0.0)
+
+
+def make_client(server, **overrides):
+    options = dict(max_concurrency=4, requests_per_minute=600_000, max_retries=8, endpoint=server.endpoint)
+    options.update(overrides)
+    return GeminiEmbedding("embedding-001", "AIza-stub-key", **options)
+
+
+def faults(call):
+    if call % 11 == 5:
+        return "drop"
+    return {1: "throttle", 3: "fault"}.get(call % 7)
+
+
+def test_vectors_in_order_through_faults(server):
+    server.schedule = faults
+    texts = [f"Section {i}. Stub text number {i}." for i in range(750)]
+
+    vectors = make_client(server, batch_size=20).embed_documents(texts)
+    query = make_client(server).embed_query(texts[7])
+
+    assert vectors == [fake_vector(t) for t in texts]
+    assert query == fake_vector(texts[7])
+    # Every text was embedded once; the failed calls were all retried
+    assert server.texts == len(texts) + 1
+    assert {"throttle", "fault", "drop"} <= set(server.outcomes)
+    assert 1 < server.peak <= 4
+    # The key travels in a header, never in the URL
+    assert server.keys == {"AIza-stub-key"}
+
+
+def test_throttled_call_waits_for_retry_after(server):
+    server.schedule = lambda call: "throttle" if call == 1 else None
+    server.retry_after = "0.3"
+
+    start = time.monotonic()
+    assert make_client(server).embed_query("Section 1.") == fake_vector("Section 1.")
+    assert time.monotonic() - start >= 0.3
+    assert server.outcomes == ["throttle", "ok"]
+
+
+def test_gives_up_after_max_retries(server):
+    server.schedule = lambda call: "fault"
+
+    with pytest.raises(GeminiAPIError) as error:
+        make_client(server, max_retries=2).embed_query("Section 1.")
+    assert error.value.status == 503 and server.calls == 3
+
+
+def test_client_errors_are_not_retried(server):
+    with pytest.raises(GeminiAPIError) as error:
+        make_client(server).embed_documents(["Section 1.", "INVALID"])
+    assert error.value.status == 400 and server.calls == 1
+
+
+def test_requests_per_minute_is_respected(server):
+    # 100 texts a second, with a burst of at most 100: 300 texts need 2 seconds
+    texts = [f"Rule {i}." for i in range(300)]
+    client = make_client(server, batch_size=10, requests_per_minute=6000)
+
+    start = time.monotonic()
+    vectors = client.embed_documents(texts)
+    elapsed = time.monotonic() - start
+
+    assert vectors == [fake_vector(t) for t in texts]
+    assert elapsed >= 1.9
@@ -0,0 +1,92 @@
+"""
+LegalChunker: chunks never cross a Part / Chapter / Schedule boundary,
+carry the act and section (or article) labels in force, and an over-long
+section is split into pieces that overlap by chunk_overlap.
+"""
+
+from langchain_core.documents import Document
+
+from AI_Lawyer.components.chunking_component import Chunking_text
+from AI_Lawyer.components.legal_chunker import LegalChunker
+from AI_Lawyer.entity.config_entity import ChunkingConfig
+
+
+LONG_SECTION = " ".join(f"The officer shall record reason {n} in writing before acting." for n in range(20))
+
+PAGES = [
+    "PART I\nPRELIMINARY\n"
+    "1. Short title.—This Act may be called the Model Code.\n"
+    "2. Definitions.—In this Act, unless the context otherwise requires, words have their usual meaning.\n"
+    "CHAPTER II\nOF OFFENCES\n"
+    "3. Theft.—Whoever dishonestly takes property commits theft.\n",
+    # The page opens mid-section; the Chapter and Section carry over from the previous page
+    "and shall be punished with imprisonment.\n"
+    f"4. Powers of officers.—{LONG_SECTION}\n"
+    "PART II\nPROCEDURE\n"
+    "5. Arrest.—An officer may arrest without warrant.\n"
+    "THE FIRST SCHEDULE\n"
+    "Form of warrant, to be used under the Schedule to this Act.\n",
+]
+
+
+def chunk(pages, title="The Model Code, 2024", chunk_size=300, chunk_overlap=60):
+    documents = [Document(page_content=text, metadata={"source": "/pdfs/model-code.pdf", "page": page,
+                                                       "Title": title})
+                 for page, text in enumerate(pages)]
+    config = ChunkingConfig(chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True,
+                            strategy="legal")
+    return list(Chunking_text(config).main(documents))
+
+
+def labels(document):
+    return tuple(document.metadata.get(key) for key in ("part", "chapter", "schedule", "section"))
+
+
+def test_boundaries_and_labels():
+    chunks = chunk(PAGES)
+    short = [document for document in chunks if document.metadata["section"] != "4"]
+
+    assert [(document.metadata["page"], labels(document)) for document in short] == [
+        (0, ("I", None, None, "1-2")),
+        (0, ("I", "II", None, "3")),
+        (1, ("I", "II", None, "3")),
+        (1, ("II", None, None, "5")),
+        (1, (None, None, "THE FIRST SCHEDULE", None)),
+    ]
+    assert short[0].page_content.startswith("PART I") and short[1].page_content.startswith("CHAPTER II")
+    assert short[2].page_content == "and shall be punished with imprisonment."
+    # A lower-case "the Schedule" in prose is not a heading
+    assert short[-1].page_content.startswith("THE FIRST SCHEDULE\nForm of warrant")
+    for document in chunks:
+        assert document.metadata["act"] == "The Model Code, 2024" and document.metadata["article"] is None
+        text = PAGES[document.metadata["page"]]
+        start = document.metadata["start_index"]
+        assert text[start:start + len(document.page_content)] == document.page_content
+
+
+def test_long_section_pieces_overlap():
+    pieces = [document for document in chunk(PAGES) if document.metadata["section"] == "4"]
+    section = PAGES[1][PAGES[1].index("4. Powers"):PAGES[1].index("\nPART II")]
+
+    assert len(pieces) > 3 and all(len(piece.page_content) <= 300 for piece in pieces)
+    assert all(labels(piece) == ("I", "II", None, "4") for piece in pieces)
+    assert pieces[0].page_content.startswith("4. Powers") and section.endswith(pieces[-1].page_content)
+    for previous, piece in zip(pieces, pieces[1:]):
+        previous_end = previous.metadata["start_index"] + len(previous.page_content)
+        assert 0 < previous_end - piece.metadata["start_index"] <= 60
+
+    # Without overlap the pieces tile the section exactly
+    pieces = [document for document in chunk(PAGES, chunk_overlap=0) if document.metadata["section"] == "4"]
+    for previous, piece in zip(pieces, pieces[1:]):
+        assert piece.metadata["start_index"] >= previous.metadata["start_index"] + len(previous.page_content)
+
+
+def test_constitution_units_are_articles():
+    chunker = LegalChunker(chunk_size=500)
+    text = "PART III\nFUNDAMENTAL RIGHTS\n21. Protection of life.—No person shall be deprived of his life.\n" \
+           "21A. Right to education.—The State shall provide free education.\n"
+
+    spans = chunker.split_spans(text, {"source": "/pdfs/constitution-of-india.pdf"}, chunker.new_state())
+
+    assert [labels for _, _, labels in spans] == [{"act": "constitution-of-india", "part": "III", "chapter": None,
+                                                   "schedule": None, "section": None, "article": "21-21A"}]
@@ -0,0 +1,52 @@
+"""
+ModelRegistry: one load per key however many threads ask, and `using`
+never lets two threads run the same model at once.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from AI_Lawyer.components.model_registry import ModelRegistry
+
+
+class NotThreadSafe:
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    def run(self):
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("Already borrowed")
+        try:
+            time.sleep(0.002)
+        finally:
+            self._busy.release()
+
+
+def test_concurrent_get_loads_once():
+    registry, loads = ModelRegistry(), []
+
+    def loader():
+        loads.append(1)
+        time.sleep(0.05)
+        return NotThreadSafe()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        models = list(executor.map(lambda _: registry.get("m", loader), range(16)))
+
+    assert len(loads) == 1 and all(model is models[0] for model in models)
+
+
+def test_using_serializes_a_model_across_threads():
+    registry = ModelRegistry()
+
+    def run(_):
+        with registry.using("m", NotThreadSafe) as model:
+            model.run()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(run, range(64)))
+
+    # Different models are not held back by each other's lock
+    with registry.using("m", NotThreadSafe), registry.using("other", NotThreadSafe) as other:
+        other.run()
@@ -0,0 +1,98 @@
+"""
+Fast text-layer extractors: pages with readable text stay on the fast
+backend, while pages with no text layer, broken text or (for pypdfium2)
+ruled tables are re-extracted with pdfplumber.
+"""
+
+import pytest
+
+from AI_Lawyer.components import chunking_component
+from AI_Lawyer.components.chunking_component import PdfPlumberExtractor, get_extractor, looks_broken
+
+
+SPACED = " ".join("Section 3 applies to all persons in India")
+TABLE = "\n".join(f"{72 + 10 * i} 400 8 8 re S" for i in range(45))
+PAGE_CONTENT = [
+    "BT /F1 12 Tf 72 720 Td (Section 1. Short title.) Tj ET",
+    # A scanned page: graphics but no text layer
+    "72 72 200 300 re S",
+    f"BT /F1 12 Tf 72 720 Td ({SPACED}) Tj ET",
+    f"BT /F1 12 Tf 72 720 Td (Section 4. Rates of duty.) Tj ET\n{TABLE}",
+]
+
+
+def write_pdf(path, contents):
+    """A minimal PDF with one Helvetica page per content stream."""
+    count = len(contents)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [" + " ".join(f"{4 + 2 * i} 0 R" for i in range(count)) + f"] /Count {count} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, content in enumerate(contents):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+
+    body, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(body)
+    return str(path)
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    """Page indexes re-extracted with pdfplumber."""
+    pages = []
+    extract_page = PdfPlumberExtractor.extract_page
+
+    def recording(self, pdf, page_index):
+        pages.append(page_index)
+        return extract_page(self, pdf, page_index)
+
+    monkeypatch.setattr(PdfPlumberExtractor, "extract_page", recording)
+    return pages
+
+
+def test_looks_broken():
+    assert looks_broken(SPACED)
+    assert looks_broken("Section ��� 1")
+    assert not looks_broken("Section 1. Short title.") and not looks_broken("   ")
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("pypdfium2", ["pypdfium2", "pdfplumber", "pdfplumber", "pdfplumber"]),
+    # pypdf has no table heuristic
+    ("pypdf", ["pypdf", "pdfplumber", "pdfplumber", "pypdf"]),
+])
+def test_fallback_to_pdfplumber(tmp_path, fallbacks, name, expected):
+    pdf_path = write_pdf(tmp_path / "act.pdf", PAGE_CONTENT)
+    extractor = get_extractor(name)
+
+    pages = extractor.extract(pdf_path)
+
+    assert extractor.page_count(pdf_path) == 4
+    assert [metadata["extractor"] for _, metadata in pages] == expected
+    assert fallbacks == [page for page, used in enumerate(expected) if used == "pdfplumber"]
+    assert [metadata["page"] for _, metadata in pages] == [0, 1, 2, 3]
+    assert pages[0][0].strip() == "Section 1. Short title." and pages[1][0] == ""
+    assert pages[3][0].strip().startswith("Section 4. Rates of duty.")
+
+
+def test_page_range_opens_pdfplumber_only_when_needed(tmp_path, fallbacks, monkeypatch):
+    pdf_path = write_pdf(tmp_path / "act.pdf", PAGE_CONTENT)
+    opened = []
+    monkeypatch.setattr(chunking_component.pdfplumber, "open",
+                        lambda path, _open=chunking_component.pdfplumber.open: opened.append(path) or _open(path))
+
+    pages = get_extractor("pypdfium2").extract(pdf_path, 0, 1)
+    assert len(pages) == 1 and opened == [] and fallbacks == []
+
+    pages = get_extractor("pypdfium2").extract(pdf_path, 1, 3)
+    assert [metadata["page"] for _, metadata in pages] == [1, 2] and opened == [pdf_path] and fallbacks == [1, 2]
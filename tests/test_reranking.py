@@ -0,0 +1,115 @@
+"""
+Compressed stores with exact re-ranking: RawVectors bookkeeping, raw
+vectors that follow every add and remove on the index, conversion to SQ /
+PQ specs, and the recall report measured with held-out queries.
+"""
+
+import logging
+
+import faiss
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.components.reranking import RawVectors, compression_report, sample_query_texts
+from AI_Lawyer.components.store_io import store_dir, write_vector_store
+from AI_Lawyer.components.vector_index import (
+    add_vectors, build_faiss_store, chunk_label, convert_index, remove_chunks, stored_vectors
+)
+from conftest import HashEmbeddings
+
+
+def chunks(count, start=0):
+    texts = [f"Section {i}. The tenant shall pay rent on day {i % 28 + 1} of each month." for i in
+             range(start, start + count)]
+    return texts, [{"source": "act.pdf", "content_hash": "h-act", "start_index": 100 * i}
+                   for i in range(start, start + count)]
+
+
+def assert_raw_in_sync(faiss_db):
+    labels = np.sort(stored_vectors(faiss_db.index)[0])
+    assert np.array_equal(faiss_db.raw_vectors.labels, labels)
+    assert sorted(faiss_db.index_to_docstore_id) == labels.tolist()
+    texts = [faiss_db.docstore.search(faiss_db.index_to_docstore_id[int(label)]).page_content for label in labels]
+    np.testing.assert_array_equal(faiss_db.raw_vectors.get(labels), HashEmbeddings().encode(texts))
+
+
+def test_raw_vectors_lookup_and_round_trip(tmp_path):
+    vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+    raw = RawVectors([7, 2], vectors[:2], dimension=3)
+    # Buffered adds merge on the next lookup; a label already stored keeps its first vector
+    raw.add([5, 2], vectors[2:])
+
+    np.testing.assert_array_equal(raw.get([2, 5, 7]), vectors[[1, 2, 0]])
+    raw.remove([7])
+    assert len(raw) == 2
+    with pytest.raises(KeyError):
+        raw.get([7])
+
+    raw.save(tmp_path)
+    loaded = RawVectors.load(tmp_path, dimension=3)
+    assert RawVectors.exists(tmp_path) and isinstance(loaded.vectors, np.memmap)
+    np.testing.assert_array_equal(loaded.get([5, 2]), vectors[[2, 1]])
+
+
+def test_add_and_remove_keep_raw_vectors_in_sync():
+    texts, metadatas = chunks(300)
+    faiss_db = build_faiss_store(texts, metadatas, HashEmbeddings().encode(texts), HashEmbeddings(),
+                                 index_spec="SQ8", rerank_factor=4)
+    assert faiss_db.raw_vectors is not None
+
+    new_texts, new_metadatas = chunks(20, start=300)
+    add_vectors(faiss_db, new_texts + texts[:5], new_metadatas + metadatas[:5],
+                HashEmbeddings().encode(new_texts + texts[:5]))
+    ids = [faiss_db.index_to_docstore_id[label] for label in sorted(faiss_db.index_to_docstore_id)[::7]]
+    assert remove_chunks(faiss_db, ids) == len(ids)
+
+    assert faiss_db.index.ntotal == 320 - len(ids)
+    assert_raw_in_sync(faiss_db)
+    assert all(chunk_label(doc_id) not in faiss_db.index_to_docstore_id for doc_id in ids)
+
+
+@pytest.mark.parametrize("index_spec", ["SQ8", "PQ8x4"])
+def test_convert_to_compressed_reranks_exactly(index_spec):
+    texts, metadatas = chunks(400)
+    faiss_db = build_faiss_store(texts, metadatas, HashEmbeddings().encode(texts), HashEmbeddings())
+    flat = HashEmbeddings().encode(texts)
+
+    convert_index(faiss_db, index_spec, rerank_factor=8)
+
+    assert faiss.downcast_index(faiss_db.index.index).sa_code_size() < faiss_db.index.d * 4
+    assert_raw_in_sync(faiss_db)
+    for query in HashEmbeddings().encode([f"rent due on day {i}" for i in range(10)]):
+        hits = faiss_db.similarity_search_with_score_by_vector(query.tolist(), k=3)
+        rows = [texts.index(doc.page_content) for doc, _ in hits]
+        # Scores are exact L2 distances to the full-precision vectors, in order
+        np.testing.assert_allclose([score for _, score in hits], np.sum((flat[rows] - query) ** 2, axis=1),
+                                   rtol=1e-5)
+        assert [score for _, score in hits] == sorted(score for _, score in hits)
+        assert all(isinstance(doc, Document) for doc, _ in hits)
+
+
+def test_report_uses_held_out_queries(tmp_path):
+    texts, metadatas = chunks(400)
+    faiss_db = build_faiss_store(texts, metadatas, HashEmbeddings().encode(texts), HashEmbeddings(),
+                                 index_spec="PQ8x4", rerank_factor=8)
+    write_vector_store(faiss_db, tmp_path, "PQ8x4")
+
+    queries = sample_query_texts(faiss_db, count=50)
+    assert len(queries) == 50 and not set(queries) & set(texts)
+    report = compression_report(faiss_db, store_dir(tmp_path), "PQ8x4", HashEmbeddings().encode(queries))
+
+    assert report["vectors"] == 400 and report["index_bytes_per_vector"] < report["flat_bytes_per_vector"]
+    assert 0 <= report["recall@10"] <= report["recall@10_reranked"] <= 1
+    # Without queries only the sizes are reported
+    assert "recall@10" not in compression_report(faiss_db, store_dir(tmp_path), "PQ8x4")
+
+
+def test_creator_reports_compressed_index(make_creator, caplog):
+    texts, metadatas = chunks(300)
+    creator = make_creator(index_spec="SQ8", rerank_factor=4)
+    caplog.set_level(logging.INFO, logger="AI_Lawyer_Logger")
+
+    creator.create_vector_store([Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)])
+
+    assert any("recall@10 vs flat" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,125 @@
+"""
+Per-domain shards: chunks split by the domain of their source PDF, queries
+routed by shard centroids with hits merged by distance, and incremental
+updates that load and save only the shards a delta touches.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.components.chunk_store import ChunkStore, chunk_content_hash, texts_and_metadatas
+from AI_Lawyer.components.document_registry import DocumentDelta
+from AI_Lawyer.components.sharding import ShardRouter, ShardedVectorStore, split_by_domain
+from AI_Lawyer.components.store_io import store_dir
+from AI_Lawyer.entity.config_entity import ShardingConfig
+from conftest import HashEmbeddings
+
+
+DOMAINS = {"criminal": ["https://acts.example/ipc.pdf"], "civil": ["https://acts.example/contract.pdf"]}
+FILE_DOMAINS = {"ipc.pdf": "criminal", "contract.pdf": "civil"}
+
+
+def act(name, version=1, sections=6):
+    return (f"/pdfs/{name}", f"h-{name}-{version}",
+            " ".join(f"{name[:-4]} v{version} section {n} sets out rule {n}." for n in range(sections)))
+
+
+def chunk_store(*acts):
+    """One chunk per sentence of each act."""
+    store = ChunkStore()
+    for path, content_hash, text in acts:
+        doc_id = store.add_document(text, {"source": path, "content_hash": content_hash})
+        start = 0
+        while start < len(text):
+            end = text.find(".", start) + 1
+            store.add_chunk(doc_id, start, end)
+            start = end + 1
+    return store
+
+
+class FixedShard:
+    def __init__(self, hits):
+        self.hits = hits
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        return [(Document(page_content=text, metadata={}), score) for text, score in self.hits[:k]]
+
+
+def test_split_chunk_store_by_domain():
+    store = chunk_store(act("ipc.pdf"), act("contract.pdf"), act("gazette.pdf"), act("crpc.pdf"))
+
+    groups = split_by_domain(store, FILE_DOMAINS)
+    by_documents = split_by_domain(list(store), FILE_DOMAINS)
+
+    assert sorted(groups) == sorted(by_documents) == ["civil", "criminal", "other"]
+    for domain, chunks in groups.items():
+        assert isinstance(chunks, ChunkStore)
+        texts, metadatas = texts_and_metadatas(chunks)
+        assert (texts, metadatas) == texts_and_metadatas(by_documents[domain])
+    assert {metadata["source"] for metadata in texts_and_metadatas(groups["other"])[1]} == \
+        {"/pdfs/gazette.pdf", "/pdfs/crpc.pdf"}
+
+
+def test_route_by_best_centroid():
+    centroids = {"criminal": np.array([[1.0, 0.0]]), "civil": np.array([[0.0, 1.0], [0.8, 0.6]]),
+                 "tax": np.array([[-1.0, 0.0]])}
+    shards = {domain: FixedShard([]) for domain in centroids}
+    router = ShardRouter(shards, centroids, HashEmbeddings(), top_shards=2)
+
+    # civil is scored by its best centroid, not their mean
+    assert router.route([1.0, 0.0]) == [("criminal", 1.0), ("civil", pytest.approx(0.8))]
+    router.top_shards = 0
+    assert [domain for domain, _ in router.route([0.0, 1.0])] == ["civil", "criminal", "tax"]
+    router.close()
+
+
+def test_hits_merged_by_distance_across_shards():
+    shards = {"criminal": FixedShard([("ipc 302", 0.1), ("ipc 304", 0.5)]),
+              "civil": FixedShard([("contract 10", 0.2), ("contract 73", 0.3)]),
+              "tax": FixedShard([("gst 9", 0.05)])}
+    centroids = {"criminal": np.array([[1.0, 0.0]]), "civil": np.array([[0.8, 0.6]]), "tax": np.array([[-1.0, 0.0]])}
+    router = ShardRouter(shards, centroids, HashEmbeddings(), top_shards=2)
+
+    hits = router.similarity_search_with_score_by_vector([1.0, 0.0], k=3)
+    assert [(doc.page_content, doc.metadata["shard"], score) for doc, score in hits] == [
+        ("ipc 302", "criminal", 0.1), ("contract 10", "civil", 0.2), ("contract 73", "civil", 0.3)]
+
+    # Explicit domains bypass routing
+    hits = router.similarity_search_with_score_by_vector([1.0, 0.0], k=1, domains=["tax", "criminal"])
+    assert [(doc.page_content, score) for doc, score in hits] == [("gst 9", 0.05)]
+    router.close()
+
+
+@pytest.fixture
+def sharded(make_creator):
+    config = make_creator(path="store").config
+    return ShardedVectorStore(config, ShardingConfig(enabled=True, domains=DOMAINS, top_shards=0))
+
+
+def test_update_touches_only_its_shard(sharded):
+    ipc, contract, gazette = act("ipc.pdf"), act("contract.pdf"), act("gazette.pdf")
+    table = sharded.build(chunk_store(ipc, contract, gazette))
+    assert table["civil"]["content_hashes"] == ["h-contract.pdf-1"] and table["criminal"]["vectors"] == 6
+    versions = {domain: store_dir(sharded.root / domain) for domain in table}
+
+    new_contract = act("contract.pdf", version=2, sections=8)
+    delta = DocumentDelta(changed=[new_contract[0]], unchanged=[ipc[0], gazette[0]],
+                          hashes={ipc[0]: ipc[1], new_contract[0]: new_contract[1], gazette[0]: gazette[1]},
+                          stale_hashes={contract[1]})
+    updated = sharded.update(chunk_store(new_contract), delta)
+
+    assert updated["civil"]["content_hashes"] == ["h-contract.pdf-2"] and updated["civil"]["vectors"] == 8
+    assert {domain: updated[domain] for domain in ("criminal", "other")} == \
+        {domain: table[domain] for domain in ("criminal", "other")}
+    assert store_dir(sharded.root / "civil") != versions["civil"]
+    assert all(store_dir(sharded.root / domain) == versions[domain] for domain in ("criminal", "other"))
+
+    # The updated shard answers queries for the new content, with its shard recorded
+    router = sharded.load(HashEmbeddings())
+    text = "contract v2 section 7 sets out rule 7."
+    best, score = router.similarity_search_with_score(text, k=1)[0]
+    assert best.page_content == text and best.metadata["shard"] == "civil" and score == pytest.approx(0, abs=1e-5)
+    stored = {chunk_content_hash(doc_id) for doc_id in router.shards["civil"].index_to_docstore_id.values()}
+    assert stored == {"h-contract.pdf-2"}
+    router.close()
@@ -0,0 +1,115 @@
+"""
+Saved vector stores: the compact docstore round trip, its in-memory add /
+delete overlays, versioned saves that readers see whole or not at all, and
+the fallback load of stores saved as a LangChain pickle.
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.components import store_io
+from AI_Lawyer.components.store_io import (
+    CURRENT_FILE, INDEX_FILE, VERSIONS_DIR, load_docstore, read_index, store_dir, write_vector_store
+)
+from AI_Lawyer.components.vector_index import build_faiss_store, chunk_label, load_index_params
+from conftest import HashEmbeddings
+
+
+METADATAS = [
+    {"source": "act.pdf", "content_hash": "h-act", "page": 0, "start_index": 0},
+    {"source": "act.pdf", "content_hash": "h-act", "page": 3, "page_end": 4, "start_index": 812},
+    {"source": "rules.pdf", "content_hash": "h-rules", "page": "iv", "start_index": 5, "act": "Rules, 2019"},
+    {"source": "rules.pdf", "content_hash": "h-rules", "section": "2(1)(a)", "pinned": True},
+]
+TEXTS = ["Section 1. Short title.", "Section 2. Definitions — “Court” means…", "Rule 3. Fees.", "Form A"]
+
+
+def make_store(texts=TEXTS, metadatas=METADATAS):
+    return build_faiss_store(texts, metadatas, HashEmbeddings().encode(texts), HashEmbeddings())
+
+
+def documents(docstore, index_to_docstore_id):
+    return {doc_id: (docstore.search(doc_id).page_content, docstore.search(doc_id).metadata)
+            for doc_id in index_to_docstore_id.values()}
+
+
+def test_compact_docstore_round_trip(tmp_path):
+    faiss_db = make_store()
+    write_vector_store(faiss_db, tmp_path, "Flat")
+
+    docstore, index_to_docstore_id = load_docstore(store_dir(tmp_path))
+
+    assert dict(index_to_docstore_id.items()) == dict(faiss_db.index_to_docstore_id.items())
+    assert documents(docstore, index_to_docstore_id) == documents(faiss_db.docstore, faiss_db.index_to_docstore_id)
+    assert read_index(store_dir(tmp_path)).ntotal == len(TEXTS)
+
+
+def test_overlays_add_and_delete(tmp_path):
+    write_vector_store(make_store(), tmp_path, "Flat")
+    docstore, index_to_docstore_id = load_docstore(store_dir(tmp_path))
+    kept, dropped, replaced = list(index_to_docstore_id.values())[:3]
+
+    del index_to_docstore_id[chunk_label(dropped)]
+    docstore.delete([dropped, replaced])
+    docstore.add({replaced: Document(page_content="Section 2. Amended.", metadata={"source": "act.pdf"})})
+    index_to_docstore_id[chunk_label("new")] = "new"
+    docstore.add({"new": Document(page_content="Rule 9.", metadata={})})
+
+    assert "not found" in docstore.search(dropped)
+    assert docstore.search(replaced).page_content == "Section 2. Amended."
+    assert docstore.search(kept).page_content in TEXTS and docstore.search("new").page_content == "Rule 9."
+    assert chunk_label(dropped) not in index_to_docstore_id and chunk_label("new") in index_to_docstore_id
+    assert len(index_to_docstore_id) == len(list(index_to_docstore_id)) == len(TEXTS)
+    with pytest.raises(KeyError):
+        del index_to_docstore_id[chunk_label(dropped)]
+
+
+def test_save_switches_versions_whole(tmp_path):
+    write_vector_store(make_store(TEXTS[:2], METADATAS[:2]), tmp_path, "Flat")
+    first = store_dir(tmp_path)
+    write_vector_store(make_store(), tmp_path, "Flat")
+    second = store_dir(tmp_path)
+
+    # A reader that resolved the first version before the second save still reads it whole
+    assert second != first and read_index(first).ntotal == 2 and read_index(second).ntotal == len(TEXTS)
+    assert len(load_docstore(first)[1]) == 2
+
+    write_vector_store(make_store(), tmp_path, "Flat")
+    assert not first.exists() and second.exists()
+    versions = sorted(p.name for p in (tmp_path / VERSIONS_DIR).iterdir())
+    assert versions == sorted([second.name, store_dir(tmp_path).name])
+
+
+def test_failed_save_keeps_current_version(tmp_path, monkeypatch):
+    write_vector_store(make_store(), tmp_path, "Flat")
+    live = store_dir(tmp_path)
+
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(store_io, "save_index_params", fail)
+    with pytest.raises(OSError):
+        write_vector_store(make_store(TEXTS[:1], METADATAS[:1]), tmp_path, "Flat")
+
+    assert store_dir(tmp_path) == live and [p.name for p in (tmp_path / VERSIONS_DIR).iterdir()] == [live.name]
+    assert read_index(live).ntotal == len(TEXTS) and load_index_params(live)["index_spec"] == "Flat"
+
+
+def test_loads_legacy_pickle_store(make_creator, tmp_path):
+    creator = make_creator()
+    legacy = make_store()
+    legacy.save_local(str(creator.db_path))
+
+    faiss_db = creator.load_vector_store(HashEmbeddings(), mmap=False)
+    assert documents(faiss_db.docstore, faiss_db.index_to_docstore_id) == \
+        documents(legacy.docstore, legacy.index_to_docstore_id)
+    hits = faiss_db.similarity_search_by_vector(HashEmbeddings().embed_query(TEXTS[2]), k=1)
+    assert hits[0].page_content == TEXTS[2]
+
+    # The first versioned save keeps the pickle for readers still on it; the next one removes it
+    creator.save_vector_store(faiss_db)
+    assert (creator.db_path / CURRENT_FILE).exists() and (creator.db_path / "index.pkl").exists()
+    creator.save_vector_store(creator.load_vector_store(HashEmbeddings(), mmap=False))
+    assert not (creator.db_path / "index.pkl").exists() and not (creator.db_path / INDEX_FILE).exists()
+    assert np.array_equal(np.sort(list(creator.load_vector_store(mmap=True).index_to_docstore_id)),
+                          np.sort(list(legacy.index_to_docstore_id)))
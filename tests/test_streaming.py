@@ -0,0 +1,40 @@
+"""StreamingPipeline shutdown: a failing stage must release the source."""
+
+import threading
+
+import pytest
+
+from AI_Lawyer.utils.streaming import StreamingPipeline, rebatch
+
+
+def test_runs_stages_in_order():
+    collected = []
+    stats = StreamingPipeline(queue_size=2).run(
+        ([i] for i in range(10)),
+        [("double", lambda items: [[2 * i for i in items]]), ("rebatch", rebatch(4))],
+        sink=collected.append,
+    )
+
+    assert collected == [[0, 2, 4, 6], [8, 10, 12, 14], [16, 18]]
+    assert [s.items_out for s in stats] == [10, 10, 3]
+
+
+def test_failing_stage_closes_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed.set()
+
+    def stage(item):
+        if item == 3:
+            raise RuntimeError("boom")
+        return [item]
+
+    with pytest.raises(RuntimeError, match="boom"):
+        StreamingPipeline(queue_size=1).run(source(), [("stage", stage)])
+
+    assert closed.is_set()
@@ -0,0 +1,92 @@
+"""
+ExtractedTextCache: parsed pages are served again for the same content hash
+and parser version, under the file's current path; a new parser version
+misses, so every PDF is re-extracted.
+"""
+
+import zlib
+import dataclasses
+
+from AI_Lawyer.components import chunking_component
+from AI_Lawyer.components.chunking_component import Data_Loader, PDFExtractor
+from AI_Lawyer.components.text_cache import ExtractedTextCache
+from AI_Lawyer.entity.config_entity import DataConfig
+
+
+PAGES = [
+    ("Section 1. Short title.", {"source": "/pdfs/act.pdf", "file_path": "/pdfs/act.pdf", "page": 0,
+                                 "total_pages": 2, "Title": "The Model Code"}),
+    ("Section 2. Definitions.", {"source": "/pdfs/act.pdf", "file_path": "/pdfs/act.pdf", "page": 1,
+                                 "total_pages": 2, "Title": "The Model Code"}),
+]
+
+
+class CountingExtractor(PDFExtractor):
+    """Reads a PDF's text from the file itself, one page per line, and counts the files it extracts."""
+
+    name = "counting"
+    extracted = []
+
+    def page_count(self, pdf_path):
+        return len(open(pdf_path, encoding="utf-8").read().splitlines())
+
+    def extract(self, pdf_path, start=0, stop=None):
+        self.extracted.append(pdf_path)
+        lines = open(pdf_path, encoding="utf-8").read().splitlines()
+        return [(text, self._page_metadata(pdf_path, page, len(lines), {}, self.name))
+                for page, text in enumerate(lines)][start:stop]
+
+
+def test_hit_under_current_path(tmp_path):
+    cache = ExtractedTextCache(tmp_path, "pypdfium2-1")
+    cache.put("h-act", PAGES)
+
+    pages = cache.get("h-act", "/pdfs/renamed.pdf")
+
+    assert cache.has("h-act") and not cache.has("h-other")
+    assert [text for text, _ in pages] == [text for text, _ in PAGES]
+    assert [metadata for _, metadata in pages] == [
+        {**metadata, "source": "/pdfs/renamed.pdf", "file_path": "/pdfs/renamed.pdf"} for _, metadata in PAGES
+    ]
+
+
+def test_parser_version_change_misses(tmp_path):
+    ExtractedTextCache(tmp_path, "pypdfium2-1").put("h-act", PAGES)
+
+    upgraded = ExtractedTextCache(tmp_path, "pypdfium2-2")
+
+    assert not upgraded.has("h-act") and upgraded.get("h-act", "/pdfs/act.pdf") is None
+    assert ExtractedTextCache(tmp_path, "pdfplumber-1").get("h-act", "/pdfs/act.pdf") is None
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = ExtractedTextCache(tmp_path, "pypdfium2-1")
+    cache.put("h-act", PAGES)
+    path = next(tmp_path.glob("h-act-*"))
+    path.write_bytes(zlib.compress(b"{not json"))
+
+    assert cache.get("h-act", "/pdfs/act.pdf") is None and not path.exists()
+
+
+def test_loader_parses_only_cache_misses(tmp_path, monkeypatch):
+    monkeypatch.setitem(chunking_component.EXTRACTORS, CountingExtractor.name, CountingExtractor)
+    monkeypatch.setattr(CountingExtractor, "extracted", [])
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    (pdf_dir / "a.pdf").write_text("Section 1. Short title.\nSection 2. Definitions.", encoding="utf-8")
+    (pdf_dir / "b.pdf").write_text("Section 1. Extent.", encoding="utf-8")
+    config = DataConfig(root_dir=tmp_path, source_url=[], pdf_directory=pdf_dir,
+                        text_cache_dir=tmp_path / "text_cache", extractor=CountingExtractor.name)
+
+    first = Data_Loader(config=config).load_pdfs()
+    assert len(CountingExtractor.extracted) == 2
+
+    # A fresh loader (e.g. after the registry was lost) is served from the cache
+    second = Data_Loader(config=dataclasses.replace(config, registry_path=tmp_path / "other.json")).load_pdfs()
+    assert len(CountingExtractor.extracted) == 2
+    assert [(doc.page_content, doc.metadata) for doc in second] == [(doc.page_content, doc.metadata) for doc in first]
+
+    # Bumping the extractor version invalidates every entry
+    monkeypatch.setattr(CountingExtractor, "version", "2")
+    third = Data_Loader(config=dataclasses.replace(config, registry_path=tmp_path / "third.json")).load_pdfs()
+    assert len(CountingExtractor.extracted) == 4 and len(third) == 3
@@ -0,0 +1,119 @@
+"""
+Token-mode chunking with a small word-level tokenizer written to disk (no
+model weights anywhere), and TokenCounter next to the embedder on other
+threads, as in the streaming pipeline. The latter needs the model in the
+local cache (AI_LAWYER_TEST_MODEL).
+"""
+
+import os
+import json
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.entity.config_entity import ChunkingConfig
+from AI_Lawyer.components import local_embedding
+from AI_Lawyer.components.chunking_component import Chunking_text
+from AI_Lawyer.components.local_embedding import LocalSentenceTransformerEmbeddings
+from AI_Lawyer.components.token_length import TokenCounter
+
+
+MODEL = os.environ.get("AI_LAWYER_TEST_MODEL", "all-MiniLM-L6-v2")
+TEXTS = [f"Section {i} of the Act applies to the whole of India. " * (5 + i % 40) for i in range(128)]
+PAGE = " ".join(f"Clause {i} binds the tenant to pay rent by day {i % 28 + 1}." for i in range(40))
+
+
+@pytest.fixture(scope="module")
+def word_tokenizer(tmp_path_factory):
+    """A sentence-transformers style model folder holding only a tokenizer: one token per word or mark."""
+    tokenizers = pytest.importorskip("tokenizers")
+    from transformers import PreTrainedTokenizerFast
+
+    words = sorted(set(PAGE.replace(".", " . ").split()))
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + words)}
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    backend.post_processor = tokenizers.processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])])
+
+    path = tmp_path_factory.mktemp("word-tokenizer")
+    PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+                            cls_token="[CLS]", sep_token="[SEP]").save_pretrained(path)
+    (path / "sentence_bert_config.json").write_text(json.dumps({"max_seq_length": 34}))
+    return str(path)
+
+
+def test_counter_loads_only_the_tokenizer(word_tokenizer, monkeypatch):
+    monkeypatch.setattr(local_embedding, "load_sentence_transformer",
+                        lambda *args, **kwargs: pytest.fail("the model was loaded"))
+    counter = TokenCounter(word_tokenizer)
+
+    assert counter.max_seq_length == 34 and counter.max_tokens == 32
+    assert len(counter.measure(["Clause 1 binds the tenant."])[0]) == 6
+
+
+def test_token_chunks_fit_the_window(word_tokenizer):
+    config = ChunkingConfig(chunk_size=24, chunk_overlap=4, add_start_index=True,
+                            length_unit="tokens", tokenizer=word_tokenizer)
+    chunker = Chunking_text(config)
+    store = chunker.create_chunks([Document(page_content=PAGE, metadata={"source": "lease.pdf", "page": 0})])
+    spans = [(store.ref(i).start, store.ref(i).end) for i in range(len(store))]
+    lengths = [len(spans_) for spans_ in chunker.token_counter.measure([store.text(i) for i in range(len(store))])]
+
+    assert len(store) > 1 and max(lengths) <= 24
+    assert spans[0][0] == 0 and spans[-1][1] == len(PAGE)
+    # Consecutive windows overlap, and none starts or ends inside a word
+    assert all(start < previous_end for (_, previous_end), (start, _) in zip(spans, spans[1:]))
+    assert all((start == 0 or PAGE[start - 1] == " ") and (end == len(PAGE) or PAGE[end] in " .")
+               for start, end in spans)
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_strict_window(word_tokenizer, strict):
+    config = ChunkingConfig(chunk_size=40, chunk_overlap=0, add_start_index=True, length_unit="tokens",
+                            tokenizer=word_tokenizer, strict_window=strict)
+    if strict:
+        with pytest.raises(ValueError, match="exceeds"):
+            Chunking_text(config)
+    else:
+        assert Chunking_text(config).token_counter.max_tokens == 32
+
+
+@pytest.fixture(scope="module")
+def models():
+    try:
+        embedder = LocalSentenceTransformerEmbeddings(MODEL, batch_size=32, offline=True)
+        embedder.encode(TEXTS[:1])
+        return TokenCounter(MODEL), embedder
+    except Exception as e:
+        pytest.skip(f"{MODEL} could not be loaded offline: {e}")
+
+
+def test_counting_alongside_encoding(models):
+    counter, embedder = models
+    expected = [len(spans) for spans in counter.measure(TEXTS)]
+    errors, results = [], []
+
+    def count():
+        try:
+            for _ in range(10):
+                results.append([len(spans) for spans in counter.measure(TEXTS)])
+        except Exception as e:
+            errors.append(e)
+
+    def encode():
+        try:
+            for _ in range(4):
+                embedder.encode(TEXTS)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for target in (count, encode, count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert all(result == expected for result in results)
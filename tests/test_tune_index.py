@@ -0,0 +1,46 @@
+"""
+tune_index.py's sweep: the cheapest knob value that reaches the target
+recall on held-out queries is chosen, exact indexes have nothing to tune.
+"""
+
+import numpy as np
+
+from AI_Lawyer.components.vector_index import build_faiss_store
+from conftest import HashEmbeddings
+from tune_index import held_out_queries, tune
+
+
+def make_store(index_spec, count=1000):
+    texts = [f"Section {i}. The lessee shall keep the premises in repair, clause {i % 37}." for i in range(count)]
+    metadatas = [{"source": "act.pdf", "start_index": 80 * i} for i in range(count)]
+    return build_faiss_store(texts, metadatas, HashEmbeddings().encode(texts), HashEmbeddings(), index_spec=index_spec)
+
+
+def test_held_out_queries_are_not_stored_vectors():
+    faiss_db = make_store("Flat", count=200)
+    queries = held_out_queries(faiss_db, 50)
+
+    assert queries.shape == (50, HashEmbeddings.dimension) and queries.dtype == np.float32
+    distances, _ = faiss_db.index.search(queries, 1)
+    assert distances.min() > 1e-3
+
+
+def test_sweep_stops_at_target_recall():
+    faiss_db = make_store("IVF16,Flat")
+    queries = held_out_queries(faiss_db, 100)
+
+    name, chosen, rows = tune(faiss_db.index, queries, 10, 0.9)
+
+    assert name == "nprobe" and chosen == rows[-1][0]
+    assert rows[-1][1] >= 0.9 and all(recall < 0.9 for _, recall, _ in rows[:-1])
+    assert [value for value, _, _ in rows] == [1, 2, 4, 8, 16][:len(rows)]
+    # Every list probed is an exhaustive search
+    assert tune(faiss_db.index, queries, 10, 1.0)[1] <= 16
+
+
+def test_exact_index_has_nothing_to_tune():
+    faiss_db = make_store("Flat", count=200)
+
+    name, chosen, rows = tune(faiss_db.index, held_out_queries(faiss_db, 20), 10, 0.95)
+
+    assert name is None and chosen is None and rows[0][1] == 1.0
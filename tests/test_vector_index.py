@@ -0,0 +1,135 @@
+"""
+Incremental updates of a saved store: chunks of changed and removed
+documents leave the index, docstore and label map together, and those of
+added documents come in under their stable labels. Also index building
+from a spec and the search-time parameters saved with the store.
+"""
+
+import logging
+
+import faiss
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from AI_Lawyer.components.chunk_store import chunk_id
+from AI_Lawyer.components.document_registry import DocumentDelta
+from AI_Lawyer.components.store_io import store_dir
+from AI_Lawyer.components.vector_index import (
+    apply_search_params, chunk_label, convert_index, load_index_params, make_index, save_index_params,
+    search_knob, stored_vectors
+)
+from conftest import HashEmbeddings
+
+
+def document_chunks(source, content_hash, sections):
+    return [Document(page_content=f"{source}: section {n}. {'text ' * n}",
+                     metadata={"source": source, "content_hash": content_hash, "page": 0, "start_index": 100 * n})
+            for n in range(sections)]
+
+
+def assert_store_holds(faiss_db, chunks):
+    ids = {chunk_id(chunk.page_content, chunk.metadata): chunk for chunk in chunks}
+    assert dict(faiss_db.index_to_docstore_id.items()) == {chunk_label(doc_id): doc_id for doc_id in ids}
+
+    labels, vectors = stored_vectors(faiss_db.index)
+    assert sorted(labels.tolist()) == sorted(faiss_db.index_to_docstore_id)
+    expected = HashEmbeddings().encode([ids[faiss_db.index_to_docstore_id[int(label)]].page_content
+                                        for label in labels])
+    np.testing.assert_allclose(vectors, expected, atol=1e-5)
+
+    for doc_id, chunk in ids.items():
+        stored = faiss_db.docstore.search(doc_id)
+        assert stored.page_content == chunk.page_content and stored.metadata["source"] == chunk.metadata["source"]
+
+
+@pytest.mark.parametrize("index_spec", ["Flat", "HNSW16"])
+def test_add_change_remove(make_creator, index_spec):
+    # HNSW has no remove_ids: remove_chunks rebuilds it from the vectors that stay
+    creator = make_creator(index_spec=index_spec)
+    act, code, evidence, rules = (document_chunks("act.pdf", "h-act", 3), document_chunks("code.pdf", "h-code-1", 4),
+                                  document_chunks("evidence.pdf", "h-evidence", 6),
+                                  document_chunks("rules.pdf", "h-rules", 2))
+    creator.create_vector_store(act + code + evidence)
+
+    new_code = document_chunks("code.pdf", "h-code-2", 5)
+    delta = DocumentDelta(added=["rules.pdf"], changed=["code.pdf"], removed=["act.pdf"],
+                          unchanged=["evidence.pdf"], stale_hashes={"h-act", "h-code-1"})
+    faiss_db = creator.update_vector_store(new_code + rules, delta)
+
+    expected = evidence + new_code + rules
+    assert faiss_db.index.ntotal == len(expected)
+    assert_store_holds(faiss_db, expected)
+    for chunk in act + code:
+        assert "not found" in str(faiss_db.docstore.search(chunk_id(chunk.page_content, chunk.metadata)))
+
+    # The same again after a save and reload through the compact docstore
+    assert_store_holds(creator.load_vector_store(HashEmbeddings(), mmap=False), expected)
+
+
+def test_update_is_idempotent(make_creator):
+    creator = make_creator()
+    code = document_chunks("code.pdf", "h-code", 4)
+    creator.create_vector_store(code)
+
+    faiss_db = creator.update_vector_store(code, DocumentDelta(changed=["code.pdf"]))
+
+    assert faiss_db.index.ntotal == len(code)
+    assert_store_holds(faiss_db, code)
+
+
+def search_param(index, name):
+    if name == "nprobe":
+        return faiss.extract_index_ivf(index).nprobe
+    return faiss.downcast_index(index.index).hnsw.efSearch
+
+
+def test_ivf_trains_on_a_sample(caplog):
+    caplog.set_level(logging.INFO, logger="AI_Lawyer_Logger")
+    vectors = HashEmbeddings().encode([f"chunk {i}" for i in range(2000)])
+
+    index = make_index(vectors, "IVF8,Flat", train_size=500)
+
+    assert isinstance(index, faiss.IndexIDMap2) and index.is_trained and index.ntotal == 0
+    assert "Trained 'IVF8,Flat' on 500 vectors" in caplog.text
+    with pytest.raises(ValueError, match="fewer IVF lists"):
+        make_index(vectors[:100], "IVF256,Flat")
+
+
+def test_search_knobs():
+    vectors = HashEmbeddings().encode([f"chunk {i}" for i in range(400)])
+    ivf, hnsw = make_index(vectors, "IVF8,Flat"), make_index(vectors, "HNSW16")
+
+    assert search_knob(ivf) == ("nprobe", [1, 2, 4, 8])
+    assert search_knob(hnsw)[0] == "efSearch"
+    assert search_knob(make_index(vectors, "Flat")) is None
+
+    apply_search_params(ivf, {"nprobe": 4})
+    apply_search_params(hnsw, {"efSearch": 77})
+    assert search_param(ivf, "nprobe") == 4 and search_param(hnsw, "efSearch") == 77
+
+
+@pytest.mark.parametrize("index_spec, name, value", [("IVF4,Flat", "nprobe", 3), ("HNSW16", "efSearch", 77)])
+def test_search_params_survive_save_and_load(make_creator, index_spec, name, value):
+    creator = make_creator(index_spec=index_spec, search_params={name: value})
+    creator.create_vector_store(document_chunks("act.pdf", "h-act", 200))
+
+    assert load_index_params(store_dir(creator.db_path)) == {"index_spec": index_spec, "search_params": {name: value}}
+    for mmap in (False, True):
+        assert search_param(make_creator(index_spec=index_spec).load_vector_store(mmap=mmap).index, name) == value
+
+
+def test_tuned_params_kept_only_for_the_same_spec(make_creator):
+    creator = make_creator(index_spec="HNSW16")
+    faiss_db = creator.create_vector_store(document_chunks("act.pdf", "h-act", 50))
+    # As tune_index.py --write leaves them
+    save_index_params(store_dir(creator.db_path), "HNSW16", {"efSearch": 77})
+
+    creator.save_vector_store(faiss_db)
+    assert load_index_params(store_dir(creator.db_path))["search_params"] == {"efSearch": 77}
+    # Config overrides a tuned value
+    make_creator(index_spec="HNSW16", search_params={"efSearch": 90}).save_vector_store(faiss_db)
+    assert load_index_params(store_dir(creator.db_path))["search_params"] == {"efSearch": 90}
+
+    creator.save_vector_store(convert_index(faiss_db, "Flat"), "Flat")
+    assert load_index_params(store_dir(creator.db_path)) == {"index_spec": "Flat", "search_params": {}}
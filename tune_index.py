@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tune the search-time parameters of the saved FAISS index for a target recall.
+
+Embeds the opening sentence of a sample of stored chunks as queries (held
+out: stored vectors would find themselves and overstate recall), computes
+their exact top-k with a flat index, then sweeps the index's accuracy knob
+(`nprobe` for IVF, `efSearch` for HNSW) from cheapest to most expensive,
+reporting recall@k and per-query latency for each value. The cheapest value that
+reaches --target-recall is chosen; with --write it is stored in the
+index_params.json sidecar, which `load_existing_vector_store` applies.
+
+--spec evaluates another index type (e.g. HNSW32, IVF256,Flat) built from the
+stored vectors instead of the saved index; with --write the store is saved
+in that format.
+
+Usage:
+    python tune_index.py [--spec HNSW32] [--k 10] [--target-recall 0.95] [--queries 500] [--write]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from AI_Lawyer.config.configuration import ConfigurationManager
+from AI_Lawyer.components.local_embedding import EmbeddingCreator
+from AI_Lawyer.components.store_io import store_dir
+from AI_Lawyer.components.reranking import sample_query_texts
+from AI_Lawyer.components.vector_index import (
+    stored_vectors, convert_index, search_knob, apply_search_params, load_index_params, save_index_params
+)
+from AI_Lawyer.utils.logging_setup import logger
+
+
+def measure(index, queries, truth, k):
+    """(recall@k, mean ms per query) of `index` against the exact neighbours `truth`."""
+    found = np.empty_like(truth)
+    started = time.perf_counter()
+    for row in range(len(queries)):
+        _, found[row:row + 1] = index.search(queries[row:row + 1], k)
+    ms = (time.perf_counter() - started) * 1000 / len(queries)
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size, ms
+
+
+def held_out_queries(faiss_db, count, seed=0):
+    """Embeddings of query-like texts drawn from the stored chunks, which are not themselves in the index."""
+    texts = sample_query_texts(faiss_db, count, seed)
+    return np.array(faiss_db.embedding_function.embed_documents(texts), dtype=np.float32)
+
+
+def tune(index, queries, k, target_recall):
+    """
+    Sweeps the search knob of `index` until recall@k reaches `target_recall`.
+    Returns (knob name or None, chosen value or None, [(value, recall, ms)]);
+    the index is left with the last value tried.
+    """
+    labels, vectors = stored_vectors(index)
+    k = min(k, len(vectors))
+    exact = faiss.IndexFlatL2(index.d)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    truth = labels[truth]
+
+    knob = search_knob(index)
+    if knob is None:
+        return None, None, [(None, *measure(index, queries, truth, k))]
+    name, values = knob
+    rows = []
+    for value in values:
+        apply_search_params(index, {name: value})
+        recall, ms = measure(index, queries, truth, k)
+        rows.append((value, recall, ms))
+        if recall >= target_recall:
+            return name, value, rows
+    return name, None, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spec", default=None, help="index_factory spec to evaluate instead of the saved index")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--queries", type=int, default=500, help="chunks sampled for query texts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", action="store_true", help="save the chosen parameters with the index")
+    args = parser.parse_args()
+
+    embed_cfg = ConfigurationManager().get_embeddings_config()
+    creator = EmbeddingCreator(config=embed_cfg)
+    if not creator.has_vector_store():
+        logger.error(f"No vector store at {creator.db_path}. Run main.py first.")
+        return 1
+
+    faiss_db = creator.load_vector_store(creator.get_embedding_model())
+    index_spec = creator.saved_index_spec()
+    if args.spec and args.spec != index_spec:
+        logger.info(f"Building '{args.spec}' from the stored vectors")
+        convert_index(faiss_db, args.spec, train_size=embed_cfg.index_train_size,
+                      rerank_factor=embed_cfg.rerank_factor)
+        index_spec = args.spec
+
+    queries = held_out_queries(faiss_db, args.queries, args.seed)
+    k = min(args.k, faiss_db.index.ntotal)
+    print(f"'{index_spec}': {faiss_db.index.ntotal} vectors, {len(queries)} queries, "
+          f"target recall@{k} >= {args.target_recall}")
+    name, chosen, rows = tune(faiss_db.index, queries, k, args.target_recall)
+    if name is None:
+        _, recall, ms = rows[0]
+        print(f"exact index: recall@{k} {recall:.4f}, {ms:.3f} ms/query; nothing to tune")
+        return 0
+
+    print(f"{name:>10} {'recall@' + str(k):>10} {'ms/query':>10}")
+    for value, recall, ms in rows:
+        print(f"{value:>10} {recall:>10.4f} {ms:>10.3f}")
+    if chosen is None:
+        print(f"No {name} reached recall {args.target_recall}; consider a larger index or another spec")
+        return 1
+    print(f"-> {name}={chosen}")
+
+    if args.write:
+        params = load_index_params(store_dir(creator.db_path))
+        search_params = params.get("search_params", {}) if params.get("index_spec") == index_spec else {}
+        search_params[name] = chosen
+        if index_spec != creator.saved_index_spec():
+            creator.save_vector_store(faiss_db, index_spec)
+        # Only the live version's params file changes; the index itself stays as saved
+        save_index_params(store_dir(creator.db_path), index_spec, search_params)
+        logger.info(f"Saved search params {search_params} for '{index_spec}' at {creator.db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())